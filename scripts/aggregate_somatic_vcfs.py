@@ -2,82 +2,608 @@
 
 This is intentionally simple and robust.
 For real-world use, you may want to parse INFO/FORMAT more deeply.
+
+For large cohorts use --matrix-format sparse: the PASS matrix (and optional
+FORMAT/AF) is written as scipy-compatible CSR .npz plus row/column index TSVs
+instead of a dense pivot.
+
+Matrix rows are variants in packed-key order (see variant_keys.py; --contigs
+numbers the contigs), with variants that share an inexact key kept apart by
+their labels.
+
+--stream parses the VCFs in a process pool into per-sample shards sorted by
+packed variant key (contig, position, allele) and label, then k-way merges
+the shards and writes every output incrementally, so memory is bounded by
+the number of open shards rather than the number of records. Rows come out
+in key order instead of input order.
+
+--shard-cache DIR keeps those shards between runs. A shard is reused while
+its VCF keeps the same path, size and mtime, or the same content hash when
+only the mtime moved, and its keys were packed with the same contig
+dictionary, so re-aggregating a growing cohort only parses new or changed
+VCFs.
 """
 
 import argparse
+import array
+import csv
+import hashlib
+import heapq
 import os
+import shutil
+import tempfile
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
 import pandas as pd
 
+from columnar import (
+    decode_levels,
+    file_digest,
+    is_table,
+    load_table,
+    save_table,
+    update_table_meta,
+)
+from variant_keys import (
+    contig_digest,
+    format_variant_ids,
+    key_labels,
+    load_contig_table,
+    pack_keys,
+    variant_groups,
+)
+
+LONG_COLUMNS = ["sample", "chrom", "pos", "ref", "alt", "filter", "qual", "info", "variant_id"]
+SHARD_TEXT_COLUMNS = ["chrom", "ref", "alt", "filter", "qual", "info"]
+SHARD_CHUNK_ROWS = 65536
 
-def parse_vcf(vcf_path, sample):
-    rows = []
+
+def format_af(format_field, sample_field):
+    """FORMAT/AF of one sample column (first ALT); NaN when absent."""
+    keys = format_field.split(":")
+    if "AF" not in keys:
+        return np.nan
+    values = sample_field.split(":")
+    idx = keys.index("AF")
+    if idx >= len(values):
+        return np.nan
+    value = values[idx].split(",")[0]
+    try:
+        return float(value)
+    except ValueError:
+        return np.nan
+
+
+def parse_vcf(vcf_path, sample, with_af=False, contigs=None):
+    columns = {name: [] for name in ("chrom", "pos", "ref", "alt", "filter", "qual", "info")}
+    if with_af:
+        columns["af"] = []
     opener = open
     if vcf_path.endswith(".gz"):
         import gzip
         opener = gzip.open
 
+    sample_col = 9
     with opener(vcf_path, "rt") as f:
         for line in f:
             if line.startswith("#"):
+                if line.startswith("#CHROM"):
+                    header = line.rstrip("\n").split("\t")
+                    if sample in header[9:]:
+                        sample_col = header.index(sample)
                 continue
-            parts = line.rstrip("
-").split("	")
+            parts = line.rstrip("\n").split("\t")
             chrom, pos, vid, ref, alt, qual, flt, info = parts[:8]
-            rows.append(
-                {
-                    "sample": sample,
-                    "chrom": chrom,
-                    "pos": int(pos),
-                    "ref": ref,
-                    "alt": alt,
-                    "filter": flt,
-                    "qual": qual,
-                    "info": info,
-                    "variant_id": f"{chrom}:{pos}:{ref}>{alt}",
-                }
+            columns["chrom"].append(chrom)
+            columns["pos"].append(int(pos))
+            columns["ref"].append(ref)
+            columns["alt"].append(alt)
+            columns["filter"].append(flt)
+            columns["qual"].append(qual)
+            columns["info"].append(info)
+            if with_af:
+                has_sample = len(parts) > sample_col
+                columns["af"].append(
+                    format_af(parts[8], parts[sample_col]) if has_sample else np.nan
+                )
+
+    df = pd.DataFrame(columns)
+    df.insert(0, "sample", sample)
+    df["variant_key"] = pack_keys(df["chrom"], df["pos"], df["ref"], df["alt"], contigs)
+    return df
+
+
+def long_labels(long_df):
+    """Key labels of parse_vcf-style rows (lower-case chrom/ref/alt columns)."""
+    return key_labels(long_df["variant_key"], long_df["chrom"], long_df["ref"], long_df["alt"])
+
+
+def presence_matrix(long_df, with_af=False):
+    """Build CSR variant x sample matrices straight from the long records.
+
+    Rows are variants in packed-key order and columns are samples in sorted
+    order, matching the dense pivot. Returns (variant_ids, samples, pass_csr,
+    af_csr) where each CSR is a dict of data/indices/indptr/shape. pass_csr
+    stores a 1 for every PASS call; af_csr (None unless with_af) stores
+    FORMAT/AF for every observed call, PASS or not.
+    """
+    rows, first = variant_groups(long_df["variant_key"].to_numpy(dtype=np.uint64), long_df["label"])
+    samples, cols = np.unique(long_df["sample"].to_numpy(dtype=str), return_inverse=True)
+    shape = (len(first), len(samples))
+
+    # Collapse duplicate (variant, sample) records the way pivot_table(max) does.
+    cell = rows.astype(np.int64) * shape[1] + cols
+    order = np.argsort(cell, kind="stable")
+    cell = cell[order]
+    starts = np.flatnonzero(np.diff(cell, prepend=-1) != 0)
+    cell = cell[starts]
+    is_pass = (long_df["filter"].to_numpy() == "PASS")[order]
+    cell_pass = np.maximum.reduceat(is_pass.astype(np.uint8), starts) if len(starts) else is_pass
+
+    def to_csr(cells, data):
+        row_idx = cells // shape[1]
+        indptr = np.zeros(shape[0] + 1, dtype=np.int64)
+        indptr[1:] = np.cumsum(np.bincount(row_idx, minlength=shape[0]))
+        return {
+            "data": data,
+            "indices": (cells % shape[1]).astype(np.int32),
+            "indptr": indptr,
+            "shape": shape,
+        }
+
+    keep = cell_pass.astype(bool)
+    pass_csr = to_csr(cell[keep], np.ones(int(keep.sum()), dtype=np.uint8))
+
+    af_csr = None
+    if with_af:
+        af = long_df["af"].to_numpy(dtype=np.float32)[order]
+        af = np.where(np.isnan(af), -np.inf, af)
+        cell_af = np.maximum.reduceat(af, starts) if len(starts) else af
+        cell_af = np.where(np.isinf(cell_af), np.nan, cell_af).astype(np.float32)
+        af_csr = to_csr(cell, cell_af)
+
+    variant_ids = long_df["variant_id"].to_numpy(dtype=object)[first]
+    return variant_ids, samples, pass_csr, af_csr
+
+
+def save_csr_npz(path, csr):
+    """Write a CSR matrix in the layout scipy.sparse.load_npz reads."""
+    np.savez_compressed(
+        path,
+        format=np.array(b"csr"),
+        shape=np.array(csr["shape"], dtype=np.int64),
+        data=csr["data"],
+        indices=csr["indices"],
+        indptr=csr["indptr"],
+    )
+
+
+def write_sparse_matrix(long_df, prefix, with_af=False):
+    """Write <prefix>.pass.npz (+ .af.npz) with .rows.tsv/.cols.tsv index files."""
+    out_dir = os.path.dirname(prefix)
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    variant_ids, samples, pass_csr, af_csr = presence_matrix(long_df, with_af=with_af)
+    save_csr_npz(f"{prefix}.pass.npz", pass_csr)
+    if af_csr is not None:
+        save_csr_npz(f"{prefix}.af.npz", af_csr)
+    pd.DataFrame({"variant_id": variant_ids}).to_csv(f"{prefix}.rows.tsv", sep="\t", index=False)
+    pd.DataFrame({"sample": samples}).to_csv(f"{prefix}.cols.tsv", sep="\t", index=False)
+
+
+def sample_name(vcf_path):
+    return os.path.basename(vcf_path).replace(".filtered.vcf.gz", "")
+
+
+def write_shard(vcf_path, sample, out_dir, with_af=False, meta=None, contigs=None):
+    """Parse one VCF into a (key, label)-sorted columnar shard; returns the row count.
+
+    The original record order is kept in a `row` column so the in-memory mode
+    can restore it.
+    """
+    df = parse_vcf(vcf_path, sample, with_af=with_af, contigs=contigs)
+    df["row"] = np.arange(len(df), dtype=np.int64)
+    df["label"] = long_labels(df)
+    df = df.sort_values(["variant_key", "label"], kind="stable")
+    numeric = {
+        "variant_key": df["variant_key"].to_numpy(dtype=np.uint64),
+        "pos": df["pos"].to_numpy(dtype=np.int64),
+        "row": df["row"].to_numpy(dtype=np.int64),
+    }
+    if with_af:
+        numeric["af"] = df["af"].to_numpy(dtype=np.float32)
+    shard_meta = {
+        "sample": sample,
+        "source": os.path.abspath(vcf_path),
+        "with_af": with_af,
+        "contigs": contig_digest(contigs),
+    }
+    shard_meta.update(meta or {})
+    save_table(
+        out_dir,
+        numeric=numeric,
+        categorical={name: df[name] for name in SHARD_TEXT_COLUMNS},
+        meta=shard_meta,
+    )
+    return len(df)
+
+
+def shard_cache_path(cache_dir, vcf_path, sample):
+    path_digest = hashlib.blake2b(
+        os.path.abspath(vcf_path).encode("utf-8"), digest_size=8
+    ).hexdigest()
+    return os.path.join(cache_dir, f"{sample}.{path_digest}")
+
+
+def cached_shard(vcf_path, sample, cache_dir, with_af=False, contigs=None):
+    """Return (path, rows, reused) for a VCF's shard, rebuilding it if stale.
+
+    Cache entries are keyed by absolute path and validated by size and mtime;
+    when only the mtime differs the content hash decides.
+    """
+    path = shard_cache_path(cache_dir, vcf_path, sample)
+    stat = os.stat(vcf_path)
+    content_hash = None
+    if is_table(path):
+        table = load_table(path)
+        meta = table["meta"]
+        usable = (
+            meta.get("sample") == sample
+            and meta.get("source") == os.path.abspath(vcf_path)
+            and meta.get("size") == stat.st_size
+            and (meta.get("with_af") or not with_af)
+            and meta.get("contigs") == contig_digest(contigs)
+        )
+        if usable and meta.get("mtime_ns") == stat.st_mtime_ns:
+            return path, table["rows"], True
+        if usable:
+            content_hash = file_digest(vcf_path)
+            if content_hash == meta.get("content_hash"):
+                update_table_meta(path, {**meta, "mtime_ns": stat.st_mtime_ns})
+                return path, table["rows"], True
+
+    if content_hash is None:
+        content_hash = file_digest(vcf_path)
+    rows = write_shard(
+        vcf_path,
+        sample,
+        path,
+        with_af=with_af,
+        meta={
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "content_hash": content_hash,
+        },
+        contigs=contigs,
+    )
+    return path, rows, False
+
+
+def prepare_shard(vcf_path, sample, shard_dir, with_af, use_cache, contigs=None):
+    if use_cache:
+        return cached_shard(vcf_path, sample, shard_dir, with_af=with_af, contigs=contigs)
+    path = os.path.join(shard_dir, sample)
+    return path, write_shard(vcf_path, sample, path, with_af=with_af, contigs=contigs), False
+
+
+def _prepare_shard_job(job):
+    return prepare_shard(*job)
+
+
+def prepare_shards(samples, shard_dir, with_af, use_cache, workers, contigs=None):
+    """Build (or reuse) one shard per sample, in parallel when workers > 1."""
+    jobs = [(vcf, sample, shard_dir, with_af, use_cache, contigs) for sample, vcf in samples]
+    workers = max(1, min(workers, len(jobs)))
+    if workers == 1:
+        shards = [_prepare_shard_job(job) for job in jobs]
+    else:
+        with ProcessPoolExecutor(max_workers=workers) as pool:
+            shards = list(pool.map(_prepare_shard_job, jobs))
+    if use_cache:
+        reused = sum(1 for _path, _rows, hit in shards if hit)
+        print(f"Shard cache: reused {reused}, parsed {len(shards) - reused}")
+    return [(path, rows) for path, rows, _hit in shards]
+
+
+def shard_frame(path, sample):
+    """Load a whole shard back into parse_vcf's layout and record order."""
+    table = load_table(path, mmap=False)
+    df = pd.DataFrame({"sample": sample}, index=np.arange(table["rows"]))
+    for name in ["chrom", "pos", "ref", "alt", "filter", "qual", "info"]:
+        if name == "pos":
+            df[name] = table["numeric"]["pos"]
+        else:
+            codes, blob, offsets = table["categorical"][name]
+            df[name] = decode_levels(blob, offsets, codes)
+    if "af" in table["numeric"]:
+        df["af"] = table["numeric"]["af"].astype(np.float64)
+    df["variant_key"] = table["numeric"]["variant_key"]
+    order = np.argsort(table["numeric"]["row"], kind="stable")
+    return df.iloc[order].reset_index(drop=True)
+
+
+def iter_shard(path, sample, chunk_rows=SHARD_CHUNK_ROWS):
+    """Yield (key, label, sample, chrom, pos, ref, alt, filter, qual, info, af) rows.
+
+    The shard is memory-mapped and decoded one chunk at a time.
+    """
+    table = load_table(path)
+    keys = table["numeric"]["variant_key"]
+    pos = table["numeric"]["pos"]
+    af = table["numeric"].get("af")
+    for start in range(0, table["rows"], chunk_rows):
+        stop = min(start + chunk_rows, table["rows"])
+        text = [
+            decode_levels(*_chunk_codes(table["categorical"][name], start, stop))
+            for name in SHARD_TEXT_COLUMNS
+        ]
+        chunk_af = af[start:stop] if af is not None else np.full(stop - start, np.nan)
+        labels = key_labels(keys[start:stop], text[0], text[1], text[2])
+        for idx in range(stop - start):
+            yield (
+                int(keys[start + idx]),
+                labels[idx],
+                sample,
+                text[0][idx],
+                int(pos[start + idx]),
+                text[1][idx],
+                text[2][idx],
+                text[3][idx],
+                text[4][idx],
+                text[5][idx],
+                float(chunk_af[idx]),
             )
 
-    return pd.DataFrame(rows)
+
+def _chunk_codes(column, start, stop):
+    codes, blob, offsets = column
+    return blob, offsets, codes[start:stop]
+
+
+def stream_aggregate(samples, args, with_af, shard_dir, use_cache=False, contigs=None):
+    """Parse in parallel, then merge key-sorted shards into all outputs."""
+    write_dense = args.matrix_format in {"dense", "both"}
+    write_sparse = args.matrix_format in {"sparse", "both"}
+
+    shards = prepare_shards(samples, shard_dir, with_af, use_cache, args.workers, contigs)
+
+    sample_names = sorted({sample for sample, _vcf in samples})
+    n_records = sum(rows for _path, rows in shards)
+    col_of = {sample: idx for idx, sample in enumerate(sample_names)}
+
+    if write_dense and n_records == 0:
+        pd.DataFrame().to_csv(args.out_matrix, sep="\t", index=False)
+        write_dense = False
+
+    long_handle = open(args.out_long, "w", newline="")
+    matrix_handle = open(args.out_matrix, "w", newline="") if write_dense else None
+    rows_handle = None
+    if write_sparse:
+        prefix_dir = os.path.dirname(args.out_sparse_prefix)
+        if prefix_dir:
+            os.makedirs(prefix_dir, exist_ok=True)
+        rows_handle = open(f"{args.out_sparse_prefix}.rows.tsv", "w", newline="")
+    try:
+        long_out = csv.writer(long_handle, delimiter="\t", lineterminator="\n")
+        long_out.writerow(LONG_COLUMNS)
+        matrix_out = None
+        if matrix_handle is not None:
+            matrix_out = csv.writer(matrix_handle, delimiter="\t", lineterminator="\n")
+            matrix_out.writerow(["variant_id"] + sample_names)
+        rows_out = None
+        if rows_handle is not None:
+            rows_out = csv.writer(rows_handle, delimiter="\t", lineterminator="\n")
+            rows_out.writerow(["variant_id"])
+
+        # Compact typed buffers: sparse output memory is O(non-zero cells).
+        pass_indices = array.array("i")
+        af_indices = array.array("i")
+        af_data = array.array("f")
+        row_pass = array.array("q", [0])
+        row_af = array.array("q", [0])
+        current_variant = None
+        current_id = None
+        cells = {}
+
+        def flush():
+            if current_variant is None:
+                return
+            if matrix_out is not None:
+                dense = [0] * len(sample_names)
+                for col, (is_pass, _af) in cells.items():
+                    dense[col] = is_pass
+                matrix_out.writerow([current_id] + dense)
+            if rows_out is not None:
+                rows_out.writerow([current_id])
+                for col in sorted(cells):
+                    is_pass, cell_af = cells[col]
+                    if is_pass:
+                        pass_indices.append(col)
+                    af_indices.append(col)
+                    af_data.append(cell_af)
+                row_pass.append(len(pass_indices))
+                row_af.append(len(af_indices))
+
+        streams = [
+            iter_shard(path, sample) for (sample, _vcf), (path, _rows) in zip(samples, shards)
+        ]
+        for record in heapq.merge(*streams, key=lambda rec: (rec[0], rec[1], rec[2])):
+            key, label, sample, chrom, pos, ref, alt, flt, qual, info, af = record
+            if (key, label) != current_variant:
+                flush()
+                current_variant = (key, label)
+                current_id = f"{chrom}:{pos}:{ref}:{alt}"
+                cells = {}
+            long_out.writerow([sample, chrom, pos, ref, alt, flt, qual, info, current_id])
+            col = col_of[sample]
+            is_pass = int(flt == "PASS")
+            prev_pass, prev_af = cells.get(col, (0, np.nan))
+            cells[col] = (max(prev_pass, is_pass), np.fmax(prev_af, af))
+        flush()
+    finally:
+        long_handle.close()
+        if matrix_handle is not None:
+            matrix_handle.close()
+        if rows_handle is not None:
+            rows_handle.close()
+
+    if write_sparse:
+        shape = (len(row_pass) - 1, len(sample_names) if n_records else 0)
+        save_csr_npz(
+            f"{args.out_sparse_prefix}.pass.npz",
+            {
+                "data": np.ones(len(pass_indices), dtype=np.uint8),
+                "indices": np.asarray(pass_indices, dtype=np.int32),
+                "indptr": np.asarray(row_pass, dtype=np.int64),
+                "shape": shape,
+            },
+        )
+        if with_af:
+            save_csr_npz(
+                f"{args.out_sparse_prefix}.af.npz",
+                {
+                    "data": np.asarray(af_data, dtype=np.float32),
+                    "indices": np.asarray(af_indices, dtype=np.int32),
+                    "indptr": np.asarray(row_af, dtype=np.int64),
+                    "shape": shape,
+                },
+            )
+        cols = sample_names if n_records else []
+        pd.DataFrame({"sample": cols}).to_csv(
+            f"{args.out_sparse_prefix}.cols.tsv", sep="\t", index=False
+        )
 
 
 def main():
     ap = argparse.ArgumentParser()
     ap.add_argument("--vcfs", nargs="+", required=True)
     ap.add_argument("--out-long", required=True)
-    ap.add_argument("--out-matrix", required=True)
+    ap.add_argument("--out-matrix", default="", help="Dense variant x sample PASS TSV")
+    ap.add_argument(
+        "--matrix-format",
+        choices=["dense", "sparse", "both"],
+        default="dense",
+        help="dense TSV (small cohorts), sparse CSR .npz, or both",
+    )
+    ap.add_argument(
+        "--out-sparse-prefix",
+        default="",
+        help="Prefix for <prefix>.pass.npz, .rows.tsv and .cols.tsv",
+    )
+    ap.add_argument(
+        "--sparse-af",
+        action="store_true",
+        help="Also write FORMAT/AF of every call as <prefix>.af.npz",
+    )
+    ap.add_argument(
+        "--stream",
+        action="store_true",
+        help="Parse VCFs in parallel and k-way merge key-sorted shards into the outputs",
+    )
+    ap.add_argument("--workers", type=int, default=1, help="Parser processes")
+    ap.add_argument("--contigs", default="", help="Reference .fai or .dict (contig numbering)")
+    ap.add_argument(
+        "--shard-cache",
+        default="",
+        help="Directory of parsed per-VCF shards reused across runs",
+    )
     args = ap.parse_args()
 
-    dfs = []
-    for vcf in args.vcfs:
-        sample = os.path.basename(vcf).replace(".filtered.vcf.gz", "")
-        df = parse_vcf(vcf, sample)
-        dfs.append(df)
+    write_dense = args.matrix_format in {"dense", "both"}
+    write_sparse = args.matrix_format in {"sparse", "both"}
+    if write_dense and not args.out_matrix:
+        raise ValueError("--out-matrix is required for --matrix-format dense/both")
+    if write_sparse and not args.out_sparse_prefix:
+        raise ValueError("--out-sparse-prefix is required for --matrix-format sparse/both")
+    with_af = write_sparse and args.sparse_af
+    if args.workers < 1:
+        raise ValueError("--workers must be >= 1")
+    contigs = load_contig_table(args.contigs)
+
+    samples = [(sample_name(vcf), vcf) for vcf in args.vcfs]
+    names = [sample for sample, _vcf in samples]
+    if len(set(names)) != len(names):
+        raise ValueError("Duplicate sample names derived from --vcfs")
+
+    os.makedirs(os.path.dirname(args.out_long) or ".", exist_ok=True)
+
+    if args.stream and args.shard_cache:
+        os.makedirs(args.shard_cache, exist_ok=True)
+        stream_aggregate(samples, args, with_af, args.shard_cache, use_cache=True, contigs=contigs)
+        return
+    if args.stream:
+        shard_dir = tempfile.mkdtemp(
+            prefix=".aggregate_shards_", dir=os.path.dirname(args.out_long) or "."
+        )
+        try:
+            stream_aggregate(samples, args, with_af, shard_dir, contigs=contigs)
+        finally:
+            shutil.rmtree(shard_dir, ignore_errors=True)
+        return
+
+    if args.shard_cache:
+        os.makedirs(args.shard_cache, exist_ok=True)
+        shards = prepare_shards(samples, args.shard_cache, with_af, True, args.workers, contigs)
+        dfs = [shard_frame(path, sample) for (sample, _vcf), (path, _rows) in zip(samples, shards)]
+    else:
+        dfs = []
+        for sample, vcf in samples:
+            df = parse_vcf(vcf, sample, with_af=with_af, contigs=contigs)
+            dfs.append(df)
 
     long_df = pd.concat(dfs, axis=0, ignore_index=True) if dfs else pd.DataFrame()
+    if long_df.shape[0] > 0:
+        long_df["variant_id"] = format_variant_ids(
+            long_df.rename(columns={"chrom": "CHROM", "pos": "POS", "ref": "REF", "alt": "ALT"})
+        )
+        long_df["label"] = long_labels(long_df)
 
-    os.makedirs(os.path.dirname(args.out_long), exist_ok=True)
-    long_df.to_csv(args.out_long, sep="	", index=False)
+    long_df.drop(columns=["variant_key", "label", "af"], errors="ignore").to_csv(
+        args.out_long, sep="\t", index=False
+    )
+
+    if write_sparse:
+        if long_df.shape[0] == 0:
+            long_df = pd.DataFrame(
+                {
+                    "sample": pd.Series(dtype=str),
+                    "filter": pd.Series(dtype=str),
+                    "af": pd.Series(dtype=np.float32),
+                    "variant_key": pd.Series(dtype=np.uint64),
+                    "label": pd.Series(dtype=object),
+                    "variant_id": pd.Series(dtype=str),
+                }
+            )
+        write_sparse_matrix(long_df, args.out_sparse_prefix, with_af=with_af)
+
+    if not write_dense:
+        return
 
     if long_df.shape[0] == 0:
-        pd.DataFrame().to_csv(args.out_matrix, sep="	", index=False)
+        pd.DataFrame().to_csv(args.out_matrix, sep="\t", index=False)
         return
 
     # Matrix: 1 if variant present and PASS, else 0
     long_df["is_pass"] = (long_df["filter"] == "PASS").astype(int)
 
-    matrix = (
-        long_df.pivot_table(
-            index="variant_id",
-            columns="sample",
-            values="is_pass",
-            aggfunc="max",
-            fill_value=0,
-        )
-        .reset_index()
+    # Pivot on the (key, label) variant group; the string ID is attached once per variant.
+    keys = long_df["variant_key"].to_numpy(dtype=np.uint64)
+    group, first = variant_groups(keys, long_df["label"])
+    long_df["variant_group"] = group
+    matrix = long_df.pivot_table(
+        index="variant_group",
+        columns="sample",
+        values="is_pass",
+        aggfunc="max",
+        fill_value=0,
     )
+    matrix.index = long_df["variant_id"].to_numpy(dtype=object)[first[matrix.index]]
+    matrix.index.name = "variant_id"
+    matrix.columns.name = None
 
-    matrix.to_csv(args.out_matrix, sep="	", index=False)
+    matrix.reset_index().to_csv(args.out_matrix, sep="\t", index=False)
 
 
 if __name__ == "__main__":
-    main()
\ No newline at end of file
+    main()
@@ -1,18 +1,32 @@
 #!/usr/bin/env python3
 import argparse
+import json
 import os
+
+import numpy as np
 import pandas as pd
-from pandas.errors import EmptyDataError
+
+from annotation_store import join_store, load_store
+from region_index import annotate_regions, load_region_index
+from table_io import read_table, table_format, write_table
+from variant_keys import (
+    empty_index,
+    format_variant_ids,
+    frame_index,
+    frame_labels,
+    isin,
+    load_contig_table,
+    variant_keys,
+)
 
 
 def as_bool(value):
     return str(value).strip().lower() in {"1", "true", "yes", "y"}
 
 
-def load_variant_keys(path):
-    try:
-        df = pd.read_csv(path, sep="\t")
-    except EmptyDataError:
+def load_variant_keys(path, contigs=None):
+    df = read_table(path)
+    if len(df.columns) == 0:
         cols = [
             "CHROM",
             "POS",
@@ -23,10 +37,16 @@ def load_variant_keys(path):
             "DP",
             "AF",
         ]
-        return pd.DataFrame(columns=cols + ["variant_id"])
-
-    # Backward compatibility: older outputs without headers.
-    if not {"CHROM", "POS", "REF", "ALT"}.issubset(df.columns) and df.shape[1] >= 8:
+        df = pd.DataFrame(columns=cols + ["variant_id"])
+        df["variant_key"] = np.zeros(0, dtype=np.uint64)
+        return df
+
+    # Backward compatibility: older TSV outputs without headers.
+    if (
+        table_format(path) == "tsv"
+        and not {"CHROM", "POS", "REF", "ALT"}.issubset(df.columns)
+        and df.shape[1] >= 8
+    ):
         df = pd.read_csv(
             path,
             sep="\t",
@@ -38,19 +58,17 @@ def load_variant_keys(path):
     missing = required - set(df.columns)
     if missing:
         raise ValueError(f"Variant table missing required columns {sorted(missing)}: {path}")
-    df["variant_id"] = (
-        df["CHROM"].astype(str)
-        + ":"
-        + df["POS"].astype(str)
-        + ":"
-        + df["REF"].astype(str)
-        + ":"
-        + df["ALT"].astype(str)
-    )
+    return add_variant_columns(df, contigs)
+
+
+def add_variant_columns(df, contigs=None):
+    """Attach the string variant_id and the packed variant_key."""
+    df["variant_id"] = format_variant_ids(df)
+    df["variant_key"] = variant_keys(df, contigs=contigs)
     return df
 
 
-def load_orthogonal_calls(path):
+def load_orthogonal_calls(path, contigs=None):
     calls = pd.read_csv(path, sep="\t")
     required = {"CHROM", "POS", "REF", "ALT"}
     missing = required - set(calls.columns)
@@ -58,294 +76,374 @@ def load_orthogonal_calls(path):
         raise ValueError(
             f"Orthogonal calls missing required columns {sorted(missing)}: {path}"
         )
-    return set(
-        calls["CHROM"].astype(str)
-        + ":"
-        + calls["POS"].astype(str)
-        + ":"
-        + calls["REF"].astype(str)
-        + ":"
-        + calls["ALT"].astype(str)
-    )
+    return frame_index(calls, contigs=contigs)[:2]
 
 
-def load_chip_panel(path):
-    panel = pd.read_csv(path, sep="\t")
-    required = {"CHROM", "POS", "REF", "ALT", "GENE"}
-    missing = required - set(panel.columns)
-    if missing:
-        raise ValueError(f"CHIP panel missing required columns {sorted(missing)}: {path}")
-    panel["variant_id"] = (
-        panel["CHROM"].astype(str)
-        + ":"
-        + panel["POS"].astype(str)
-        + ":"
-        + panel["REF"].astype(str)
-        + ":"
-        + panel["ALT"].astype(str)
-    )
-    gene_map = {}
-    for _, row in panel.iterrows():
-        gene_map[row["variant_id"]] = str(row["GENE"])
-    return gene_map
+def load_chip_panel(path, contigs=None):
+    return load_store(path, "chip", contigs)
 
 
-def load_annotation_panel(path):
-    panel = pd.read_csv(path, sep="\t")
-    required = {"CHROM", "POS", "REF", "ALT", "GENE", "CLINICAL_TIER", "ACTIONABILITY"}
-    missing = required - set(panel.columns)
-    if missing:
-        raise ValueError(
-            f"Clinical annotation panel missing required columns {sorted(missing)}: {path}"
-        )
-    panel["variant_id"] = (
-        panel["CHROM"].astype(str)
-        + ":"
-        + panel["POS"].astype(str)
-        + ":"
-        + panel["REF"].astype(str)
-        + ":"
-        + panel["ALT"].astype(str)
-    )
-    ann = {}
-    for _, row in panel.iterrows():
-        ann[row["variant_id"]] = {
-            "clinical_gene": str(row["GENE"]),
-            "clinical_tier": str(row["CLINICAL_TIER"]),
-            "actionability": str(row["ACTIONABILITY"]),
-        }
-    return ann
-
-
-def load_clinvar_cosmic(path):
-    panel = pd.read_csv(path, sep="\t")
-    required = {"CHROM", "POS", "REF", "ALT", "CLINVAR", "COSMIC"}
-    missing = required - set(panel.columns)
-    if missing:
-        raise ValueError(
-            f"ClinVar/COSMIC table missing required columns {sorted(missing)}: {path}"
-        )
-    panel["variant_id"] = (
-        panel["CHROM"].astype(str)
-        + ":"
-        + panel["POS"].astype(str)
-        + ":"
-        + panel["REF"].astype(str)
-        + ":"
-        + panel["ALT"].astype(str)
-    )
-    ann = {}
-    for _, row in panel.iterrows():
-        ann[row["variant_id"]] = {
-            "clinvar": str(row["CLINVAR"]),
-            "cosmic": str(row["COSMIC"]),
-        }
-    return ann
+def load_annotation_panel(path, contigs=None):
+    return load_store(path, "clinical", contigs)
+
+
+def load_clinvar_cosmic(path, contigs=None):
+    return load_store(path, "clinvar_cosmic", contigs)
 
 
-def load_simple_varset(path):
+def load_simple_varset(path, contigs=None):
     if not path or not os.path.exists(path):
-        return set()
+        return empty_index()
     calls = pd.read_csv(path, sep="\t")
     required = {"CHROM", "POS", "REF", "ALT"}
     missing = required - set(calls.columns)
     if missing:
         raise ValueError(f"Missing {sorted(missing)} in {path}")
-    return set(
-        calls["CHROM"].astype(str)
-        + ":"
-        + calls["POS"].astype(str)
-        + ":"
-        + calls["REF"].astype(str)
-        + ":"
-        + calls["ALT"].astype(str)
-    )
+    return frame_index(calls, contigs=contigs)[:2]
 
 
-def load_snpeff_map(path):
+def load_snpeff_map(path, contigs=None):
     if not path or not os.path.exists(path):
-        return {}
-    df = pd.read_csv(path, sep="\t")
-    required = {"CHROM", "POS", "REF", "ALT", "SNPEFF_EFFECT", "SNPEFF_IMPACT", "SNPEFF_GENE"}
-    missing = required - set(df.columns)
-    if missing:
-        raise ValueError(f"SnpEff table missing required columns {sorted(missing)}: {path}")
-    df["variant_id"] = (
-        df["CHROM"].astype(str)
-        + ":"
-        + df["POS"].astype(str)
-        + ":"
-        + df["REF"].astype(str)
-        + ":"
-        + df["ALT"].astype(str)
+        return None
+    return load_store(path, "snpeff", contigs)
+
+
+GATE_OPS = {
+    "lt": lambda col, value: col < value,
+    "le": lambda col, value: col <= value,
+    "gt": lambda col, value: col > value,
+    "ge": lambda col, value: col >= value,
+    "eq": lambda col, value: col == value,
+    "ne": lambda col, value: col != value,
+    "in": lambda col, value: col.isin(value),
+    "not_in": lambda col, value: ~col.isin(value),
+}
+GATE_ACTIONS = {"review", "fail"}
+MAX_GATE_RULES = 64
+
+
+def builtin_gate_rules(
+    min_dp,
+    min_af,
+    min_alt_reads,
+    low_vaf_threshold,
+    require_orthogonal_low_vaf,
+    wbc_fail_on_support,
+    chip_flag_action,
+):
+    """Built-in support gates as (name, action, mask function) triples.
+
+    Rule order fixes both the bit position and the order of support_reasons.
+    """
+    rules = [
+        ("low_dp", "fail", lambda df: df["DP"] < min_dp),
+        ("low_af", "fail", lambda df: df["AF"] < min_af),
+        ("low_alt_reads", "fail", lambda df: df["ALT_COUNT"] < min_alt_reads),
+    ]
+    if require_orthogonal_low_vaf:
+        rules.append(
+            (
+                "needs_orthogonal_support",
+                "fail",
+                lambda df: (df["AF"] < low_vaf_threshold) & ~df["orthogonal_support"],
+            )
+        )
+    if wbc_fail_on_support:
+        rules.append(("matched_wbc", "fail", lambda df: df["matched_wbc_support"]))
+    chip_action = str(chip_flag_action).strip().lower()
+    if chip_action in GATE_ACTIONS:
+        rules.append((f"chip_{chip_action}", chip_action, lambda df: df["chip_flag"]))
+    return rules
+
+
+def custom_gate_rules(specs):
+    """Gate rules from clinical_support_gates.custom_rules config entries.
+
+    Each entry is a mapping with name, column, op, value and action, e.g.
+    {"name": "low_qual", "column": "QUAL", "op": "lt", "value": 30, "action": "review"}.
+    """
+    rules = []
+    for spec in specs or []:
+        name = str(spec["name"])
+        column = str(spec["column"])
+        op = str(spec["op"])
+        action = str(spec.get("action", "fail")).lower()
+        value = spec["value"]
+        if op not in GATE_OPS:
+            raise ValueError(f"Unknown gate op {op!r} in custom rule {name!r}")
+        if action not in GATE_ACTIONS:
+            raise ValueError(f"Unknown gate action {action!r} in custom rule {name!r}")
+
+        def mask(df, column=column, op=op, value=value, name=name):
+            if column not in df.columns:
+                raise ValueError(f"Custom gate {name!r} references missing column {column!r}")
+            col = df[column]
+            if op in {"lt", "le", "gt", "ge"}:
+                col = pd.to_numeric(col, errors="coerce")
+            return GATE_OPS[op](col, value).fillna(False).astype(bool)
+
+        rules.append((name, action, mask))
+    return rules
+
+
+def evaluate_gates(df, rules):
+    """Evaluate gate rules column-wise into a reason bitmask.
+
+    A row with no reasons is PASS, a row whose reasons are all review-level is
+    REVIEW, anything else is FAIL. Reason strings are built once per distinct
+    bitmask rather than once per row.
+    """
+    if len(rules) > MAX_GATE_RULES:
+        raise ValueError(f"At most {MAX_GATE_RULES} support gate rules are supported")
+    names = [name for name, _action, _mask in rules]
+    dup = {name for name in names if names.count(name) > 1}
+    if dup:
+        raise ValueError(f"Duplicate support gate rule names: {sorted(dup)}")
+
+    bits = np.zeros(len(df), dtype=np.uint64)
+    review_bits = np.uint64(0)
+    for idx, (_name, action, mask_fn) in enumerate(rules):
+        bit = np.uint64(1) << np.uint64(idx)
+        mask = np.asarray(mask_fn(df), dtype=bool)
+        bits |= np.where(mask, bit, np.uint64(0))
+        if action == "review":
+            review_bits |= bit
+
+    gate = np.where(
+        bits == 0,
+        "PASS",
+        np.where((bits & ~review_bits) == 0, "REVIEW", "FAIL"),
     )
-    mapping = {}
-    for _, row in df.iterrows():
-        mapping[row["variant_id"]] = {
-            "snpeff_effect": str(row["SNPEFF_EFFECT"]),
-            "snpeff_impact": str(row["SNPEFF_IMPACT"]),
-            "snpeff_gene": str(row["SNPEFF_GENE"]),
-        }
-    return mapping
 
+    distinct, inverse = np.unique(bits, return_inverse=True)
+    labels = np.array(
+        [
+            ",".join(name for idx, name in enumerate(names) if int(value) >> idx & 1)
+            for value in distinct
+        ],
+        dtype=object,
+    )
+    return gate, labels[inverse]
+
+
+def load_shared_panels(
+    chip_enabled,
+    chip_panel,
+    clinical_annotations_enabled,
+    clinical_annotations_panel,
+    clinvar_cosmic_tsv,
+    chip_regions="",
+    clinical_regions="",
+    contigs=None,
+):
+    """Load the cohort-wide annotation panels once.
+
+    Returns a dict with chip, clinical and clinvar_cosmic stores plus
+    chip_regions/clinical_regions interval indexes (None when not configured)
+    that can be reused across samples.
+    """
+    chip_genes = None
+    if chip_enabled:
+        if not os.path.exists(chip_panel):
+            raise FileNotFoundError(f"CHIP panel enabled but file missing: {chip_panel}")
+        chip_genes = load_chip_panel(chip_panel, contigs)
+
+    chip_region_index = None
+    if chip_enabled and chip_regions:
+        if not os.path.exists(chip_regions):
+            raise FileNotFoundError(f"CHIP regions configured but file missing: {chip_regions}")
+        chip_region_index = load_region_index(chip_regions)
+
+    ann_map = None
+    if clinical_annotations_enabled:
+        if not os.path.exists(clinical_annotations_panel):
+            raise FileNotFoundError(
+                "Clinical annotations enabled but panel missing: "
+                f"{clinical_annotations_panel}"
+            )
+        ann_map = load_annotation_panel(clinical_annotations_panel, contigs)
 
-def main():
-    parser = argparse.ArgumentParser(description="Annotate consensus and CHIP flags.")
-    parser.add_argument("--input", required=True, help="Mutect-derived variant TSV")
-    parser.add_argument("--sample", required=True)
-    parser.add_argument("--output", required=True)
-    parser.add_argument("--orth-enabled", required=True)
-    parser.add_argument("--orth-calls-dir", default="")
-    parser.add_argument("--chip-enabled", required=True)
-    parser.add_argument("--chip-panel", default="")
-    parser.add_argument("--wbc-enabled", required=True)
-    parser.add_argument("--wbc-calls-dir", default="")
-    parser.add_argument("--wbc-fail-on-support", required=True)
-    parser.add_argument("--normal-sample", default="")
-    parser.add_argument("--clinical-annotations-enabled", required=True)
-    parser.add_argument("--clinical-annotations-panel", default="")
-    parser.add_argument("--clinvar-cosmic-tsv", default="")
-    parser.add_argument("--varscan-enabled", required=True)
-    parser.add_argument("--varscan-tsv", default="")
-    parser.add_argument("--snpeff-enabled", required=True)
-    parser.add_argument("--snpeff-tsv", default="")
-    parser.add_argument("--min-dp", required=True, type=float)
-    parser.add_argument("--min-alt-reads", required=True, type=float)
-    parser.add_argument("--min-af", required=True, type=float)
-    parser.add_argument("--low-vaf-threshold", required=True, type=float)
-    parser.add_argument("--require-orthogonal-low-vaf", required=True)
-    parser.add_argument("--chip-flag-action", default="review")
-    args = parser.parse_args()
+    clinical_region_index = None
+    if clinical_annotations_enabled and clinical_regions:
+        if not os.path.exists(clinical_regions):
+            raise FileNotFoundError(
+                f"Clinical regions configured but file missing: {clinical_regions}"
+            )
+        clinical_region_index = load_region_index(clinical_regions)
+
+    clinvar_cosmic = None
+    if clinvar_cosmic_tsv and os.path.exists(clinvar_cosmic_tsv):
+        clinvar_cosmic = load_clinvar_cosmic(clinvar_cosmic_tsv, contigs)
+
+    return {
+        "chip": chip_genes,
+        "chip_regions": chip_region_index,
+        "clinical": ann_map,
+        "clinical_regions": clinical_region_index,
+        "clinvar_cosmic": clinvar_cosmic,
+    }
+
+
+def annotate_sample(
+    input_path,
+    output_path,
+    sample,
+    panels,
+    settings,
+    normal_sample="",
+    varscan_tsv="",
+    snpeff_tsv="",
+):
+    """Annotate and gate one sample's variant table and write it to output_path.
+
+    panels comes from load_shared_panels; settings holds the per-run flags and
+    thresholds (see settings_from_args).
+    """
+    df = annotate_frame(
+        load_variant_keys(input_path, settings["contigs"]),
+        sample,
+        panels,
+        settings,
+        normal_sample=normal_sample,
+        varscan_tsv=varscan_tsv,
+        snpeff_tsv=snpeff_tsv,
+    )
+    write_table(df.drop(columns=["variant_key"]), output_path)
+    return len(df)
 
-    df = load_variant_keys(args.input)
 
-    orth_enabled = as_bool(args.orth_enabled)
-    chip_enabled = as_bool(args.chip_enabled)
-    wbc_enabled = as_bool(args.wbc_enabled)
-    wbc_fail_on_support = as_bool(args.wbc_fail_on_support)
-    clinical_ann_enabled = as_bool(args.clinical_annotations_enabled)
-    varscan_enabled = as_bool(args.varscan_enabled)
-    snpeff_enabled = as_bool(args.snpeff_enabled)
-    require_orthogonal_low_vaf = as_bool(args.require_orthogonal_low_vaf)
+def annotate_frame(df, sample, panels, settings, normal_sample="", varscan_tsv="", snpeff_tsv=""):
+    """Add support, panel and gate columns to a frame from load_variant_keys.
 
-    orth_supported = set()
+    The variant_key column is kept for downstream in-memory stages.
+    """
+    orth_enabled = settings["orth_enabled"]
+    wbc_enabled = settings["wbc_enabled"]
+    varscan_enabled = settings["varscan_enabled"]
+    snpeff_enabled = settings["snpeff_enabled"]
+    chip_genes = panels["chip"]
+    ann_map = panels["clinical"]
+    clinvar_cosmic = panels["clinvar_cosmic"]
+    contigs = settings["contigs"]
+
+    orth_supported = empty_index()
     if orth_enabled:
-        orth_path = os.path.join(args.orth_calls_dir, f"{args.sample}.tsv")
+        orth_path = os.path.join(settings["orth_calls_dir"], f"{sample}.tsv")
         if not os.path.exists(orth_path):
             raise FileNotFoundError(
                 f"Orthogonal cross-check enabled but file missing: {orth_path}"
             )
-        orth_supported = load_orthogonal_calls(orth_path)
-
-    chip_genes = {}
-    if chip_enabled:
-        if not os.path.exists(args.chip_panel):
-            raise FileNotFoundError(
-                f"CHIP panel enabled but file missing: {args.chip_panel}"
-            )
-        chip_genes = load_chip_panel(args.chip_panel)
+        orth_supported = load_orthogonal_calls(orth_path, contigs)
 
-    wbc_supported = set()
-    if wbc_enabled and args.normal_sample:
-        wbc_path = os.path.join(args.wbc_calls_dir, f"{args.normal_sample}.tsv")
+    wbc_supported = empty_index()
+    if wbc_enabled and normal_sample:
+        wbc_path = os.path.join(settings["wbc_calls_dir"], f"{normal_sample}.tsv")
         if os.path.exists(wbc_path):
-            wbc_supported = load_orthogonal_calls(wbc_path)
-
-    ann_map = {}
-    if clinical_ann_enabled:
-        if not os.path.exists(args.clinical_annotations_panel):
-            raise FileNotFoundError(
-                "Clinical annotations enabled but panel missing: "
-                f"{args.clinical_annotations_panel}"
-            )
-        ann_map = load_annotation_panel(args.clinical_annotations_panel)
+            wbc_supported = load_orthogonal_calls(wbc_path, contigs)
 
-    clinvar_cosmic = {}
-    if args.clinvar_cosmic_tsv and os.path.exists(args.clinvar_cosmic_tsv):
-        clinvar_cosmic = load_clinvar_cosmic(args.clinvar_cosmic_tsv)
-
-    varscan_supported = set()
+    varscan_supported = empty_index()
     if varscan_enabled:
-        if not os.path.exists(args.varscan_tsv):
-            raise FileNotFoundError(f"VarScan enabled but TSV missing: {args.varscan_tsv}")
-        varscan_supported = load_simple_varset(args.varscan_tsv)
+        if not os.path.exists(varscan_tsv):
+            raise FileNotFoundError(f"VarScan enabled but TSV missing: {varscan_tsv}")
+        varscan_supported = load_simple_varset(varscan_tsv, contigs)
 
-    snpeff_map = {}
+    snpeff_map = None
     if snpeff_enabled:
-        if not os.path.exists(args.snpeff_tsv):
-            raise FileNotFoundError(f"SnpEff enabled but TSV missing: {args.snpeff_tsv}")
-        snpeff_map = load_snpeff_map(args.snpeff_tsv)
+        if not os.path.exists(snpeff_tsv):
+            raise FileNotFoundError(f"SnpEff enabled but TSV missing: {snpeff_tsv}")
+        snpeff_map = load_snpeff_map(snpeff_tsv, contigs)
+
+    keys = df["variant_key"].to_numpy(dtype=np.uint64)
+    labels = frame_labels(df, keys)
 
     if orth_enabled:
-        df["orthogonal_support"] = df["variant_id"].isin(orth_supported)
-        df["consensus_flag"] = df["orthogonal_support"].map(
-            lambda x: "consensus" if x else "mutect_only"
-        )
+        df["orthogonal_support"] = isin(keys, *orth_supported, labels=labels)
+        df["consensus_flag"] = np.where(df["orthogonal_support"], "consensus", "mutect_only")
     else:
         df["orthogonal_support"] = False
         df["consensus_flag"] = "not_evaluated"
 
     if varscan_enabled:
-        df["varscan_support"] = df["variant_id"].isin(varscan_supported)
+        df["varscan_support"] = isin(keys, *varscan_supported, labels=labels)
         if orth_enabled:
-            df["consensus_flag"] = (
-                df["orthogonal_support"] | df["varscan_support"]
-            ).map(lambda x: "consensus" if x else "mutect_only")
-        else:
-            df["consensus_flag"] = df["varscan_support"].map(
-                lambda x: "consensus" if x else "mutect_only"
+            df["consensus_flag"] = np.where(
+                df["orthogonal_support"] | df["varscan_support"], "consensus", "mutect_only"
             )
+        else:
+            df["consensus_flag"] = np.where(df["varscan_support"], "consensus", "mutect_only")
     else:
         df["varscan_support"] = False
 
-    if chip_enabled:
-        df["chip_gene"] = df["variant_id"].map(chip_genes).fillna("")
+    if chip_genes is not None:
+        df["chip_gene"] = join_store(keys, chip_genes, {"GENE": "chip_gene"}, labels)["chip_gene"]
+        df["chip_match"] = np.where(df["chip_gene"] != "", "hotspot", "")
+        if panels["chip_regions"] is not None:
+            # Hotspot hits keep their gene; region hits flag the rest.
+            region_gene = annotate_regions(
+                panels["chip_regions"], df["CHROM"], df["POS"], df["REF"]
+            )
+            by_region = (df["chip_gene"] == "") & (region_gene != "")
+            df.loc[by_region, "chip_gene"] = region_gene[by_region.to_numpy()]
+            df.loc[by_region, "chip_match"] = "region"
         df["chip_flag"] = df["chip_gene"] != ""
     else:
         df["chip_gene"] = ""
+        df["chip_match"] = ""
         df["chip_flag"] = False
 
-    if wbc_enabled and args.normal_sample:
-        df["matched_wbc_support"] = df["variant_id"].isin(wbc_supported)
+    if wbc_enabled and normal_sample:
+        df["matched_wbc_support"] = isin(keys, *wbc_supported, labels=labels)
     else:
         df["matched_wbc_support"] = False
 
-    if clinical_ann_enabled:
-        df["clinical_gene"] = df["variant_id"].map(
-            lambda vid: ann_map.get(vid, {}).get("clinical_gene", "")
-        )
-        df["clinical_tier"] = df["variant_id"].map(
-            lambda vid: ann_map.get(vid, {}).get("clinical_tier", "")
-        )
-        df["actionability"] = df["variant_id"].map(
-            lambda vid: ann_map.get(vid, {}).get("actionability", "")
+    if ann_map is not None:
+        joined = join_store(
+            keys,
+            ann_map,
+            {
+                "GENE": "clinical_gene",
+                "CLINICAL_TIER": "clinical_tier",
+                "ACTIONABILITY": "actionability",
+            },
+            labels,
         )
+        for column, values in joined.items():
+            df[column] = values
     else:
         df["clinical_gene"] = ""
         df["clinical_tier"] = ""
         df["actionability"] = ""
 
-    if clinvar_cosmic:
-        df["clinvar"] = df["variant_id"].map(
-            lambda vid: clinvar_cosmic.get(vid, {}).get("clinvar", "")
+    if panels["clinical_regions"] is not None:
+        df["clinical_region"] = annotate_regions(
+            panels["clinical_regions"], df["CHROM"], df["POS"], df["REF"]
         )
-        df["cosmic"] = df["variant_id"].map(
-            lambda vid: clinvar_cosmic.get(vid, {}).get("cosmic", "")
+    else:
+        df["clinical_region"] = ""
+
+    if clinvar_cosmic is not None:
+        joined = join_store(
+            keys, clinvar_cosmic, {"CLINVAR": "clinvar", "COSMIC": "cosmic"}, labels
         )
+        for column, values in joined.items():
+            df[column] = values
     else:
         df["clinvar"] = ""
         df["cosmic"] = ""
 
-    if snpeff_enabled:
-        df["snpeff_effect"] = df["variant_id"].map(
-            lambda vid: snpeff_map.get(vid, {}).get("snpeff_effect", "")
-        )
-        df["snpeff_impact"] = df["variant_id"].map(
-            lambda vid: snpeff_map.get(vid, {}).get("snpeff_impact", "")
-        )
-        df["snpeff_gene"] = df["variant_id"].map(
-            lambda vid: snpeff_map.get(vid, {}).get("snpeff_gene", "")
+    if snpeff_map is not None:
+        joined = join_store(
+            keys,
+            snpeff_map,
+            {
+                "SNPEFF_EFFECT": "snpeff_effect",
+                "SNPEFF_IMPACT": "snpeff_impact",
+                "SNPEFF_GENE": "snpeff_gene",
+            },
+            labels,
         )
+        for column, values in joined.items():
+            df[column] = values
     else:
         df["snpeff_effect"] = ""
         df["snpeff_impact"] = ""
@@ -354,45 +452,121 @@ def main():
     # Ensure numeric support fields are available for gating.
     df["DP"] = pd.to_numeric(df.get("DP", 0), errors="coerce").fillna(0.0)
     df["AF"] = pd.to_numeric(df.get("AF", 0), errors="coerce").fillna(0.0)
-    df["ALT_COUNT"] = (df["DP"] * df["AF"]).round(0)
-
-    def support_gate(row):
-        reasons = []
-        if row["DP"] < args.min_dp:
-            reasons.append("low_dp")
-        if row["AF"] < args.min_af:
-            reasons.append("low_af")
-        if row["ALT_COUNT"] < args.min_alt_reads:
-            reasons.append("low_alt_reads")
-
-        if (
-            require_orthogonal_low_vaf
-            and orth_enabled
-            and row["AF"] < args.low_vaf_threshold
-            and not row["orthogonal_support"]
-        ):
-            reasons.append("needs_orthogonal_support")
-
-        if wbc_enabled and wbc_fail_on_support and row["matched_wbc_support"]:
-            reasons.append("matched_wbc")
-
-        chip_action = args.chip_flag_action.lower()
-        if row["chip_flag"] and chip_action == "review":
-            reasons.append("chip_review")
-        if row["chip_flag"] and chip_action == "fail":
-            reasons.append("chip_fail")
-
-        if not reasons:
-            return "PASS", ""
-        if "chip_review" in reasons and len(reasons) == 1:
-            return "REVIEW", "chip_review"
-        return "FAIL", ",".join(reasons)
-
-    gate = df.apply(support_gate, axis=1, result_type="expand")
-    df["support_gate"] = gate[0]
-    df["support_reasons"] = gate[1]
-
-    df.to_csv(args.output, sep="\t", index=False)
+    alt_count = (df["DP"] * df["AF"]).round(0)
+    if "ALT_COUNT" in df.columns:
+        # Exact FORMAT/AD counts from variant_table; DP*AF only fills gaps.
+        exact = pd.to_numeric(df["ALT_COUNT"], errors="coerce").astype(float)
+        alt_count = exact.fillna(alt_count)
+    df["ALT_COUNT"] = alt_count
+
+    rules = builtin_gate_rules(
+        min_dp=settings["min_dp"],
+        min_af=settings["min_af"],
+        min_alt_reads=settings["min_alt_reads"],
+        low_vaf_threshold=settings["low_vaf_threshold"],
+        require_orthogonal_low_vaf=settings["require_orthogonal_low_vaf"] and orth_enabled,
+        wbc_fail_on_support=wbc_enabled and settings["wbc_fail_on_support"],
+        chip_flag_action=settings["chip_flag_action"],
+    )
+    rules.extend(custom_gate_rules(settings["custom_gates"]))
+    gate, reasons = evaluate_gates(df, rules)
+    df["support_gate"] = gate
+    df["support_reasons"] = reasons
+    return df
+
+
+def add_common_arguments(parser):
+    """Run-wide options shared by the per-sample and cohort entry points."""
+    parser.add_argument("--contigs", default="", help="Reference .fai or .dict (contig numbering)")
+    parser.add_argument("--orth-enabled", required=True)
+    parser.add_argument("--orth-calls-dir", default="")
+    parser.add_argument("--chip-enabled", required=True)
+    parser.add_argument("--chip-panel", default="", help="CHIP TSV or compiled store")
+    parser.add_argument(
+        "--chip-regions", default="", help="CHIP gene regions (BED, or TSV CHROM/START/END/GENE)"
+    )
+    parser.add_argument("--wbc-enabled", required=True)
+    parser.add_argument("--wbc-calls-dir", default="")
+    parser.add_argument("--wbc-fail-on-support", required=True)
+    parser.add_argument("--clinical-annotations-enabled", required=True)
+    parser.add_argument(
+        "--clinical-annotations-panel", default="", help="Clinical TSV or compiled store"
+    )
+    parser.add_argument(
+        "--clinical-regions",
+        default="",
+        help="Clinical gene regions (BED, or TSV CHROM/START/END/GENE)",
+    )
+    parser.add_argument("--clinvar-cosmic-tsv", default="", help="ClinVar/COSMIC TSV or compiled store")
+    parser.add_argument("--varscan-enabled", required=True)
+    parser.add_argument("--snpeff-enabled", required=True)
+    parser.add_argument("--min-dp", required=True, type=float)
+    parser.add_argument("--min-alt-reads", required=True, type=float)
+    parser.add_argument("--min-af", required=True, type=float)
+    parser.add_argument("--low-vaf-threshold", required=True, type=float)
+    parser.add_argument("--require-orthogonal-low-vaf", required=True)
+    parser.add_argument("--chip-flag-action", default="review")
+    parser.add_argument(
+        "--custom-gates-json",
+        default="[]",
+        help="JSON list of extra gate rules with name/column/op/value/action",
+    )
+
+
+def settings_from_args(args):
+    return {
+        "contigs": load_contig_table(args.contigs),
+        "orth_enabled": as_bool(args.orth_enabled),
+        "orth_calls_dir": args.orth_calls_dir,
+        "wbc_enabled": as_bool(args.wbc_enabled),
+        "wbc_calls_dir": args.wbc_calls_dir,
+        "wbc_fail_on_support": as_bool(args.wbc_fail_on_support),
+        "varscan_enabled": as_bool(args.varscan_enabled),
+        "snpeff_enabled": as_bool(args.snpeff_enabled),
+        "min_dp": args.min_dp,
+        "min_alt_reads": args.min_alt_reads,
+        "min_af": args.min_af,
+        "low_vaf_threshold": args.low_vaf_threshold,
+        "require_orthogonal_low_vaf": as_bool(args.require_orthogonal_low_vaf),
+        "chip_flag_action": args.chip_flag_action,
+        "custom_gates": json.loads(args.custom_gates_json),
+    }
+
+
+def shared_panels_from_args(args):
+    return load_shared_panels(
+        chip_enabled=as_bool(args.chip_enabled),
+        chip_panel=args.chip_panel,
+        clinical_annotations_enabled=as_bool(args.clinical_annotations_enabled),
+        clinical_annotations_panel=args.clinical_annotations_panel,
+        clinvar_cosmic_tsv=args.clinvar_cosmic_tsv,
+        chip_regions=args.chip_regions,
+        clinical_regions=args.clinical_regions,
+        contigs=load_contig_table(args.contigs),
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Annotate consensus and CHIP flags.")
+    parser.add_argument("--input", required=True, help="Mutect-derived variant TSV")
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--output", required=True)
+    parser.add_argument("--normal-sample", default="")
+    parser.add_argument("--varscan-tsv", default="")
+    parser.add_argument("--snpeff-tsv", default="")
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    annotate_sample(
+        args.input,
+        args.output,
+        args.sample,
+        shared_panels_from_args(args),
+        settings_from_args(args),
+        normal_sample=args.normal_sample,
+        varscan_tsv=args.varscan_tsv,
+        snpeff_tsv=args.snpeff_tsv,
+    )
 
 
 if __name__ == "__main__":
@@ -0,0 +1,130 @@
+#!/usr/bin/env python3
+"""Annotate every called sample in one process.
+
+Shared panels (CHIP, clinical, ClinVar/COSMIC) are loaded once in the parent
+and handed to a process pool; each worker then runs the same per-sample
+annotation as annotate_variant_flags.py and writes the usual
+<sample>.variants.flagged.tsv.
+"""
+
+import argparse
+import json
+import multiprocessing
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+from annotate_variant_flags import (
+    add_common_arguments,
+    annotate_sample,
+    settings_from_args,
+    shared_panels_from_args,
+)
+
+_WORKER_STATE = {}
+
+
+def _init_worker(panels, settings):
+    _WORKER_STATE["panels"] = panels
+    _WORKER_STATE["settings"] = settings
+
+
+def _annotate_job(job):
+    n_rows = annotate_sample(
+        job["input"],
+        job["output"],
+        job["sample"],
+        _WORKER_STATE["panels"],
+        _WORKER_STATE["settings"],
+        normal_sample=job["normal_sample"],
+        varscan_tsv=job["varscan_tsv"],
+        snpeff_tsv=job["snpeff_tsv"],
+    )
+    return job["sample"], n_rows
+
+
+def per_sample_paths(values, n_samples, name):
+    if not values:
+        return [""] * n_samples
+    if len(values) != n_samples:
+        raise ValueError(f"{name} expects one path per sample ({n_samples}), got {len(values)}")
+    return values
+
+
+def build_jobs(args):
+    n_samples = len(args.samples)
+    if not n_samples:
+        raise ValueError("--samples must list at least one sample")
+    if len(set(args.samples)) != n_samples:
+        raise ValueError("--samples contains duplicate sample IDs")
+    inputs = per_sample_paths(args.inputs, n_samples, "--inputs")
+    outputs = per_sample_paths(args.outputs, n_samples, "--outputs")
+    if not all(inputs) or not all(outputs):
+        raise ValueError("--inputs and --outputs are required for every sample")
+    varscan = per_sample_paths(args.varscan_tsvs, n_samples, "--varscan-tsvs")
+    snpeff = per_sample_paths(args.snpeff_tsvs, n_samples, "--snpeff-tsvs")
+    normal_by_tumor = json.loads(args.normal_samples_json)
+
+    return [
+        {
+            "sample": sample,
+            "input": inputs[idx],
+            "output": outputs[idx],
+            "normal_sample": normal_by_tumor.get(sample, ""),
+            "varscan_tsv": varscan[idx],
+            "snpeff_tsv": snpeff[idx],
+        }
+        for idx, sample in enumerate(args.samples)
+    ]
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Annotate consensus and CHIP flags for a whole cohort."
+    )
+    parser.add_argument("--samples", nargs="+", required=True)
+    parser.add_argument("--inputs", nargs="+", required=True, help="Variant TSVs, one per sample")
+    parser.add_argument("--outputs", nargs="+", required=True, help="Flagged TSVs, one per sample")
+    parser.add_argument("--varscan-tsvs", nargs="*", default=[])
+    parser.add_argument("--snpeff-tsvs", nargs="*", default=[])
+    parser.add_argument(
+        "--normal-samples-json", default="{}", help="JSON map of tumor sample -> matched normal"
+    )
+    parser.add_argument("--workers", type=int, default=1)
+    add_common_arguments(parser)
+    args = parser.parse_args()
+
+    if args.workers < 1:
+        raise ValueError("--workers must be >= 1")
+
+    jobs = build_jobs(args)
+    panels = shared_panels_from_args(args)
+    settings = settings_from_args(args)
+
+    for job in jobs:
+        out_dir = os.path.dirname(job["output"])
+        if out_dir:
+            os.makedirs(out_dir, exist_ok=True)
+
+    workers = min(args.workers, len(jobs))
+    if workers == 1:
+        _init_worker(panels, settings)
+        results = [_annotate_job(job) for job in jobs]
+    else:
+        # Fork lets workers share the parent's panels (and store mmaps)
+        # without pickling them.
+        methods = multiprocessing.get_all_start_methods()
+        context = multiprocessing.get_context("fork" if "fork" in methods else None)
+        with ProcessPoolExecutor(
+            max_workers=workers,
+            mp_context=context,
+            initializer=_init_worker,
+            initargs=(panels, settings),
+        ) as pool:
+            results = list(pool.map(_annotate_job, jobs))
+
+    for sample, n_rows in results:
+        print(f"{sample}: annotated {n_rows} variants")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,129 @@
+"""Compiled variant annotation stores.
+
+An annotation TSV (CHIP hotspots, clinical panel, ClinVar/COSMIC, SnpEff) is
+compiled once into a columnar table directory (see columnar.py): a sorted
+uint64 `keys` column from variant_keys, the LABEL of every inexact key, and
+one dictionary-encoded column per annotation field. The metadata records the
+contig_digest the keys were packed with, and a store is only joined with keys
+packed from the same contig dictionary. Per-sample annotation then
+memory-maps the store and resolves every variant with a single searchsorted
+join.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+
+from columnar import decode_levels, encode_categorical, is_table, load_table, save_table
+from variant_keys import KEY_COLUMNS, contig_digest, frame_index, lookup
+
+STORE_KINDS = {
+    "chip": {
+        "what": "CHIP panel",
+        "columns": ["GENE"],
+    },
+    "clinical": {
+        "what": "Clinical annotation panel",
+        "columns": ["GENE", "CLINICAL_TIER", "ACTIONABILITY"],
+    },
+    "clinvar_cosmic": {
+        "what": "ClinVar/COSMIC table",
+        "columns": ["CLINVAR", "COSMIC"],
+    },
+    "snpeff": {
+        "what": "SnpEff table",
+        "columns": ["SNPEFF_EFFECT", "SNPEFF_IMPACT", "SNPEFF_GENE"],
+    },
+}
+
+
+def read_annotation_tsv(path, kind):
+    spec = STORE_KINDS[kind]
+    header = pd.read_csv(path, sep="\t", nrows=0)
+    required = set(KEY_COLUMNS) | set(spec["columns"])
+    missing = required - set(header.columns)
+    if missing:
+        raise ValueError(f"{spec['what']} missing required columns {sorted(missing)}: {path}")
+    dtypes = {column: str for column in spec["columns"]}
+    dtypes.update({"CHROM": str, "REF": str, "ALT": str})
+    return pd.read_csv(path, sep="\t", usecols=KEY_COLUMNS + spec["columns"], dtype=dtypes)
+
+
+def _indexed_columns(df, kind, contigs=None):
+    """Sorted keys, their labels and the aligned annotation values; later rows win."""
+    spec = STORE_KINDS[kind]
+    index_keys, labels, rows = frame_index(df, spec["what"], contigs)
+    columns = {
+        column: pd.Series(df[column].to_numpy(dtype=object)[rows]).astype(str)
+        for column in spec["columns"]
+    }
+    return index_keys, labels, columns
+
+
+def _label_reader(codes, blob, offsets):
+    return lambda positions: decode_levels(blob, offsets, codes[positions])
+
+
+def store_from_frame(df, kind, contigs=None):
+    index_keys, labels, columns = _indexed_columns(df, kind, contigs)
+    return {
+        "kind": kind,
+        "keys": index_keys,
+        "labels": labels,
+        "columns": {name: encode_categorical(values) for name, values in columns.items()},
+    }
+
+
+def compile_store(tsv_path, kind, out_dir, contigs=None):
+    df = read_annotation_tsv(tsv_path, kind)
+    index_keys, labels, columns = _indexed_columns(df, kind, contigs)
+    save_table(
+        out_dir,
+        numeric={"keys": index_keys},
+        categorical={**columns, "LABEL": labels},
+        meta={
+            "kind": kind,
+            "source": os.path.abspath(tsv_path),
+            "contigs": contig_digest(contigs),
+        },
+    )
+    return len(index_keys)
+
+
+def load_store(path, kind, contigs=None):
+    """Open a compiled store directory, or compile a TSV in memory."""
+    if is_table(path):
+        table = load_table(path)
+        stored_kind = table["meta"].get("kind")
+        if stored_kind != kind:
+            raise ValueError(f"Annotation store {path} holds {stored_kind!r}, expected {kind!r}")
+        if table["meta"].get("contigs") != contig_digest(contigs):
+            raise ValueError(
+                f"Annotation store {path} was keyed with another contig dictionary; rebuild it"
+            )
+        columns = dict(table["categorical"])
+        return {
+            "kind": kind,
+            "keys": table["numeric"]["keys"],
+            "labels": _label_reader(*columns.pop("LABEL")),
+            "columns": columns,
+        }
+    return store_from_frame(read_annotation_tsv(path, kind), kind, contigs)
+
+
+def join_store(keys, store, names, labels=None):
+    """Left-join store columns onto packed keys.
+
+    names maps store column -> output column. Unmatched keys get "". labels
+    are the key_labels of keys, needed to confirm inexact hits.
+    """
+    pos = lookup(keys, store["keys"], store["labels"], labels)
+    hit = pos >= 0
+    out = {}
+    for source, name in names.items():
+        codes, blob, offsets = store["columns"][source]
+        row_codes = np.full(len(pos), -1, dtype=np.int64)
+        row_codes[hit] = codes[pos[hit]]
+        out[name] = decode_levels(blob, offsets, row_codes)
+    return out
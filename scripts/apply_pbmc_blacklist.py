@@ -1,79 +1,92 @@
 #!/usr/bin/env python3
 import argparse
-from pathlib import Path
 
-import pandas as pd
-from pandas.errors import EmptyDataError
+from columnar import decode_levels, is_table, load_table
+from table_io import read_table, write_table
+from variant_keys import (
+    contig_digest,
+    frame_index,
+    frame_keys,
+    frame_labels,
+    isin,
+    load_contig_table,
+)
 
 
 def as_bool(value):
     return str(value).strip().lower() in {"1", "true", "yes", "y"}
 
 
-def load_table(path):
-    try:
-        return pd.read_csv(path, sep="\t")
-    except EmptyDataError:
-        return pd.DataFrame()
-
-
-def add_variant_id(df):
-    required = {"CHROM", "POS", "REF", "ALT"}
-    missing = required - set(df.columns)
-    if missing:
-        raise ValueError(f"Missing required columns {sorted(missing)}")
-    df["variant_id"] = (
-        df["CHROM"].astype(str)
-        + ":"
-        + df["POS"].astype(str)
-        + ":"
-        + df["REF"].astype(str)
-        + ":"
-        + df["ALT"].astype(str)
+def load_blacklist_index(path, contigs=None):
+    """(keys, labels) index of the PBMC blacklist, or None when it is empty.
+
+    The key table exported by build_pbmc_blacklist is memory-mapped as is
+    (it must be keyed with the same contig dictionary); a blacklist TSV is
+    re-keyed.
+    """
+    if is_table(path):
+        table = load_table(path)
+        if table["meta"].get("contigs") != contig_digest(contigs):
+            raise ValueError(
+                f"PBMC blacklist keys {path} were packed with another contig dictionary"
+            )
+        keys = table["numeric"]["keys"]
+        if not len(keys):
+            return None
+        codes, blob, offsets = table["categorical"]["LABEL"]
+        return keys, lambda positions: decode_levels(blob, offsets, codes[positions])
+    blacklist_df = read_table(path)
+    if blacklist_df.empty:
+        return None
+    return frame_index(blacklist_df, "PBMC blacklist", contigs)[:2]
+
+
+def apply_blacklist(input_df, blocked, enabled, fail_on_match, contigs=None):
+    """Flag, and with fail_on_match drop, rows found in the blacklist index."""
+    if input_df.empty:
+        return input_df
+
+    # Upstream tables carry a string variant_id; it is not part of the final table.
+    input_df = input_df.drop(columns=["variant_id"], errors="ignore")
+    input_keys = frame_keys(input_df, contigs=contigs)
+
+    if not enabled:
+        return input_df
+
+    if blocked is None:
+        input_df["pbmc_blacklist_match"] = False
+        return input_df
+
+    input_df["pbmc_blacklist_match"] = isin(
+        input_keys, *blocked, labels=frame_labels(input_df, input_keys)
     )
-    return df
+
+    if fail_on_match:
+        input_df = input_df[~input_df["pbmc_blacklist_match"]].copy()
+    return input_df
 
 
 def main():
     parser = argparse.ArgumentParser(description="Apply PBMC blacklist to clinical variant table.")
     parser.add_argument("--input", required=True)
-    parser.add_argument("--blacklist", required=True)
+    parser.add_argument(
+        "--blacklist", required=True, help="Blacklist TSV or key table from build_pbmc_blacklist"
+    )
     parser.add_argument("--enabled", required=True)
     parser.add_argument("--fail-on-match", required=True)
+    parser.add_argument("--contigs", default="", help="Reference .fai or .dict (contig numbering)")
     parser.add_argument("--out", required=True)
     args = parser.parse_args()
 
     enabled = as_bool(args.enabled)
     fail_on_match = as_bool(args.fail_on_match)
+    contigs = load_contig_table(args.contigs)
 
-    input_df = load_table(args.input)
-    out_path = Path(args.out)
-    out_path.parent.mkdir(parents=True, exist_ok=True)
-
-    if input_df.empty:
-        input_df.to_csv(out_path, sep="\t", index=False)
-        return
-
-    input_df = add_variant_id(input_df)
-
-    if not enabled:
-        input_df.drop(columns=["variant_id"]).to_csv(out_path, sep="\t", index=False)
-        return
-
-    blacklist_df = load_table(args.blacklist)
-    if blacklist_df.empty:
-        input_df["pbmc_blacklist_match"] = False
-        input_df.drop(columns=["variant_id"]).to_csv(out_path, sep="\t", index=False)
-        return
-
-    blacklist_df = add_variant_id(blacklist_df)
-    blocked = set(blacklist_df["variant_id"].tolist())
-    input_df["pbmc_blacklist_match"] = input_df["variant_id"].isin(blocked)
-
-    if fail_on_match:
-        input_df = input_df[~input_df["pbmc_blacklist_match"]].copy()
-
-    input_df.drop(columns=["variant_id"]).to_csv(out_path, sep="\t", index=False)
+    input_df = read_table(args.input)
+    blocked = (
+        load_blacklist_index(args.blacklist, contigs) if enabled and not input_df.empty else None
+    )
+    write_table(apply_blacklist(input_df, blocked, enabled, fail_on_match, contigs), args.out)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,85 @@
+#!/usr/bin/env python3
+"""Summarize the run's Snakemake benchmark files and compare them to a baseline run.
+
+Writes the per-job table (benchmark metrics plus the sample's input size),
+the per-sample table normalized by input reads, the per-step summary and,
+with --baseline (an earlier run's summary), the regression table. A step
+regresses when its median runtime per million reads (median runtime when
+reads are unknown) or its peak RSS exceeds the baseline by more than
+--threshold. Regressions are reported, not fatal.
+"""
+
+import argparse
+import json
+import os
+import sys
+
+import pandas as pd
+
+from benchmarks import (
+    INPUT_COLUMNS,
+    JOB_COLUMNS,
+    REGRESSION_COLUMNS,
+    collect_jobs,
+    compare_to_baseline,
+    per_sample,
+    sample_inputs,
+    step_summary,
+)
+
+
+def write_tsv(table, path):
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table.to_csv(path, sep="\t", index=False, float_format="%.6g")
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Summarize benchmark files and flag regressions.")
+    parser.add_argument("--bench-dir", required=True)
+    parser.add_argument("--results-dir", required=True, help="Results directory (fastp JSON, dedup BAMs)")
+    parser.add_argument("--samples", required=True, help="Comma-separated sample names")
+    parser.add_argument("--fastq-json", default="{}", help='{"sample": [R1, R2]} raw FASTQ paths')
+    parser.add_argument("--panel-bed", default="")
+    parser.add_argument("--baseline", default="", help="benchmark_summary.tsv of an earlier run")
+    parser.add_argument("--threshold", type=float, default=0.25)
+    parser.add_argument("--jobs-out", required=True)
+    parser.add_argument("--samples-out", required=True)
+    parser.add_argument("--summary-out", required=True)
+    parser.add_argument("--regressions-out", required=True)
+    args = parser.parse_args()
+
+    if args.threshold < 0:
+        raise ValueError("--threshold must be >= 0")
+    if args.baseline and not os.path.exists(args.baseline):
+        raise FileNotFoundError(f"Benchmark baseline not found: {args.baseline}")
+    samples = [s for s in args.samples.split(",") if s]
+    inputs = sample_inputs(samples, json.loads(args.fastq_json), args.results_dir, args.panel_bed)
+    jobs = collect_jobs(args.bench_dir, samples).merge(inputs, on="sample", how="left")
+    jobs = jobs[JOB_COLUMNS + INPUT_COLUMNS]
+    samples_table = per_sample(jobs, inputs)
+    summary = step_summary(samples_table)
+
+    if args.baseline:
+        regressions = compare_to_baseline(
+            summary, pd.read_csv(args.baseline, sep="\t"), args.threshold
+        )
+    else:
+        regressions = pd.DataFrame(columns=REGRESSION_COLUMNS)
+
+    write_tsv(jobs, args.jobs_out)
+    write_tsv(samples_table, args.samples_out)
+    write_tsv(summary, args.summary_out)
+    write_tsv(regressions, args.regressions_out)
+
+    flagged = regressions.loc[regressions["status"] == "regression"]
+    print(f"{len(jobs)} benchmark files, {len(summary)} steps", file=sys.stderr)
+    for row in flagged.itertuples(index=False):
+        print(
+            f"WARNING: {row.step} {row.metric} {row.baseline:.4g} -> {row.current:.4g} "
+            f"(x{row.ratio:.2f})",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
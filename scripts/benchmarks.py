@@ -0,0 +1,229 @@
+"""Snakemake benchmark files -> per-job, per-sample and per-step tables.
+
+Benchmark files live at BENCH_DIR/<stage>/<sample>[.<Tool>][.<shard>].(txt|tsv);
+the step is <stage> or <stage>.<Tool> and a numeric name part is a scatter
+shard. Repeated measurements (benchmark: repeat(...)) are averaged. Each job
+is joined with its sample's input size: raw reads (fastp before_filtering),
+raw FASTQ bytes, dedup BAM bytes and panel territory.
+
+Per-sample totals sum wall/CPU time and I/O over shards and take the peak
+max_rss; runtime and CPU time are also given per million input reads, which
+is what the per-step summary compares against a baseline run.
+"""
+
+import glob
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from callable_territory import read_targets
+
+# Snakemake benchmark columns kept (seconds, MB, MB, MB, MB, %, seconds).
+BENCH_METRICS = ["s", "max_rss", "max_vms", "io_in", "io_out", "mean_load", "cpu_time"]
+JOB_COLUMNS = ["step", "sample", "shard", "path"] + BENCH_METRICS
+INPUT_COLUMNS = ["reads", "fastq_bytes", "bam_bytes", "panel_bp"]
+SAMPLE_COLUMNS = (
+    ["step", "sample", "jobs", "s", "cpu_time", "max_rss", "io_in", "io_out"]
+    + INPUT_COLUMNS
+    + ["s_per_mreads", "cpu_per_mreads"]
+)
+SUMMARY_COLUMNS = [
+    "step",
+    "samples",
+    "jobs",
+    "runtime_s_median",
+    "runtime_s_max",
+    "cpu_s_total",
+    "max_rss_mb",
+    "io_in_mb",
+    "io_out_mb",
+    "s_per_mreads_median",
+    "cpu_per_mreads_median",
+]
+REGRESSION_COLUMNS = ["step", "metric", "baseline", "current", "ratio", "status"]
+# Summary metric compared against the baseline -> fallback when it is missing.
+REGRESSION_METRICS = {
+    "s_per_mreads_median": "runtime_s_median",
+    "max_rss_mb": None,
+}
+
+
+def parse_benchmark_path(path, bench_dir, samples):
+    """(step, sample, shard) of a benchmark file; None when no sample matches."""
+    rel = os.path.relpath(path, bench_dir)
+    stage = os.path.dirname(rel).replace(os.sep, ".")
+    name = os.path.splitext(os.path.basename(rel))[0]
+    # Longest match first: sample names may contain dots or prefix each other.
+    for sample in sorted(samples, key=len, reverse=True):
+        if name == sample or name.startswith(f"{sample}."):
+            parts = [part for part in name[len(sample):].split(".") if part]
+            break
+    else:
+        return None
+    shards = [part for part in parts if part.isdigit()]
+    tools = [part for part in parts if not part.isdigit()]
+    step = ".".join([stage] + tools) if stage else ".".join(tools)
+    return step, sample, shards[0] if shards else ""
+
+
+def read_benchmark(path):
+    """{metric: mean over repeats} of one benchmark file; NaN where absent or NA."""
+    bench = pd.read_csv(path, sep="\t")
+    record = {}
+    for metric in BENCH_METRICS:
+        if metric in bench.columns:
+            record[metric] = float(pd.to_numeric(bench[metric], errors="coerce").mean())
+        else:
+            record[metric] = np.nan
+    return record
+
+
+def collect_jobs(bench_dir, samples):
+    """One row per benchmark file under bench_dir whose name starts with a sample."""
+    rows = []
+    paths = glob.glob(os.path.join(bench_dir, "**", "*.txt"), recursive=True)
+    paths += glob.glob(os.path.join(bench_dir, "**", "*.tsv"), recursive=True)
+    for path in sorted(paths):
+        parsed = parse_benchmark_path(path, bench_dir, samples)
+        if parsed is None:
+            continue
+        step, sample, shard = parsed
+        rows.append({"step": step, "sample": sample, "shard": shard, "path": path, **read_benchmark(path)})
+    return pd.DataFrame(rows, columns=JOB_COLUMNS)
+
+
+def fastp_total_reads(path):
+    """Reads before filtering (R1 + R2) from a fastp JSON report; None if absent."""
+    if not path or not os.path.exists(path):
+        return None
+    with open(path) as handle:
+        report = json.load(handle)
+    return report.get("summary", {}).get("before_filtering", {}).get("total_reads")
+
+
+def _size(paths):
+    present = [path for path in paths if path and os.path.exists(path)]
+    return sum(os.path.getsize(path) for path in present) if present else None
+
+
+def panel_territory(bed_path):
+    """Panel bases (sum of END - START) of a BED; None without one."""
+    if not bed_path or not os.path.exists(bed_path):
+        return None
+    targets = read_targets(bed_path)
+    return int((targets["END"] - targets["START"]).sum())
+
+
+def sample_inputs(samples, fastqs, results_dir, panel_bed=""):
+    """Input size per sample: raw reads, FASTQ bytes, dedup BAM bytes, panel bases."""
+    panel_bp = panel_territory(panel_bed)
+    rows = []
+    for sample in samples:
+        rows.append(
+            {
+                "sample": sample,
+                "reads": fastp_total_reads(
+                    os.path.join(results_dir, "trimmed", f"{sample}_fastp.json")
+                ),
+                "fastq_bytes": _size(fastqs.get(sample, [])),
+                "bam_bytes": _size([os.path.join(results_dir, "bam", f"{sample}.dedup.bam")]),
+                "panel_bp": panel_bp,
+            }
+        )
+    inputs = pd.DataFrame(rows, columns=["sample"] + INPUT_COLUMNS)
+    return inputs.astype({column: "float64" for column in INPUT_COLUMNS})
+
+
+def _total(values):
+    """Sum that stays NaN when every value is missing (e.g. cpu_time NA)."""
+    return values.sum(min_count=1)
+
+
+def per_sample(jobs, inputs):
+    """Per (step, sample) totals over shards, normalized by million input reads."""
+    grouped = jobs.groupby(["step", "sample"], sort=True)
+    totals = grouped.agg(
+        jobs=("path", "size"),
+        s=("s", _total),
+        cpu_time=("cpu_time", _total),
+        max_rss=("max_rss", "max"),
+        io_in=("io_in", _total),
+        io_out=("io_out", _total),
+    ).reset_index()
+    totals = totals.merge(inputs, on="sample", how="left")
+    mreads = totals["reads"].where(totals["reads"] > 0) / 1e6
+    totals["s_per_mreads"] = totals["s"] / mreads
+    totals["cpu_per_mreads"] = totals["cpu_time"] / mreads
+    return totals[SAMPLE_COLUMNS]
+
+
+def step_summary(samples_table):
+    """Per-step runtime, peak memory and I/O over samples."""
+    if samples_table.empty:
+        return pd.DataFrame(columns=SUMMARY_COLUMNS)
+    summary = (
+        samples_table.groupby("step", sort=True)
+        .agg(
+            samples=("sample", "nunique"),
+            jobs=("jobs", "sum"),
+            runtime_s_median=("s", "median"),
+            runtime_s_max=("s", "max"),
+            cpu_s_total=("cpu_time", _total),
+            max_rss_mb=("max_rss", "max"),
+            io_in_mb=("io_in", _total),
+            io_out_mb=("io_out", _total),
+            s_per_mreads_median=("s_per_mreads", "median"),
+            cpu_per_mreads_median=("cpu_per_mreads", "median"),
+        )
+        .reset_index()
+    )
+    return summary[SUMMARY_COLUMNS]
+
+
+def compare_to_baseline(summary, baseline, threshold):
+    """One row per step and metric: status regression when current > baseline x (1 + threshold).
+
+    Steps present on one side only are reported as new or removed.
+    """
+    rows = []
+    current = summary.set_index("step")
+    previous = baseline.set_index("step")
+    for step in sorted(set(current.index) | set(previous.index)):
+        if step not in previous.index or step not in current.index:
+            rows.append(
+                {
+                    "step": step,
+                    "metric": "",
+                    "baseline": np.nan,
+                    "current": np.nan,
+                    "ratio": np.nan,
+                    "status": "new" if step not in previous.index else "removed",
+                }
+            )
+            continue
+        for metric, fallback in REGRESSION_METRICS.items():
+            used = metric
+            base = previous.at[step, metric] if metric in previous.columns else np.nan
+            now = current.at[step, metric]
+            if (pd.isna(base) or pd.isna(now)) and fallback:
+                used = fallback
+                base = previous.at[step, fallback] if fallback in previous.columns else np.nan
+                now = current.at[step, fallback]
+            if pd.isna(base) or pd.isna(now) or base <= 0:
+                status, ratio = "not_compared", np.nan
+            else:
+                ratio = now / base
+                status = "regression" if ratio > 1 + threshold else "ok"
+            rows.append(
+                {
+                    "step": step,
+                    "metric": used,
+                    "baseline": base,
+                    "current": now,
+                    "ratio": ratio,
+                    "status": status,
+                }
+            )
+    return pd.DataFrame(rows, columns=REGRESSION_COLUMNS)
@@ -0,0 +1,23 @@
+#!/usr/bin/env python3
+import argparse
+
+from annotation_store import STORE_KINDS, compile_store
+from variant_keys import load_contig_table
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description="Compile an annotation TSV into a memory-mapped variant store."
+    )
+    parser.add_argument("--input", required=True, help="Annotation TSV keyed by CHROM/POS/REF/ALT")
+    parser.add_argument("--kind", required=True, choices=sorted(STORE_KINDS))
+    parser.add_argument("--out", required=True, help="Output store directory")
+    parser.add_argument("--contigs", default="", help="Reference .fai or .dict (contig numbering)")
+    args = parser.parse_args()
+
+    n_variants = compile_store(args.input, args.kind, args.out, load_contig_table(args.contigs))
+    print(f"Compiled {n_variants} {args.kind} variants into {args.out}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,31 @@
+#!/usr/bin/env python3
+"""Collect per-sample metrics JSON records into the run-level SQLite catalog."""
+
+import argparse
+import json
+
+from qc_metrics import write_catalog
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build the run-level QC metrics catalog.")
+    parser.add_argument("--metrics", required=True, nargs="+", help="Per-sample metrics JSON files")
+    parser.add_argument("--out", required=True, help="Output SQLite catalog")
+    args = parser.parse_args()
+
+    records = []
+    seen = set()
+    for path in args.metrics:
+        with open(path) as handle:
+            record = json.load(handle)
+        if record["sample"] in seen:
+            raise ValueError(f"Duplicate sample {record['sample']} in metrics records ({path})")
+        seen.add(record["sample"])
+        records.append(record)
+
+    write_catalog(args.out, records)
+    print(f"catalogued {len(records)} samples")
+
+
+if __name__ == "__main__":
+    main()
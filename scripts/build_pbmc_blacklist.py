@@ -1,48 +1,28 @@
 #!/usr/bin/env python3
 import argparse
-import os
 from pathlib import Path
 
+import numpy as np
 import pandas as pd
 
+from columnar import save_table
+from pbmc_store import BLACKLIST_COLUMNS, blacklist_table, sync_store
+from variant_keys import contig_digest, load_contig_table
+
 
 def as_bool(value):
     return str(value).strip().lower() in {"1", "true", "yes", "y"}
 
 
-def load_calls(path, max_vaf):
-    df = pd.read_csv(path, sep="\t")
-    required = {"CHROM", "POS", "REF", "ALT"}
-    missing = required - set(df.columns)
-    if missing:
-        raise ValueError(f"{path} is missing required columns: {sorted(missing)}")
-
-    vaf_col = None
-    for candidate in ("AF", "VAF", "af", "vaf"):
-        if candidate in df.columns:
-            vaf_col = candidate
-            break
-    if vaf_col is not None:
-        df[vaf_col] = pd.to_numeric(df[vaf_col], errors="coerce")
-        df = df[df[vaf_col].notna() & (df[vaf_col] <= max_vaf)]
-
-    if df.empty:
-        return set()
-
-    return set(
-        df["CHROM"].astype(str)
-        + ":"
-        + df["POS"].astype(str)
-        + ":"
-        + df["REF"].astype(str)
-        + ":"
-        + df["ALT"].astype(str)
-    )
-
-
-def split_variant_id(variant_id):
-    chrom, pos, ref, alt = variant_id.split(":", 3)
-    return chrom, pos, ref, alt
+def write_keys(path, keys, labels, contigs=None):
+    """Key table (sorted keys plus their labels) that apply_pbmc_blacklist memory-maps."""
+    if path:
+        save_table(
+            path,
+            numeric={"keys": np.asarray(keys, dtype=np.uint64)},
+            categorical={"LABEL": pd.Series(labels, dtype=object)},
+            meta={"contigs": contig_digest(contigs)},
+        )
 
 
 def main():
@@ -52,50 +32,39 @@ def main():
     parser.add_argument("--max-vaf", required=True, type=float)
     parser.add_argument("--min-recurrence", required=True, type=int)
     parser.add_argument("--out", required=True)
+    parser.add_argument(
+        "--store",
+        default="",
+        help="Persistent store directory; only new or changed calls files are parsed",
+    )
+    parser.add_argument("--out-keys", default="", help="Blacklist key table directory")
+    parser.add_argument("--contigs", default="", help="Reference .fai or .dict (contig numbering)")
     args = parser.parse_args()
 
     enabled = as_bool(args.enabled)
+    contigs = load_contig_table(args.contigs)
     out_path = Path(args.out)
     out_path.parent.mkdir(parents=True, exist_ok=True)
 
     if not enabled:
-        pd.DataFrame(columns=["CHROM", "POS", "REF", "ALT", "RECURRENCE", "SAMPLES"]).to_csv(
-            out_path, sep="\t", index=False
-        )
+        pd.DataFrame(columns=BLACKLIST_COLUMNS).to_csv(out_path, sep="\t", index=False)
+        write_keys(args.out_keys, [], [], contigs)
         return
 
     calls_dir = Path(args.calls_dir)
     if not calls_dir.exists() or not calls_dir.is_dir():
         raise FileNotFoundError(f"PBMC calls directory not found: {calls_dir}")
 
-    files = sorted(calls_dir.glob("*.tsv"))
-    counts = {}
-    samples = {}
-    for file_path in files:
-        sample_id = file_path.stem
-        variant_ids = load_calls(file_path, args.max_vaf)
-        for variant_id in variant_ids:
-            counts[variant_id] = counts.get(variant_id, 0) + 1
-            samples.setdefault(variant_id, []).append(sample_id)
-
-    rows = []
-    for variant_id, recurrence in counts.items():
-        if recurrence < args.min_recurrence:
-            continue
-        chrom, pos, ref, alt = split_variant_id(variant_id)
-        rows.append(
-            {
-                "CHROM": chrom,
-                "POS": pos,
-                "REF": ref,
-                "ALT": alt,
-                "RECURRENCE": recurrence,
-                "SAMPLES": ",".join(sorted(samples.get(variant_id, []))),
-            }
-        )
-
-    output_df = pd.DataFrame(rows, columns=["CHROM", "POS", "REF", "ALT", "RECURRENCE", "SAMPLES"])
+    rows, stats = sync_store(
+        args.store, calls_dir, args.max_vaf, persist=bool(args.store), contigs=contigs
+    )
+    print(
+        f"PBMC store: {stats['files']} files ({stats['ingested']} ingested, "
+        f"{stats['removed']} removed), {stats['rows']} variant calls"
+    )
+    output_df, keys, labels = blacklist_table(rows, args.min_recurrence)
     output_df.to_csv(out_path, sep="\t", index=False)
+    write_keys(args.out_keys, keys, labels, contigs)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,195 @@
+"""Callable panel territory per LOD bin from mosdepth coverage.
+
+A bin's required depth is the depth at which min_alt_reads supporting reads
+are expected at its lower VAF bound. Coverage is streamed in fixed-size
+chunks and reduced to a (targets x bins) matrix of callable bases, so memory
+is bounded by the panel size rather than the coverage file. Sources:
+
+- regions: mosdepth `{sample}.regions.bed.gz` (one mean depth per target);
+  a target counts as callable in full when its mean reaches the bin depth.
+- per_base: mosdepth `{sample}.per-base.bed.gz`; each coverage run is
+  clipped to the targets it overlaps (position-level territory).
+- quantized: mosdepth `{sample}.quantized.bed.gz` produced with the bins'
+  required depths as --quantize thresholds, which keeps the per_base answer
+  exact at a fraction of the file size.
+
+Targets are taken as non-overlapping, as mosdepth reports them.
+"""
+
+import gzip
+import math
+
+import numpy as np
+import pandas as pd
+
+COVERAGE_SOURCES = ("regions", "per_base", "quantized")
+TARGET_COLUMNS = ["CHROM", "START", "END", "GENE"]
+
+
+def required_depth(min_alt_reads, min_af):
+    return math.ceil(min_alt_reads / max(min_af, 1e-9))
+
+
+def quantize_thresholds(required):
+    """mosdepth --quantize argument with a class boundary at every required depth."""
+    cuts = sorted({int(depth) for depth in required if depth > 0})
+    return "0:" + "".join(f"{cut}:" for cut in cuts)
+
+
+def _bed_rows(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    with opener(path, "rt") as handle:
+        for line in handle:
+            if line.strip() and not line.startswith(("#", "track", "browser")):
+                yield line
+
+
+def read_targets(bed_path):
+    """Panel targets (CHROM, START, END, GENE) in file order; GENE is '' without a name column."""
+    rows = [line.rstrip("\n").split("\t") for line in _bed_rows(bed_path)]
+    targets = pd.DataFrame(
+        {
+            "CHROM": [row[0] for row in rows],
+            "START": np.array([int(row[1]) for row in rows], dtype=np.int64),
+            "END": np.array([int(row[2]) for row in rows], dtype=np.int64),
+            "GENE": [row[3] if len(row) > 3 else "" for row in rows],
+        }
+    )
+    return targets[TARGET_COLUMNS]
+
+
+def iter_coverage_chunks(path, chunk_rows):
+    """(chrom, start, end, value) chunks of a headerless mosdepth BED output."""
+    reader = pd.read_csv(
+        path,
+        sep="\t",
+        header=None,
+        comment="#",
+        dtype={0: str},
+        chunksize=chunk_rows,
+    )
+    for chunk in reader:
+        yield chunk
+
+
+def callable_from_regions(regions_path, required, chunk_rows=500000):
+    """(targets, callable) from a mosdepth regions file; the last column is the mean."""
+    required = np.asarray(required, dtype=np.float64)
+    target_parts = []
+    callable_parts = []
+    for chunk in iter_coverage_chunks(regions_path, chunk_rows):
+        length = (chunk[2] - chunk[1]).to_numpy(dtype=np.int64)
+        mean = pd.to_numeric(chunk.iloc[:, -1], errors="coerce").to_numpy(dtype=np.float64)
+        target_parts.append(
+            pd.DataFrame(
+                {
+                    "CHROM": chunk[0].to_numpy(),
+                    "START": chunk[1].to_numpy(dtype=np.int64),
+                    "END": chunk[2].to_numpy(dtype=np.int64),
+                    "GENE": chunk[3].astype(str).to_numpy() if chunk.shape[1] > 4 else "",
+                }
+            )
+        )
+        # NaN means compare False, so unreadable targets are never callable.
+        callable_parts.append(length[:, None] * (mean[:, None] >= required[None, :]))
+    if not target_parts:
+        return pd.DataFrame(columns=TARGET_COLUMNS), np.zeros((0, len(required)), dtype=np.int64)
+    targets = pd.concat(target_parts, ignore_index=True)[TARGET_COLUMNS]
+    return targets, np.vstack(callable_parts).astype(np.int64)
+
+
+def _contig_targets(targets):
+    """{chrom: (target rows, starts, ends)} with each contig's targets sorted by start."""
+    index = {}
+    for chrom, group in targets.groupby("CHROM", sort=False):
+        order = np.argsort(group["START"].to_numpy(), kind="stable")
+        rows = group.index.to_numpy()[order]
+        index[chrom] = (
+            rows,
+            targets["START"].to_numpy()[rows],
+            targets["END"].to_numpy()[rows],
+        )
+    return index
+
+
+def _interval_depth(values, quantized):
+    if not quantized:
+        return pd.to_numeric(values, errors="coerce").to_numpy(dtype=np.float64)
+    # Quantized labels are "lo:hi" (hi may be "inf"); the lower bound decides.
+    lower = values.astype(str).str.split(":", n=1).str[0]
+    return pd.to_numeric(lower, errors="coerce").to_numpy(dtype=np.float64)
+
+
+def callable_from_intervals(coverage_path, targets, required, quantized=False, chunk_rows=500000):
+    """Callable bases per (target, bin) from per-base or quantized coverage runs.
+
+    Runs of one contig are sorted and disjoint, so the runs overlapping each
+    target are a contiguous slice found with two searchsorted calls; every
+    (run, target) overlap is weighted by its clipped length.
+    """
+    required = np.asarray(required, dtype=np.float64)
+    out = np.zeros((len(targets), len(required)), dtype=np.int64)
+    contigs = _contig_targets(targets.reset_index(drop=True))
+    for chunk in iter_coverage_chunks(coverage_path, chunk_rows):
+        for chrom, runs in chunk.groupby(0, sort=False):
+            if chrom not in contigs:
+                continue
+            rows, t_start, t_end = contigs[chrom]
+            r_start = runs[1].to_numpy(dtype=np.int64)
+            r_end = runs[2].to_numpy(dtype=np.int64)
+            depth = _interval_depth(runs[3], quantized)
+
+            first = np.searchsorted(r_end, t_start, side="right")
+            last = np.searchsorted(r_start, t_end, side="left")
+            counts = np.clip(last - first, 0, None)
+            if not counts.any():
+                continue
+            pair_target = np.repeat(np.arange(len(rows)), counts)
+            offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+            pair_run = np.repeat(first, counts) + offsets
+            overlap = np.minimum(r_end[pair_run], t_end[pair_target]) - np.maximum(
+                r_start[pair_run], t_start[pair_target]
+            )
+            overlap = np.clip(overlap, 0, None)
+            meets = depth[pair_run][:, None] >= required[None, :]
+            for bin_idx in range(len(required)):
+                out[rows, bin_idx] += np.bincount(
+                    pair_target,
+                    weights=overlap * meets[:, bin_idx],
+                    minlength=len(rows),
+                ).astype(np.int64)
+    return out
+
+
+def sample_territory(coverage_path, source, required, targets=None, chunk_rows=500000):
+    """(targets, callable) for one sample's coverage file."""
+    if source not in COVERAGE_SOURCES:
+        raise ValueError(f"Unknown coverage source {source!r}; expected one of {COVERAGE_SOURCES}")
+    if source == "regions":
+        return callable_from_regions(coverage_path, required, chunk_rows)
+    if targets is None:
+        raise ValueError(f"A panel BED is required for coverage source {source!r}")
+    return targets, callable_from_intervals(
+        coverage_path, targets, required, quantized=source == "quantized", chunk_rows=chunk_rows
+    )
+
+
+def territory_summary(targets, callable_bases, by_gene=False):
+    """Panel-wide (or per-gene) panel_bases and callable_bases per bin.
+
+    Returns (keys, panel_bases, callable_bases): keys is [""] for the panel,
+    or the sorted gene names (unnamed or "." targets skipped) when by_gene is set.
+    """
+    lengths = (targets["END"] - targets["START"]).to_numpy(dtype=np.int64)
+    if not by_gene:
+        return [""], lengths.sum(keepdims=True), callable_bases.sum(axis=0, keepdims=True)
+    genes = targets["GENE"].astype(str).to_numpy()
+    named = (genes != "") & (genes != ".")
+    keys, codes = np.unique(genes[named], return_inverse=True)
+    panel = np.bincount(codes, weights=lengths[named], minlength=len(keys)).astype(np.int64)
+    per_gene = np.zeros((len(keys), callable_bases.shape[1]), dtype=np.int64)
+    for bin_idx in range(callable_bases.shape[1]):
+        per_gene[:, bin_idx] = np.bincount(
+            codes, weights=callable_bases[named, bin_idx], minlength=len(keys)
+        )
+    return list(keys), panel, per_gene
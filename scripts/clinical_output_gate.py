@@ -1,13 +1,24 @@
 #!/usr/bin/env python3
 import argparse
-import pandas as pd
-from pandas.errors import EmptyDataError
+
+from table_io import read_table, write_table
 
 
 def as_bool(value):
     return str(value).strip().lower() in {"1", "true", "yes", "y"}
 
 
+def gate_clinical_output(df, enabled, accepted, include_only_annotated):
+    """Keep rows whose support_gate is accepted (and, optionally, annotated)."""
+    if enabled:
+        if "support_gate" in df.columns:
+            df = df[df["support_gate"].isin(accepted)].copy()
+        if include_only_annotated and "clinical_tier" in df.columns:
+            # Blank tiers come back from TSV as NaN; treat them as unannotated.
+            df = df[df["clinical_tier"].fillna("").astype(str).str.len() > 0].copy()
+    return df
+
+
 def main():
     parser = argparse.ArgumentParser(description="Gate clinical output table.")
     parser.add_argument("--input", required=True)
@@ -17,22 +28,16 @@ def main():
     parser.add_argument("--include-only-annotated", required=True)
     args = parser.parse_args()
 
-    try:
-        df = pd.read_csv(args.input, sep="\t")
-    except EmptyDataError:
-        pd.DataFrame().to_csv(args.output, sep="\t", index=False)
+    df = read_table(args.input)
+    if len(df.columns) == 0:
+        write_table(df, args.output)
         return
     enabled = as_bool(args.enabled)
     include_only_annotated = as_bool(args.include_only_annotated)
     accepted = {g.strip() for g in args.accepted_gates.split(",") if g.strip()}
 
-    if enabled:
-        if "support_gate" in df.columns:
-            df = df[df["support_gate"].isin(accepted)].copy()
-        if include_only_annotated and "clinical_tier" in df.columns:
-            df = df[df["clinical_tier"].astype(str).str.len() > 0].copy()
-
-    df.to_csv(args.output, sep="\t", index=False)
+    df = gate_clinical_output(df, enabled, accepted, include_only_annotated)
+    write_table(df, args.output)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,147 @@
+"""Directory-of-.npy columnar tables that can be memory-mapped.
+
+A table directory holds one .npy file per numeric column and, for string
+columns, dictionary-encoded categoricals: int32 codes plus the distinct
+values stored as a UTF-8 byte blob with int64 offsets. Everything is plain
+.npy, so readers can np.load(..., mmap_mode="r") and only touch the pages
+they index. manifest.json records the column layout and free-form metadata.
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import tempfile
+
+import numpy as np
+import pandas as pd
+
+MANIFEST = "manifest.json"
+FORMAT_VERSION = 1
+
+
+def encode_categorical(values):
+    """Dictionary-encode strings into (codes, blob, offsets)."""
+    codes, levels = pd.factorize(pd.Series(values, copy=False).astype(str))
+    encoded = [level.encode("utf-8") for level in levels]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    if encoded:
+        offsets[1:] = np.cumsum([len(item) for item in encoded])
+    blob = np.frombuffer(b"".join(encoded), dtype=np.uint8)
+    return codes.astype(np.int32), blob, offsets
+
+
+def decode_levels(blob, offsets, codes, missing=""):
+    """Decode codes to an object array, touching each distinct level once.
+
+    Negative codes decode to `missing`.
+    """
+    codes = np.asarray(codes)
+    out = np.full(len(codes), missing, dtype=object)
+    present = codes >= 0
+    if not present.any():
+        return out
+    distinct, inverse = np.unique(codes[present], return_inverse=True)
+    decoded = np.array(
+        [bytes(blob[offsets[c]:offsets[c + 1]]).decode("utf-8") for c in distinct],
+        dtype=object,
+    )
+    out[present] = decoded[inverse]
+    return out
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """Content hash used to tell whether a cached source file changed."""
+    digest = hashlib.blake2b(digest_size=16)
+    with open(path, "rb") as handle:
+        for chunk in iter(lambda: handle.read(chunk_size), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def is_table(path):
+    return os.path.isdir(path) and os.path.exists(os.path.join(path, MANIFEST))
+
+
+def save_table(out_dir, numeric=None, categorical=None, meta=None):
+    """Write a columnar table directory, replacing any previous contents.
+
+    numeric maps column name -> 1-D array; categorical maps column name ->
+    sequence of strings. All columns must have the same length.
+    """
+    numeric = numeric or {}
+    categorical = categorical or {}
+    lengths = {len(v) for v in numeric.values()} | {len(v) for v in categorical.values()}
+    if len(lengths) > 1:
+        raise ValueError(f"Columnar table columns differ in length: {sorted(lengths)}")
+
+    parent = os.path.dirname(os.path.abspath(out_dir))
+    os.makedirs(parent, exist_ok=True)
+    tmp_dir = tempfile.mkdtemp(prefix=".tmp_", dir=parent)
+    try:
+        for name, values in numeric.items():
+            np.save(os.path.join(tmp_dir, f"{name}.npy"), np.asarray(values))
+        for name, values in categorical.items():
+            codes, blob, offsets = encode_categorical(values)
+            np.save(os.path.join(tmp_dir, f"{name}.codes.npy"), codes)
+            np.save(os.path.join(tmp_dir, f"{name}.levels.npy"), blob)
+            np.save(os.path.join(tmp_dir, f"{name}.offsets.npy"), offsets)
+        manifest = {
+            "format_version": FORMAT_VERSION,
+            "rows": lengths.pop() if lengths else 0,
+            "numeric": sorted(numeric),
+            "categorical": sorted(categorical),
+            "meta": meta or {},
+        }
+        with open(os.path.join(tmp_dir, MANIFEST), "w") as handle:
+            json.dump(manifest, handle, indent=2, sort_keys=True)
+            handle.write("\n")
+        if os.path.isdir(out_dir):
+            shutil.rmtree(out_dir)
+        os.replace(tmp_dir, out_dir)
+    except BaseException:
+        shutil.rmtree(tmp_dir, ignore_errors=True)
+        raise
+
+
+def update_table_meta(path, meta):
+    """Replace a table's free-form metadata without touching its columns."""
+    manifest_path = os.path.join(path, MANIFEST)
+    with open(manifest_path) as handle:
+        manifest = json.load(handle)
+    manifest["meta"] = meta
+    tmp_path = f"{manifest_path}.tmp"
+    with open(tmp_path, "w") as handle:
+        json.dump(manifest, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+    os.replace(tmp_path, manifest_path)
+
+
+def load_table(path, mmap=True):
+    """Load a columnar table directory.
+
+    Returns a dict with rows, meta, numeric {name: array} and categorical
+    {name: (codes, blob, offsets)}. Arrays are memory-mapped when mmap=True.
+    """
+    with open(os.path.join(path, MANIFEST)) as handle:
+        manifest = json.load(handle)
+    if manifest.get("format_version") != FORMAT_VERSION:
+        raise ValueError(f"Unsupported columnar table version in {path}")
+    mode = "r" if mmap else None
+
+    def load(name):
+        return np.load(os.path.join(path, name), mmap_mode=mode)
+
+    return {
+        "rows": manifest["rows"],
+        "meta": manifest.get("meta", {}),
+        "numeric": {name: load(f"{name}.npy") for name in manifest["numeric"]},
+        "categorical": {
+            name: (
+                load(f"{name}.codes.npy"),
+                load(f"{name}.levels.npy"),
+                load(f"{name}.offsets.npy"),
+            )
+            for name in manifest["categorical"]
+        },
+    }
@@ -4,6 +4,8 @@ import pandas as pd
 import os
 from jinja2 import Environment, FileSystemLoader
 
+from qc_metrics import read_catalog, sample_metrics
+
 def read_variant_tables(files):
     dfs = []
     for f in files:
@@ -16,39 +18,26 @@ def read_variant_tables(files):
     else:
         return pd.DataFrame()
 
+QC_SUMMARY_COLUMNS = ["mean_coverage", "contamination"]
+
 def read_qc_tables(flagstats, samtools_stats, dup_metrics, coverage, contamination):
     records = []
     for f_flag, f_stats, f_dup, f_cov, f_contam in zip(flagstats, samtools_stats, dup_metrics, coverage, contamination):
         sample = os.path.basename(f_flag).split(".")[0]
-        record = {'sample': sample}
-
-        # Flagstat
-        #if os.path.exists(f_flag) and os.path.getsize(f_flag) > 0:
-        #    with open(f_flag) as fh:
-        #        record['flagstat'] = fh.read().strip()
-
-        # Samtools stats
-        #if os.path.exists(f_stats) and os.path.getsize(f_stats) > 0:
-        #    with open(f_stats) as fh:
-        #        record['samtools_stats'] = fh.read().strip()
+        metrics = sample_metrics(sample, f_flag, f_dup, f_stats, f_cov, f_contam)
+        records.append({'sample': sample, **{c: metrics[c] for c in QC_SUMMARY_COLUMNS}})
+    return pd.DataFrame(records, columns=['sample'] + QC_SUMMARY_COLUMNS)
 
-        # Duplication metrics
-        #if os.path.exists(f_dup) and os.path.getsize(f_dup) > 0:
-        #    with open(f_dup) as fh:
-        #        record['dup_metrics'] = fh.read().strip()
+FRAGMENT_SUMMARY_COLUMNS = ["median_fragment_length", "short_fragment_ratio"]
 
-        # Coverage
-        if os.path.exists(f_cov) and os.path.getsize(f_cov) > 0:
-            cov_df = pd.read_csv(f_cov, sep="\t")
-            record['mean_coverage'] = cov_df['mean'][0] if 'mean' in cov_df.columns else None
-
-        # Contamination
-        if os.path.exists(f_contam) and os.path.getsize(f_contam) > 0:
-            cont_df = pd.read_csv(f_contam, sep="\t")
-            record['contamination'] = cont_df.iloc[0,1] if not cont_df.empty else None
-
-        records.append(record)
-    return pd.DataFrame(records)
+def read_qc_catalog(path):
+    catalog = read_catalog(path, columns=QC_SUMMARY_COLUMNS + FRAGMENT_SUMMARY_COLUMNS)
+    records = [{'sample': sample, **metrics} for sample, metrics in catalog.items()]
+    qc_df = pd.DataFrame(records, columns=['sample'] + QC_SUMMARY_COLUMNS + FRAGMENT_SUMMARY_COLUMNS)
+    # Fragment columns only when the fragmentomics stage ran.
+    if qc_df[FRAGMENT_SUMMARY_COLUMNS].isna().all().all():
+        qc_df = qc_df.drop(columns=FRAGMENT_SUMMARY_COLUMNS)
+    return qc_df
 
 def generate_html_report(qc_df, variants_df, out_html):
     script_dir = os.path.dirname(__file__)
@@ -67,12 +56,13 @@ def generate_html_report(qc_df, variants_df, out_html):
 
 def main():
     parser = argparse.ArgumentParser(description="Generate ctDNA summary report")
-    parser.add_argument("--variants-matrix", required=True, nargs="+", help="Variant tables per sample")
-    parser.add_argument("--qc", required=True, nargs="+", help="Flagstat files per sample")
-    parser.add_argument("--samtools-stats", required=True, nargs="+", help="Samtools stats per sample")
-    parser.add_argument("--dup-metrics", required=True, nargs="+", help="Duplication metrics per sample")
-    parser.add_argument("--coverage", required=True, nargs="+", help="Mosdepth coverage summaries per sample")
-    parser.add_argument("--contamination", required=True, nargs="+", help="Mutect2 contamination tables per sample")
+    parser.add_argument("--variants-matrix", nargs="*", default=[], help="Variant tables per sample")
+    parser.add_argument("--qc", nargs="+", default=[], help="Flagstat files per sample")
+    parser.add_argument("--samtools-stats", nargs="+", default=[], help="Samtools stats per sample")
+    parser.add_argument("--dup-metrics", nargs="+", default=[], help="Duplication metrics per sample")
+    parser.add_argument("--coverage", nargs="+", default=[], help="Mosdepth coverage summaries per sample")
+    parser.add_argument("--contamination", nargs="+", default=[], help="Mutect2 contamination tables per sample")
+    parser.add_argument("--metrics-db", required=False, help="Run-level QC metrics catalog (SQLite); replaces the per-file QC inputs")
     parser.add_argument("--out", required=True, help="Output HTML report path")
     parser.add_argument("--qc-out", required=False, help="Optional QC summary TSV output")
     parser.add_argument("--variants-out", required=False, help="Optional variant summary TSV output")
@@ -84,7 +74,10 @@ def main():
     variants_df = read_variant_tables(args.variants_matrix)
 
     # Read QC
-    qc_df = read_qc_tables(args.qc, args.samtools_stats, args.dup_metrics, args.coverage, args.contamination)
+    if args.metrics_db:
+        qc_df = read_qc_catalog(args.metrics_db)
+    else:
+        qc_df = read_qc_tables(args.qc, args.samtools_stats, args.dup_metrics, args.coverage, args.contamination)
 
     # Optional TSV outputs
     if args.qc_out:
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""Pre-BQSR QC gate for one sample (mapped %, duplication, panel coverage).
+
+Uses the same thresholds as qc_gates.py; the workflow runs it as a
+checkpoint so samples that fail skip BQSR, Mutect2 and contamination.
+"""
+
+import argparse
+import json
+import os
+
+from qc_gates import pass_if_present
+from qc_metrics import parse_dup_fraction, parse_flagstat, parse_mean_coverage
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Evaluate the early (pre-BQSR) QC gate for one sample.")
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--flagstat", required=True)
+    parser.add_argument("--dup-metrics", required=True)
+    parser.add_argument("--mosdepth", required=True)
+    parser.add_argument("--min-mapped-pct", required=True, type=float)
+    parser.add_argument("--min-mean-coverage", required=True, type=float)
+    parser.add_argument("--max-dup-fraction", required=True, type=float)
+    parser.add_argument("--out", required=True, help="Output JSON")
+    args = parser.parse_args()
+
+    mapped_pct = parse_flagstat(args.flagstat)["mapped_pct"]
+    dup_fraction = parse_dup_fraction(args.dup_metrics)
+    mean_coverage = parse_mean_coverage(args.mosdepth)
+
+    mapped_pass = pass_if_present(mapped_pct, lambda x: x >= args.min_mapped_pct)
+    coverage_pass = pass_if_present(mean_coverage, lambda x: x >= args.min_mean_coverage)
+    dup_pass = pass_if_present(dup_fraction, lambda x: x <= args.max_dup_fraction)
+    failed = [
+        name
+        for name, ok in (("mapped", mapped_pass), ("coverage", coverage_pass), ("dup", dup_pass))
+        if not ok
+    ]
+    record = {
+        "sample": args.sample,
+        "mapped_pct": mapped_pct,
+        "mean_coverage": mean_coverage,
+        "dup_fraction": dup_fraction,
+        "early_qc_pass": not failed,
+        "failed_gates": failed,
+    }
+
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as handle:
+        json.dump(record, handle, indent=2)
+        handle.write("\n")
+    status = "PASS" if not failed else "FAIL (" + ",".join(failed) + ")"
+    print(f"{args.sample}: early QC {status}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""Parse one sample's QC outputs into a flat JSON metrics record."""
+
+import argparse
+import json
+import os
+
+from qc_metrics import sample_metrics
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract per-sample QC metrics.")
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--flagstat", default="", help="samtools flagstat output")
+    parser.add_argument("--dup-metrics", default="", help="Duplication metrics (Picard format)")
+    parser.add_argument("--samtools-stats", default="", help="samtools stats output")
+    parser.add_argument("--mosdepth", default="", help="mosdepth summary")
+    parser.add_argument("--contamination", default="", help="CalculateContamination table")
+    parser.add_argument("--early-qc", default="", help="early_qc_gate.py JSON, when the checkpoint ran")
+    parser.add_argument("--fragments", default="", help="fragmentomics.py summary JSON")
+    parser.add_argument("--out", required=True, help="Output JSON")
+    args = parser.parse_args()
+
+    record = sample_metrics(
+        args.sample,
+        flagstat=args.flagstat,
+        dup_metrics=args.dup_metrics,
+        samtools_stats=args.samtools_stats,
+        mosdepth=args.mosdepth,
+        contamination=args.contamination,
+        early_qc=args.early_qc,
+        fragments=args.fragments,
+    )
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as handle:
+        json.dump(record, handle, indent=2)
+        handle.write("\n")
+
+
+if __name__ == "__main__":
+    main()
@@ -1,60 +1,84 @@
 #!/usr/bin/env python3
 import argparse
-import gzip
+from concurrent.futures import ProcessPoolExecutor
 
+from vcf_reader import iter_contig_lines, open_vcf, read_tabix_offsets, tabix_index_path
 
-def parse_info_field(info):
-    mapping = {}
-    for item in info.split(";"):
-        if "=" in item:
-            key, value = item.split("=", 1)
-            mapping[key] = value
+HEADER = "CHROM\tPOS\tREF\tALT\tSNPEFF_EFFECT\tSNPEFF_IMPACT\tSNPEFF_GENE\n"
+
+
+def ann_value(info):
+    """Slice the ANN value out of an INFO string without parsing other keys."""
+    if info.startswith("ANN="):
+        start = 4
+    else:
+        start = info.find(";ANN=")
+        if start < 0:
+            return ""
+        start += 5
+    end = info.find(";", start)
+    return info[start:] if end < 0 else info[start:end]
+
+
+def ann_rows(line):
+    """TSV rows for one VCF record; ANN entries are split once per record."""
+    parts = line.rstrip("\n").split("\t", 8)
+    if len(parts) < 8:
+        return ""
+    chrom, pos, _vid, ref, alts, _qual, _flt, info = parts[:8]
+    entries = [entry.split("|", 4) for entry in ann_value(info).split(",") if entry]
+    first_by_allele = {}
+    for fields in entries:
+        first_by_allele.setdefault(fields[0], fields)
+
+    rows = []
+    for alt in alts.split(","):
+        if entries:
+            selected = first_by_allele.get(alt, entries[0])
+            effect = selected[1] if len(selected) > 1 else ""
+            impact = selected[2] if len(selected) > 2 else ""
+            gene = selected[3] if len(selected) > 3 else ""
         else:
-            mapping[item] = True
-    return mapping
-
-
-def select_ann_for_alt(ann_entries, alt):
-    if not ann_entries:
-        return "", "", ""
-    matching = []
-    for ann in ann_entries:
-        fields = ann.split("|")
-        if not fields:
-            continue
-        allele = fields[0]
-        if allele == alt:
-            matching.append(fields)
-    selected = matching[0] if matching else ann_entries[0].split("|")
-    effect = selected[1] if len(selected) > 1 else ""
-    impact = selected[2] if len(selected) > 2 else ""
-    gene = selected[3] if len(selected) > 3 else ""
-    return effect, impact, gene
+            effect, impact, gene = "", "", ""
+        rows.append(f"{chrom}\t{pos}\t{ref}\t{alt}\t{effect}\t{impact}\t{gene}\n")
+    return "".join(rows)
+
+
+def extract_contig(job):
+    vcf_path, contig, virtual_offset = job
+    return "".join(ann_rows(line) for line in iter_contig_lines(vcf_path, contig, virtual_offset))
 
 
 def main():
     parser = argparse.ArgumentParser(description="Extract SnpEff ANN fields into TSV.")
     parser.add_argument("--vcf", required=True, help="Input VCF/VCF.GZ with ANN field")
     parser.add_argument("--out", required=True, help="Output TSV path")
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=1,
+        help="Process contigs in parallel (needs a bgzipped VCF with a .tbi index)",
+    )
     args = parser.parse_args()
+    if args.workers < 1:
+        raise ValueError("--workers must be >= 1")
+
+    index = tabix_index_path(args.vcf) if args.vcf.endswith(".gz") else ""
+    with open(args.out, "w") as out:
+        out.write(HEADER)
+        if args.workers > 1 and index:
+            jobs = [(args.vcf, contig, offset) for contig, offset in read_tabix_offsets(index)]
+            with ProcessPoolExecutor(max_workers=min(args.workers, max(len(jobs), 1))) as pool:
+                # map() yields in submission order, so the TSV keeps VCF order.
+                for chunk in pool.map(extract_contig, jobs):
+                    out.write(chunk)
+            return
 
-    with gzip.open(args.vcf, "rt") if args.vcf.endswith(".gz") else open(args.vcf, "r") as src, open(args.out, "w") as out:
-        out.write("CHROM\tPOS\tREF\tALT\tSNPEFF_EFFECT\tSNPEFF_IMPACT\tSNPEFF_GENE\n")
-        for line in src:
-            if not line or line.startswith("#"):
-                continue
-            parts = line.rstrip("\n").split("\t")
-            if len(parts) < 8:
-                continue
-            chrom, pos, _vid, ref, alts, _qual, _flt, info = parts[:8]
-            info_map = parse_info_field(info)
-            ann_raw = info_map.get("ANN", "")
-            ann_entries = [x for x in ann_raw.split(",") if x] if ann_raw else []
-            for alt in alts.split(","):
-                effect, impact, gene = select_ann_for_alt(ann_entries, alt)
-                out.write(
-                    f"{chrom}\t{pos}\t{ref}\t{alt}\t{effect}\t{impact}\t{gene}\n"
-                )
+        with open_vcf(args.vcf) as src:
+            for line in src:
+                if not line or line.startswith("#"):
+                    continue
+                out.write(ann_rows(line))
 
 
 if __name__ == "__main__":
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""Fit per-step memory/runtime models from accumulated benchmark job tables.
+
+Input is one or more benchmark_jobs.tsv files (scripts/benchmark_summary.py),
+each from one run. For every step, peak RSS (MB) and wall time (minutes) are
+fitted as intercept + slope x input size, where the input size is the
+sample's FASTQ bytes, dedup BAM bytes or panel bases divided by the number of
+shards the step ran in; the predictor with the best R^2 is kept. A negative
+slope falls back to a flat model. The 95th percentile of the positive
+residuals is stored as headroom, so an estimate covers most past jobs before
+the workflow's safety margin is applied.
+
+Threads are suggested from mean_load (the 90th percentile of cores kept busy),
+and the median BAM/FASTQ size ratio lets the workflow estimate BAM-driven
+steps before the dedup BAM exists.
+"""
+
+import argparse
+import glob
+import json
+import math
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+PREDICTORS = ["fastq_bytes", "bam_bytes", "panel_bp"]
+# Model name -> (benchmark column, scale to the resource unit).
+TARGETS = {"mem_mb": ("max_rss", 1.0), "runtime_min": ("s", 1 / 60)}
+
+
+def load_history(patterns):
+    """Benchmark job rows of every file matching patterns; run = source file."""
+    paths = sorted({path for pattern in patterns for path in glob.glob(pattern)})
+    if not paths:
+        raise FileNotFoundError(f"No benchmark job tables match: {patterns}")
+    parts = []
+    for run, path in enumerate(paths):
+        jobs = pd.read_csv(path, sep="\t", dtype={"shard": str})
+        parts.append(jobs.assign(run=run))
+    history = pd.concat(parts, ignore_index=True)
+    history["shards"] = history.groupby(["run", "step", "sample"])["step"].transform("size")
+    return history
+
+
+def fit_line(x, y):
+    """(intercept, slope, r2, residual_q95) of a least-squares line; flat if slope < 0."""
+    slope = 0.0
+    if len(np.unique(x)) > 1:
+        slope, intercept = np.polyfit(x, y, 1)
+    if slope <= 0:
+        slope, intercept = 0.0, float(np.median(y))
+    predicted = intercept + slope * x
+    residuals = y - predicted
+    total = float(((y - y.mean()) ** 2).sum())
+    r2 = 1 - float((residuals**2).sum()) / total if total > 0 else 0.0
+    headroom = float(np.quantile(np.clip(residuals, 0, None), 0.95))
+    return float(intercept), float(slope), r2, headroom
+
+
+def fit_target(jobs, column, scale, min_jobs):
+    """Best single-predictor model of column (scaled), or None with too few jobs."""
+    y_all = pd.to_numeric(jobs[column], errors="coerce") * scale
+    best = None
+    for predictor in PREDICTORS:
+        x_all = pd.to_numeric(jobs[predictor], errors="coerce") / jobs["shards"]
+        mask = y_all.notna() & x_all.notna() & (x_all > 0)
+        if mask.sum() < min_jobs:
+            continue
+        intercept, slope, r2, headroom = fit_line(x_all[mask].to_numpy(), y_all[mask].to_numpy())
+        if best is None or r2 > best["r2"]:
+            best = {
+                "predictor": predictor if slope > 0 else None,
+                "intercept": intercept,
+                "slope": slope,
+                "residual_q95": headroom,
+                "r2": r2,
+                "jobs": int(mask.sum()),
+            }
+    if best is None and y_all.notna().sum() >= min_jobs:
+        y = y_all.dropna().to_numpy()
+        intercept, slope, r2, headroom = fit_line(np.zeros(len(y)), y)
+        best = {
+            "predictor": None,
+            "intercept": intercept,
+            "slope": slope,
+            "residual_q95": headroom,
+            "r2": r2,
+            "jobs": len(y),
+        }
+    return best
+
+
+def suggest_threads(jobs):
+    """Cores a step keeps busy (90th percentile of mean_load / 100, rounded up)."""
+    if "mean_load" not in jobs.columns:
+        return None
+    load = pd.to_numeric(jobs["mean_load"], errors="coerce").dropna()
+    if load.empty:
+        return None
+    return max(1, math.ceil(float(load.quantile(0.9)) / 100))
+
+
+def bam_per_fastq_byte(history):
+    """Median dedup BAM bytes per raw FASTQ byte over runs and samples."""
+    sizes = history.drop_duplicates(["run", "sample"])
+    ratio = pd.to_numeric(sizes["bam_bytes"], errors="coerce") / pd.to_numeric(
+        sizes["fastq_bytes"], errors="coerce"
+    )
+    ratio = ratio.replace([np.inf, -np.inf], np.nan).dropna()
+    return float(ratio.median()) if not ratio.empty else None
+
+
+def fit_models(history, min_jobs=3):
+    """{"steps": {step: {mem_mb, runtime_min, threads}}, "bam_per_fastq_byte": ...}."""
+    steps = {}
+    for step, jobs in history.groupby("step", sort=True):
+        model = {}
+        for name, (column, scale) in TARGETS.items():
+            fit = fit_target(jobs, column, scale, min_jobs)
+            if fit is not None:
+                model[name] = fit
+        if not model:
+            continue
+        threads = suggest_threads(jobs)
+        if threads is not None:
+            model["threads"] = threads
+        steps[step] = model
+    return {
+        "runs": int(history["run"].nunique()),
+        "bam_per_fastq_byte": bam_per_fastq_byte(history),
+        "steps": steps,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fit per-step resource models from benchmark job tables.")
+    parser.add_argument(
+        "--history", nargs="+", required=True, help="benchmark_jobs.tsv files or glob patterns"
+    )
+    parser.add_argument("--min-jobs", type=int, default=3, help="Jobs needed to model a step")
+    parser.add_argument("--out", required=True, help="Model JSON")
+    args = parser.parse_args()
+
+    if args.min_jobs < 1:
+        raise ValueError("--min-jobs must be >= 1")
+    history = load_history(args.history)
+    model = fit_models(history, args.min_jobs)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as handle:
+        json.dump(model, handle, indent=2, sort_keys=True)
+        handle.write("\n")
+    print(
+        f"{len(model['steps'])} steps modelled from {len(history)} jobs in {model['runs']} runs",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
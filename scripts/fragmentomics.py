@@ -0,0 +1,225 @@
+#!/usr/bin/env python3
+"""cfDNA fragment-length profile of one sample.
+
+The BAM is split into contig windows that a process pool streams in
+parallel; each worker opens the BAM once and returns NumPy histograms of
+fragment length for all fragments, on-target fragments (overlapping a panel
+target) and fragments spanning a called variant. A fragment is counted once,
+from the leftmost read of a proper pair (TLEN > 0), in the window holding
+its start. Windows are summed into a compact per-sample histogram TSV
+(non-zero lengths only) and a JSON summary with the short-fragment ratio.
+"""
+
+import argparse
+import json
+import os
+import sys
+from multiprocessing import Pool
+
+import numpy as np
+import pandas as pd
+import pysam
+
+from callable_territory import read_targets
+from vcf_reader import read_vcf_arrays
+
+HISTOGRAM_CLASSES = ["all", "on_target", "variant_sites"]
+SKIP_FLAGS = 0x4 | 0x100 | 0x200 | 0x400 | 0x800
+
+_BAM = None
+
+
+def _open_bam(bam_path, index_path):
+    global _BAM
+    _BAM = pysam.AlignmentFile(bam_path, "rb", index_filename=index_path or None)
+
+
+def merge_intervals(starts, ends):
+    """Sorted, disjoint [start, end) intervals covering the input ones."""
+    if len(starts) == 0:
+        return starts, ends
+    order = np.argsort(starts, kind="stable")
+    starts, ends = starts[order], np.maximum.accumulate(ends[order])
+    new = np.r_[True, starts[1:] > ends[:-1]]
+    group_end = np.r_[np.flatnonzero(new)[1:] - 1, len(starts) - 1]
+    return starts[new], ends[group_end]
+
+
+def overlaps_any(frag_start, frag_end, starts, ends):
+    """Whether each [frag_start, frag_end) overlaps a sorted disjoint interval."""
+    if len(starts) == 0:
+        return np.zeros(len(frag_start), dtype=bool)
+    idx = np.searchsorted(ends, frag_start, side="right")
+    hit = idx < len(starts)
+    hit[hit] = starts[idx[hit]] < frag_end[hit]
+    return hit
+
+
+def covers_any(frag_start, frag_end, positions):
+    """Whether each [frag_start, frag_end) contains one of the sorted positions."""
+    return np.searchsorted(positions, frag_end, side="left") > np.searchsorted(
+        positions, frag_start, side="left"
+    )
+
+
+def window_histograms(task):
+    """(classes x max_length+1) histogram for fragments starting in one window."""
+    contig, start, end, targets, sites, min_mapq, max_length = task
+    frag_start = []
+    frag_length = []
+    for read in _BAM.fetch(contig, start, end):
+        if read.flag & SKIP_FLAGS or not read.is_proper_pair or read.mapping_quality < min_mapq:
+            continue
+        tlen = read.template_length
+        pos = read.reference_start
+        if tlen <= 0 or pos < start:
+            continue
+        frag_start.append(pos)
+        frag_length.append(tlen)
+
+    hist = np.zeros((len(HISTOGRAM_CLASSES), max_length + 1), dtype=np.int64)
+    if not frag_start:
+        return hist
+    frag_start = np.asarray(frag_start, dtype=np.int64)
+    frag_length = np.asarray(frag_length, dtype=np.int64)
+    frag_end = frag_start + frag_length
+    # Lengths above max_length share the last bin.
+    length_bin = np.minimum(frag_length, max_length)
+    masks = [
+        np.ones(len(frag_start), dtype=bool),
+        overlaps_any(frag_start, frag_end, targets[0], targets[1]),
+        covers_any(frag_start, frag_end, sites),
+    ]
+    for row, mask in enumerate(masks):
+        hist[row] = np.bincount(length_bin[mask], minlength=max_length + 1)
+    return hist
+
+
+def contig_windows(bam_path, index_path, window_size):
+    """(contig, start, end) windows over contigs that have mapped reads."""
+    with pysam.AlignmentFile(bam_path, "rb", index_filename=index_path or None) as bam:
+        mapped = {stat.contig for stat in bam.get_index_statistics() if stat.mapped > 0}
+        lengths = dict(zip(bam.references, bam.lengths))
+    windows = []
+    for contig, length in lengths.items():
+        if contig not in mapped:
+            continue
+        for start in range(0, length, window_size):
+            windows.append((contig, start, min(start + window_size, length)))
+    return windows
+
+
+def load_sites(vcf_path):
+    """{contig: sorted 0-based positions} of the variants in a VCF."""
+    if not vcf_path:
+        return {}
+    arrays = read_vcf_arrays(vcf_path, format_fields=())
+    sites = {}
+    chroms = np.asarray(arrays["CHROM"], dtype=object)
+    positions = np.asarray(arrays["POS"], dtype=np.int64) - 1
+    for contig in pd.unique(chroms):
+        sites[contig] = np.unique(positions[chroms == contig])
+    return sites
+
+
+def load_targets(bed_path):
+    """{contig: (starts, ends)} of merged panel targets."""
+    if not bed_path:
+        return {}
+    targets = read_targets(bed_path)
+    merged = {}
+    for contig, group in targets.groupby("CHROM", sort=False):
+        merged[contig] = merge_intervals(
+            group["START"].to_numpy(dtype=np.int64), group["END"].to_numpy(dtype=np.int64)
+        )
+    return merged
+
+
+def range_count(hist, low, high):
+    return int(hist[low:high + 1].sum())
+
+
+def class_summary(hist, short_range, long_range):
+    total = int(hist.sum())
+    summary = {"fragments": total, "median_length": None, "mode_length": None}
+    if total:
+        summary["median_length"] = int(np.searchsorted(np.cumsum(hist), (total + 1) / 2))
+        # The last bin collects every longer fragment, so it is not a length.
+        summary["mode_length"] = int(np.argmax(hist[:-1]))
+    short = range_count(hist, *short_range)
+    long_ = range_count(hist, *long_range)
+    summary["short_fragments"] = short
+    summary["long_fragments"] = long_
+    summary["short_fragment_ratio"] = short / (short + long_) if short + long_ else None
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fragment-length profile of a cfDNA BAM.")
+    parser.add_argument("--bam", required=True)
+    parser.add_argument("--bai", default="", help="BAM index (default: alongside the BAM)")
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--panel-bed", default="", help="Targets for the on-target histogram")
+    parser.add_argument("--vcf", default="", help="Called variants for the variant-site histogram")
+    parser.add_argument("--min-mapq", type=int, default=20)
+    parser.add_argument("--max-length", type=int, default=1000)
+    parser.add_argument("--short-range", default="100,150", help="Inclusive short-fragment lengths")
+    parser.add_argument("--long-range", default="151,220", help="Inclusive long-fragment lengths")
+    parser.add_argument("--window-size", type=int, default=20000000)
+    parser.add_argument("--threads", type=int, default=1)
+    parser.add_argument("--out-hist", required=True, help="Histogram TSV (non-zero lengths)")
+    parser.add_argument("--out-summary", required=True, help="Summary JSON")
+    args = parser.parse_args()
+
+    short_range = [int(x) for x in args.short_range.split(",")]
+    long_range = [int(x) for x in args.long_range.split(",")]
+    targets = load_targets(args.panel_bed)
+    sites = load_sites(args.vcf)
+    no_intervals = (np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64))
+    tasks = [
+        (
+            contig,
+            start,
+            end,
+            targets.get(contig, no_intervals),
+            sites.get(contig, np.zeros(0, dtype=np.int64)),
+            args.min_mapq,
+            args.max_length,
+        )
+        for contig, start, end in contig_windows(args.bam, args.bai, args.window_size)
+    ]
+
+    hist = np.zeros((len(HISTOGRAM_CLASSES), args.max_length + 1), dtype=np.int64)
+    with Pool(max(1, args.threads), initializer=_open_bam, initargs=(args.bam, args.bai)) as pool:
+        for window_hist in pool.imap_unordered(window_histograms, tasks):
+            hist += window_hist
+
+    lengths = np.flatnonzero(hist.any(axis=0))
+    table = pd.DataFrame({"length": lengths})
+    for row, name in enumerate(HISTOGRAM_CLASSES):
+        table[name] = hist[row, lengths]
+    for path in (args.out_hist, args.out_summary):
+        os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    table.to_csv(args.out_hist, sep="\t", index=False)
+
+    summary = {
+        "sample": args.sample,
+        "min_mapq": args.min_mapq,
+        "max_length": args.max_length,
+        "short_range": short_range,
+        "long_range": long_range,
+        "windows": len(tasks),
+    }
+    for row, name in enumerate(HISTOGRAM_CLASSES):
+        summary[name] = class_summary(hist[row], short_range, long_range)
+    with open(args.out_summary, "w") as handle:
+        json.dump(summary, handle, indent=2)
+        handle.write("\n")
+    print(
+        f"{args.sample}: {summary['all']['fragments']} fragments in {len(tasks)} windows",
+        file=sys.stderr,
+    )
+
+
+if __name__ == "__main__":
+    main()
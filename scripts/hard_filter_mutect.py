@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""Hard-filter a FilterMutectCalls VCF down to one sample.
+
+Equivalent to
+  bcftools view -s SAMPLE [-f PASS,.] \
+    -i 'FORMAT/DP>=min_dp && FORMAT/AD[0:1]>=min_alt && FORMAT/AD[0:1]/FORMAT/DP>=min_af'
+but evaluated on NumPy arrays from vcf_reader. Records with a missing DP or
+AD fail the filter. Writes uncompressed VCF; the rule bgzips and indexes it.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+
+from vcf_reader import read_vcf_arrays, read_vcf_header
+
+
+def as_bool(value):
+    return str(value).strip().lower() in {"1", "true", "yes", "y"}
+
+
+def hard_filter_mask(arrays, pass_only, min_dp, min_alt_reads, min_af):
+    dp = arrays["FORMAT/DP"]
+    ad = arrays["FORMAT/AD"]
+    alt_reads = ad[:, 1] if ad.shape[1] > 1 else np.full(len(dp), np.nan)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        keep = (dp >= min_dp) & (alt_reads >= min_alt_reads) & (alt_reads / dp >= min_af)
+    if pass_only:
+        keep &= np.isin(arrays["FILTER"], ["PASS", "."])
+    return keep
+
+
+def subset_sample(line, sample_col):
+    """Keep the fixed columns plus one sample column."""
+    parts = line.rstrip("\n").split("\t")
+    return "\t".join(parts[:9] + parts[sample_col:sample_col + 1]) + "\n"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Hard-filter Mutect2 calls for one sample.")
+    parser.add_argument("--vcf", required=True, help="filtered.vcf.gz from FilterMutectCalls")
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--pass-only", required=True)
+    parser.add_argument("--min-dp", required=True, type=float)
+    parser.add_argument("--min-alt-reads", required=True, type=float)
+    parser.add_argument("--min-af", required=True, type=float)
+    parser.add_argument("--out", default="-", help="Output VCF ('-' for stdout)")
+    args = parser.parse_args()
+
+    header = read_vcf_header(args.vcf)
+    columns = header[-1].rstrip("\n").split("\t") if header else []
+    if args.sample not in columns[9:]:
+        raise ValueError(f"Sample {args.sample} not found in {args.vcf}")
+    sample_col = columns.index(args.sample)
+
+    arrays = read_vcf_arrays(args.vcf, args.sample, format_fields=("DP", "AD"), records=True)
+    keep = hard_filter_mask(
+        arrays, as_bool(args.pass_only), args.min_dp, args.min_alt_reads, args.min_af
+    )
+
+    out = sys.stdout if args.out == "-" else open(args.out, "w")
+    try:
+        out.writelines(header[:-1])
+        out.write(
+            f"##hard_filter_mutect=<sample={args.sample},pass_only={as_bool(args.pass_only)},"
+            f"min_dp={args.min_dp:g},min_alt_reads={args.min_alt_reads:g},min_af={args.min_af:g}>\n"
+        )
+        out.write(subset_sample(header[-1], sample_col))
+        for line in arrays["records"][keep]:
+            out.write(subset_sample(line, sample_col))
+    finally:
+        if out is not sys.stdout:
+            out.close()
+    print(f"kept {int(keep.sum())} of {len(keep)} records", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,82 +1,121 @@
 #!/usr/bin/env python3
 import argparse
 import json
-import math
-import os
 import pandas as pd
 
+from callable_territory import (
+    COVERAGE_SOURCES,
+    read_targets,
+    required_depth,
+    sample_territory,
+    territory_summary,
+)
+from qc_metrics import sample_records
 
-def parse_mean_coverage(path):
-    if not os.path.exists(path):
-        return None
-    df = pd.read_csv(path, sep="\t")
-    if df.empty or "mean" not in df.columns:
-        return None
-    return float(df.loc[0, "mean"])
+GENE_COLUMNS = [
+    "sample", "gene", "bin_name", "required_depth", "panel_bases", "callable_bases", "callable_fraction",
+]
 
 
-def parse_contamination(path):
-    if not os.path.exists(path):
-        return None
-    df = pd.read_csv(path, sep="\t")
-    if df.empty or df.shape[1] < 2:
-        return None
-    try:
-        return float(df.iloc[0, 1])
-    except Exception:
-        return None
+def fraction(numerator, denominator):
+    return float(numerator) / float(denominator) if denominator else 0.0
 
 
 def main():
     parser = argparse.ArgumentParser(description="Generate sample-level LOD/callable bin summary.")
     parser.add_argument("--samples", required=True, help="Comma-separated sample list")
-    parser.add_argument("--results-dir", required=True)
+    parser.add_argument("--results-dir", default="", help="Parse QC files here when no --metrics-db is given")
+    parser.add_argument("--metrics-db", default="", help="Run-level QC metrics catalog (SQLite)")
     parser.add_argument("--bins-json", required=True, help="JSON list of bins with name/min_af/max_af")
     parser.add_argument("--min-alt-reads", required=True, type=float)
     parser.add_argument("--max-contamination", required=True, type=float)
+    parser.add_argument(
+        "--coverage",
+        nargs="*",
+        default=[],
+        help="Per-sample mosdepth coverage files, in --samples order, for callable territory",
+    )
+    parser.add_argument("--coverage-source", default="regions", choices=COVERAGE_SOURCES)
+    parser.add_argument("--panel-bed", default="", help="Panel targets (needed for per_base/quantized)")
+    parser.add_argument("--chunk-rows", type=int, default=500000)
     parser.add_argument("--out", required=True)
+    parser.add_argument("--gene-out", default="", help="Optional per-gene callable territory TSV")
     args = parser.parse_args()
 
     bins = json.loads(args.bins_json)
     samples = [s for s in args.samples.split(",") if s]
+    metrics = sample_records(samples, results_dir=args.results_dir, catalog=args.metrics_db)
+    if args.coverage and len(args.coverage) != len(samples):
+        raise ValueError(
+            f"Got {len(args.coverage)} coverage files for {len(samples)} samples"
+        )
+    coverage_by_sample = dict(zip(samples, args.coverage))
+    required = [required_depth(args.min_alt_reads, float(b["min_af"])) for b in bins]
+    targets = read_targets(args.panel_bed) if args.panel_bed and args.coverage_source != "regions" else None
     records = []
+    gene_records = []
 
     for sample in samples:
-        cov_path = os.path.join(
-            args.results_dir, "coverage", sample, f"{sample}.mosdepth.summary.txt"
-        )
-        contam_path = os.path.join(
-            args.results_dir, "mutect2", f"{sample}.contamination.table"
-        )
-        mean_cov = parse_mean_coverage(cov_path)
-        contamination = parse_contamination(contam_path)
+        mean_cov = metrics[sample]["mean_coverage"]
+        contamination = metrics[sample]["contamination"]
         contam_ok = (
             contamination is not None and contamination <= args.max_contamination
         )
 
-        for bin_cfg in bins:
+        panel = None
+        if sample in coverage_by_sample:
+            sample_targets, callable_bases = sample_territory(
+                coverage_by_sample[sample], args.coverage_source, required, targets, args.chunk_rows
+            )
+            _, panel_bases, panel_callable = territory_summary(sample_targets, callable_bases)
+            panel = (panel_bases[0], panel_callable[0])
+            genes, gene_bases, gene_callable = territory_summary(
+                sample_targets, callable_bases, by_gene=True
+            )
+            for gene_idx, gene in enumerate(genes):
+                for bin_idx, bin_cfg in enumerate(bins):
+                    gene_records.append(
+                        {
+                            "sample": sample,
+                            "gene": gene,
+                            "bin_name": str(bin_cfg["name"]),
+                            "required_depth": required[bin_idx],
+                            "panel_bases": int(gene_bases[gene_idx]),
+                            "callable_bases": int(gene_callable[gene_idx, bin_idx]),
+                            "callable_fraction": fraction(
+                                gene_callable[gene_idx, bin_idx], gene_bases[gene_idx]
+                            ),
+                        }
+                    )
+
+        for bin_idx, bin_cfg in enumerate(bins):
             bin_name = str(bin_cfg["name"])
             min_af = float(bin_cfg["min_af"])
             max_af = float(bin_cfg["max_af"])
-            required_depth = math.ceil(args.min_alt_reads / max(min_af, 1e-9))
             callable_flag = (
-                mean_cov is not None and mean_cov >= required_depth and contam_ok
-            )
-            records.append(
-                {
-                    "sample": sample,
-                    "bin_name": bin_name,
-                    "min_af": min_af,
-                    "max_af": max_af,
-                    "mean_coverage": mean_cov,
-                    "required_depth": required_depth,
-                    "contamination": contamination,
-                    "contamination_gate": contam_ok,
-                    "callable": callable_flag,
-                }
+                mean_cov is not None and mean_cov >= required[bin_idx] and contam_ok
             )
+            record = {
+                "sample": sample,
+                "bin_name": bin_name,
+                "min_af": min_af,
+                "max_af": max_af,
+                "mean_coverage": mean_cov,
+                "required_depth": required[bin_idx],
+                "contamination": contamination,
+                "contamination_gate": contam_ok,
+                "callable": callable_flag,
+            }
+            if panel is not None:
+                panel_bases, panel_callable = panel
+                record["panel_bases"] = int(panel_bases)
+                record["callable_bases"] = int(panel_callable[bin_idx])
+                record["callable_fraction"] = fraction(panel_callable[bin_idx], panel_bases)
+            records.append(record)
 
     pd.DataFrame(records).to_csv(args.out, sep="\t", index=False)
+    if args.gene_out:
+        pd.DataFrame(gene_records, columns=GENE_COLUMNS).to_csv(args.gene_out, sep="\t", index=False)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,91 @@
+#!/usr/bin/env python3
+"""Convert `samtools markdup -f` statistics to Picard DuplicationMetrics.
+
+The output has the layout of a MarkDuplicates metrics file (PERCENT_DUPLICATION
+in column 9), so qc_metrics.parse_dup_fraction and MultiQC's Picard module
+read it the same way whichever dedup engine ran. samtools counts reads, Picard
+counts pairs: pair counts are halved. samtools does not split the reads it
+excludes (unmapped, secondary, supplementary, QC-fail), so all of them are
+reported as UNMAPPED_READS.
+"""
+
+import argparse
+import os
+
+PICARD_COLUMNS = [
+    "LIBRARY",
+    "UNPAIRED_READS_EXAMINED",
+    "READ_PAIRS_EXAMINED",
+    "SECONDARY_OR_SUPPLEMENTARY_RDS",
+    "UNMAPPED_READS",
+    "UNPAIRED_READ_DUPLICATES",
+    "READ_PAIR_DUPLICATES",
+    "READ_PAIR_OPTICAL_DUPLICATES",
+    "PERCENT_DUPLICATION",
+    "ESTIMATED_LIBRARY_SIZE",
+]
+
+
+def read_markdup_stats(path):
+    """{FIELD: value} from the `FIELD: value` lines of samtools markdup -f output."""
+    stats = {}
+    with open(path) as handle:
+        for line in handle:
+            key, sep, value = line.partition(":")
+            if not sep or key == "COMMAND":
+                continue
+            value = value.strip()
+            try:
+                stats[key.strip()] = int(value)
+            except ValueError:
+                stats[key.strip()] = value
+    return stats
+
+
+def picard_metrics(stats, library):
+    """One DuplicationMetrics row (column -> value) from markdup stats."""
+    required = ["SINGLE", "PAIRED", "DUPLICATE SINGLE", "DUPLICATE PAIR"]
+    missing = [key for key in required if key not in stats]
+    if missing:
+        raise ValueError(f"samtools markdup stats lack field(s): {missing}")
+    unpaired = stats["SINGLE"]
+    pairs = stats["PAIRED"] // 2
+    unpaired_dups = stats["DUPLICATE SINGLE"]
+    pair_dups = stats["DUPLICATE PAIR"] // 2
+    examined = unpaired + 2 * pairs
+    duplicated = unpaired_dups + 2 * pair_dups
+    return {
+        "LIBRARY": library,
+        "UNPAIRED_READS_EXAMINED": unpaired,
+        "READ_PAIRS_EXAMINED": pairs,
+        "SECONDARY_OR_SUPPLEMENTARY_RDS": 0,
+        "UNMAPPED_READS": stats.get("EXCLUDED", 0),
+        "UNPAIRED_READ_DUPLICATES": unpaired_dups,
+        "READ_PAIR_DUPLICATES": pair_dups,
+        "READ_PAIR_OPTICAL_DUPLICATES": stats.get("DUPLICATE PAIR OPTICAL", 0) // 2,
+        "PERCENT_DUPLICATION": f"{duplicated / examined:.6f}" if examined else "0",
+        "ESTIMATED_LIBRARY_SIZE": stats.get("ESTIMATED_LIBRARY_SIZE", ""),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="samtools markdup stats -> Picard duplication metrics.")
+    parser.add_argument("--stats", required=True, help="samtools markdup -f output")
+    parser.add_argument("--bam", required=True, help="Input BAM (recorded in the header)")
+    parser.add_argument("--library", default="lib1")
+    parser.add_argument("--out", required=True)
+    args = parser.parse_args()
+
+    row = picard_metrics(read_markdup_stats(args.stats), args.library)
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as handle:
+        # MultiQC takes the sample name from the INPUT= of a MarkDuplicates header line.
+        handle.write("## htsjdk.samtools.metrics.StringHeader\n")
+        handle.write(f"# samtools markdup (MarkDuplicates-compatible metrics) INPUT={args.bam}\n")
+        handle.write("\n## METRICS CLASS\tpicard.sam.DuplicationMetrics\n")
+        handle.write("\t".join(PICARD_COLUMNS) + "\n")
+        handle.write("\t".join(str(row[column]) for column in PICARD_COLUMNS) + "\n")
+
+
+if __name__ == "__main__":
+    main()
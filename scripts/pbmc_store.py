@@ -0,0 +1,216 @@
+"""Persistent, incrementally updated PBMC blacklist store.
+
+The store is a columnar table directory (see columnar.py) with one row per
+(variant, PBMC sample), sorted by packed variant key and sample. Its
+metadata records every ingested calls file with its size, mtime and content
+hash, so a sync only parses files that are new or whose content changed;
+rows from changed or deleted files are dropped. Changing max_vaf or the
+contig dictionary invalidates the store, since they decide which calls were
+kept at ingest and how their keys were packed.
+
+Recurrence and sample lists are derived from the sorted rows (variants that
+share an inexact key are told apart by their labels), and the blacklisted
+keys are exported as a key table that apply_pbmc_blacklist memory-maps.
+"""
+
+import os
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from columnar import (
+    decode_levels,
+    file_digest,
+    is_table,
+    load_table,
+    save_table,
+    update_table_meta,
+)
+from variant_keys import KEY_COLUMNS, contig_digest, frame_index, frame_labels, variant_groups
+
+STORE_VERSION = 2
+BLACKLIST_COLUMNS = ["CHROM", "POS", "REF", "ALT", "RECURRENCE", "SAMPLES"]
+
+
+def load_calls(path, max_vaf, contigs=None):
+    df = pd.read_csv(path, sep="\t")
+    required = {"CHROM", "POS", "REF", "ALT"}
+    missing = required - set(df.columns)
+    if missing:
+        raise ValueError(f"{path} is missing required columns: {sorted(missing)}")
+
+    vaf_col = None
+    for candidate in ("AF", "VAF", "af", "vaf"):
+        if candidate in df.columns:
+            vaf_col = candidate
+            break
+    if vaf_col is not None:
+        df[vaf_col] = pd.to_numeric(df[vaf_col], errors="coerce")
+        df = df[df[vaf_col].notna() & (df[vaf_col] <= max_vaf)]
+
+    if df.empty:
+        return pd.DataFrame(columns=["variant_key"] + KEY_COLUMNS)
+
+    # One row per distinct variant in this sample.
+    index_keys, _labels, rows = frame_index(df, contigs=contigs, keep="first")
+    calls = df.iloc[rows][KEY_COLUMNS].reset_index(drop=True)
+    calls.insert(0, "variant_key", index_keys)
+    return calls
+
+
+def empty_rows():
+    return pd.DataFrame(
+        {
+            "variant_key": np.zeros(0, dtype=np.uint64),
+            "sample": pd.Series([], dtype=object),
+            "CHROM": pd.Series([], dtype=object),
+            "POS": np.zeros(0, dtype=np.int64),
+            "REF": pd.Series([], dtype=object),
+            "ALT": pd.Series([], dtype=object),
+        }
+    )
+
+
+def load_store(store_dir, max_vaf, contigs=None):
+    """(rows, files) of an existing store, or empty ones if absent or stale."""
+    if not is_table(store_dir):
+        return empty_rows(), {}
+    table = load_table(store_dir, mmap=False)
+    meta = table["meta"]
+    if (
+        meta.get("store_version") != STORE_VERSION
+        or meta.get("max_vaf") != max_vaf
+        or meta.get("contigs") != contig_digest(contigs)
+    ):
+        return empty_rows(), {}
+
+    rows = pd.DataFrame(
+        {
+            "variant_key": table["numeric"]["variant_key"],
+            "POS": table["numeric"]["POS"],
+        }
+    )
+    for column in ["sample", "CHROM", "REF", "ALT"]:
+        codes, blob, offsets = table["categorical"][column]
+        rows[column] = decode_levels(blob, offsets, codes)
+    return rows[empty_rows().columns], meta.get("files", {})
+
+
+def store_meta(files, max_vaf, contigs=None):
+    return {
+        "store_version": STORE_VERSION,
+        "max_vaf": max_vaf,
+        "contigs": contig_digest(contigs),
+        "files": files,
+    }
+
+
+def save_store(store_dir, rows, files, max_vaf, contigs=None):
+    save_table(
+        store_dir,
+        numeric={
+            "variant_key": rows["variant_key"].to_numpy(dtype=np.uint64),
+            "POS": rows["POS"].to_numpy(dtype=np.int64),
+        },
+        categorical={column: rows[column] for column in ["sample", "CHROM", "REF", "ALT"]},
+        meta=store_meta(files, max_vaf, contigs),
+    )
+
+
+def sync_store(store_dir, calls_dir, max_vaf, persist=True, contigs=None):
+    """Bring the store in line with calls_dir/*.tsv; returns (rows, stats).
+
+    With persist=False nothing is read from or written to store_dir, which
+    reproduces a full rebuild.
+    """
+    rows, files = load_store(store_dir, max_vaf, contigs) if persist else (empty_rows(), {})
+    current = {}
+    ingest = []
+    for path in sorted(Path(calls_dir).glob("*.tsv")):
+        stat = os.stat(path)
+        record = files.get(path.name)
+        if record and record["size"] == stat.st_size and record["mtime_ns"] == stat.st_mtime_ns:
+            current[path.name] = record
+            continue
+        digest = file_digest(path)
+        if record and record["size"] == stat.st_size and record["digest"] == digest:
+            current[path.name] = {**record, "mtime_ns": stat.st_mtime_ns}
+            continue
+        ingest.append(path)
+        current[path.name] = {
+            "sample": path.stem,
+            "size": stat.st_size,
+            "mtime_ns": stat.st_mtime_ns,
+            "digest": digest,
+        }
+
+    # Rows of deleted files and of files being re-ingested are replaced.
+    ingest_names = {path.name for path in ingest}
+    dropped = {
+        record["sample"]
+        for name, record in files.items()
+        if name not in current or name in ingest_names
+    }
+    kept = rows[~rows["sample"].isin(dropped)] if dropped else rows
+
+    added = []
+    for path in ingest:
+        calls = load_calls(path, max_vaf, contigs)
+        calls["sample"] = path.stem
+        added.append(calls)
+    if added:
+        rows = pd.concat([kept] + added, ignore_index=True)
+        rows["POS"] = pd.to_numeric(rows["POS"]).astype(np.int64)
+        rows["variant_key"] = rows["variant_key"].astype(np.uint64)
+        rows = rows.sort_values(["variant_key", "sample"], kind="stable").reset_index(drop=True)
+    else:
+        rows = kept.reset_index(drop=True)
+
+    if persist and (ingest or dropped):
+        save_store(store_dir, rows, current, max_vaf, contigs)
+    elif persist and current != files:
+        # Only mtimes moved (content hashes matched); the rows are unchanged.
+        update_table_meta(store_dir, store_meta(current, max_vaf, contigs))
+    stats = {
+        "files": len(current),
+        "ingested": len(ingest),
+        "removed": len(set(files) - set(current)),
+        "rows": len(rows),
+    }
+    return rows, stats
+
+
+def blacklist_table(rows, min_recurrence):
+    """Per-variant CHROM/POS/REF/ALT, RECURRENCE and sorted SAMPLES, key-sorted.
+
+    Returns (table, keys, labels) with keys the sorted uint64 keys of the
+    table rows and labels their key labels.
+    """
+    if rows.empty:
+        return (
+            pd.DataFrame(columns=BLACKLIST_COLUMNS),
+            np.zeros(0, dtype=np.uint64),
+            np.zeros(0, dtype=object),
+        )
+    keys = rows["variant_key"].to_numpy(dtype=np.uint64)
+    labels = frame_labels(rows, keys)
+    # Rows are sorted by (key, sample); a stable regroup by label keeps that
+    # sample order for variants that share an inexact key.
+    group, _first = variant_groups(keys, labels)
+    order = np.argsort(group, kind="stable")
+    rows, keys, labels = rows.iloc[order], keys[order], labels[order]
+    recurrence = np.bincount(group)
+    starts = np.r_[0, np.cumsum(recurrence)[:-1]]
+    selected = recurrence >= min_recurrence
+    group = np.repeat(np.arange(len(starts)), recurrence)
+    member = selected[group]
+
+    first = rows.iloc[starts[selected]]
+    table = first[KEY_COLUMNS].reset_index(drop=True)
+    table["RECURRENCE"] = recurrence[selected]
+    # Rows are sorted by (key, sample), so each group's names are already sorted.
+    table["SAMPLES"] = (
+        rows.loc[member, "sample"].groupby(group[member], sort=True).agg(",".join).to_numpy()
+    )
+    return table[BLACKLIST_COLUMNS], keys[starts[selected]], labels[starts[selected]]
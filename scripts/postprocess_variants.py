@@ -0,0 +1,129 @@
+#!/usr/bin/env python3
+"""Fused per-sample variant post-processing.
+
+Runs the variant_table -> annotate_variant_flags -> clinical_variant_output
+-> apply_pbmc_blacklist -> tumor_informed_filter chain in one process on an
+in-memory DataFrame, reusing the packed variant keys computed once after the
+VCF is read. Each stage is the same function the standalone script uses, and
+only the tables passed via --out-* are written (TSV, Parquet or Arrow by
+extension); stages after the last requested table are skipped.
+"""
+
+import argparse
+import os
+
+from annotate_variant_flags import (
+    add_common_arguments,
+    add_variant_columns,
+    annotate_frame,
+    as_bool,
+    settings_from_args,
+    shared_panels_from_args,
+)
+from apply_pbmc_blacklist import apply_blacklist, load_blacklist_index
+from clinical_output_gate import gate_clinical_output
+from table_io import write_table
+from tumor_informed_filter import tumor_informed_filter
+from variant_table import variant_frame
+
+STAGES = ["variants", "flagged", "clinical", "clinical_final", "tumor_informed"]
+
+
+def write_stage(df, path):
+    write_table(df.drop(columns=["variant_key"], errors="ignore"), path)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Fused per-sample variant post-processing.")
+    parser.add_argument("--vcf", required=True, help="Filtered Mutect2 VCF (filtered.final.vcf.gz)")
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--normal-sample", default="")
+    parser.add_argument("--varscan-tsv", default="")
+    parser.add_argument("--snpeff-tsv", default="")
+    add_common_arguments(parser)
+    parser.add_argument("--clinical-output-enabled", default="true")
+    parser.add_argument("--accepted-gates", default="PASS,REVIEW", help="Comma-separated gates")
+    parser.add_argument("--include-only-annotated", default="false")
+    parser.add_argument("--pbmc-enabled", default="false")
+    parser.add_argument("--pbmc-blacklist", default="")
+    parser.add_argument("--pbmc-fail-on-match", default="true")
+    parser.add_argument("--tumor-informed-enabled", default="false")
+    parser.add_argument("--known-dir", default="")
+    parser.add_argument("--require-known", default="true")
+    parser.add_argument("--fail-on-missing-known", default="true")
+    parser.add_argument("--out-variants", default="", help="variant_table output")
+    parser.add_argument("--out-flagged", default="", help="annotate_variant_flags output")
+    parser.add_argument("--out-clinical", default="", help="clinical_variant_output output")
+    parser.add_argument("--out-clinical-final", default="", help="apply_pbmc_blacklist output")
+    parser.add_argument("--out-tumor-informed", default="", help="tumor_informed_filter output")
+    args = parser.parse_args()
+
+    outputs = {
+        "variants": args.out_variants,
+        "flagged": args.out_flagged,
+        "clinical": args.out_clinical,
+        "clinical_final": args.out_clinical_final,
+        "tumor_informed": args.out_tumor_informed,
+    }
+    requested = [idx for idx, stage in enumerate(STAGES) if outputs[stage]]
+    if not requested:
+        raise ValueError("At least one --out-* table must be requested")
+    last_stage = max(requested)
+
+    def emit(stage, df):
+        if outputs[stage]:
+            write_stage(df, outputs[stage])
+        return STAGES.index(stage) < last_stage
+
+    df = variant_frame(args.vcf, args.sample)
+    if not emit("variants", df):
+        return
+
+    settings = settings_from_args(args)
+    contigs = settings["contigs"]
+    df = annotate_frame(
+        add_variant_columns(df, contigs),
+        args.sample,
+        shared_panels_from_args(args),
+        settings,
+        normal_sample=args.normal_sample,
+        varscan_tsv=args.varscan_tsv,
+        snpeff_tsv=args.snpeff_tsv,
+    )
+    if not emit("flagged", df):
+        return
+
+    accepted = {g.strip() for g in args.accepted_gates.split(",") if g.strip()}
+    df = gate_clinical_output(
+        df,
+        as_bool(args.clinical_output_enabled),
+        accepted,
+        as_bool(args.include_only_annotated),
+    )
+    if not emit("clinical", df):
+        return
+
+    pbmc_enabled = as_bool(args.pbmc_enabled)
+    blocked = None
+    if pbmc_enabled and not df.empty:
+        if not os.path.exists(args.pbmc_blacklist):
+            raise FileNotFoundError(f"PBMC blacklist missing: {args.pbmc_blacklist}")
+        blocked = load_blacklist_index(args.pbmc_blacklist, contigs)
+    df = apply_blacklist(df, blocked, pbmc_enabled, as_bool(args.pbmc_fail_on_match), contigs)
+    if not emit("clinical_final", df):
+        return
+
+    df = tumor_informed_filter(
+        df,
+        args.sample,
+        as_bool(args.tumor_informed_enabled),
+        args.known_dir,
+        as_bool(args.require_known),
+        as_bool(args.fail_on_missing_known),
+        contigs,
+    )
+    emit("tumor_informed", df)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,265 @@
+"""Per-sample QC metric parsers and the run-level SQLite metrics catalog.
+
+Each sample's flagstat, Picard-style duplication metrics, samtools stats,
+mosdepth summary and contamination table are parsed once into a flat
+record (extract_qc_metrics.py); build_metrics_catalog.py loads the records
+into one typed SQLite table that qc_gates, lod_by_bin and ctdna_report query
+instead of re-reading the files. Missing files or values are stored as NULL.
+"""
+
+import json
+import os
+import re
+import sqlite3
+
+import pandas as pd
+
+CATALOG_TABLE = "sample_metrics"
+
+# Column name -> SQLite type, in catalog order (after `sample`).
+METRIC_COLUMNS = {
+    "total_reads": "INTEGER",
+    "mapped_pct": "REAL",
+    "dup_fraction": "REAL",
+    "raw_total_sequences": "INTEGER",
+    "reads_mapped": "INTEGER",
+    "reads_duplicated": "INTEGER",
+    "error_rate": "REAL",
+    "average_length": "REAL",
+    "insert_size_average": "REAL",
+    "insert_size_std": "REAL",
+    "mean_coverage": "REAL",
+    "contamination": "REAL",
+    # 1/0 from the early (pre-BQSR) QC checkpoint; NULL when it did not run.
+    "early_qc_pass": "INTEGER",
+    # From fragmentomics.py (all fragments); NULL when it did not run.
+    "fragment_count": "INTEGER",
+    "median_fragment_length": "REAL",
+    "short_fragment_ratio": "REAL",
+}
+
+# samtools stats SN field -> catalog column.
+SAMTOOLS_SN_FIELDS = {
+    "raw total sequences": "raw_total_sequences",
+    "reads mapped": "reads_mapped",
+    "reads duplicated": "reads_duplicated",
+    "error rate": "error_rate",
+    "average length": "average_length",
+    "insert size average": "insert_size_average",
+    "insert size standard deviation": "insert_size_std",
+}
+
+MAPPED_PCT_PATTERN = re.compile(r"\(([\d.]+)%\s*:\s*N/A\)")
+
+
+def _has_content(path):
+    return bool(path) and os.path.exists(path) and os.path.getsize(path) > 0
+
+
+def parse_flagstat(path):
+    """{'total_reads', 'mapped_pct'} from `samtools flagstat` text output."""
+    record = {"total_reads": None, "mapped_pct": None}
+    if not _has_content(path):
+        return record
+    with open(path) as handle:
+        for line in handle:
+            if record["total_reads"] is None and " in total " in line:
+                record["total_reads"] = int(line.split()[0])
+            elif record["mapped_pct"] is None and " mapped (" in line:
+                match = MAPPED_PCT_PATTERN.search(line)
+                if match:
+                    record["mapped_pct"] = float(match.group(1))
+    return record
+
+
+def parse_dup_fraction(path):
+    """PERCENT_DUPLICATION (column 9) of the first library row of a metrics file."""
+    if not _has_content(path):
+        return None
+    with open(path) as handle:
+        for line in handle:
+            if line.startswith("#") or not line.strip():
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 9:
+                continue
+            if parts[0] == "LIBRARY":
+                continue
+            try:
+                return float(parts[8])
+            except ValueError:
+                return None
+    return None
+
+
+def parse_samtools_stats(path):
+    """Summary-number (SN) fields of `samtools stats` output."""
+    record = {column: None for column in SAMTOOLS_SN_FIELDS.values()}
+    if not _has_content(path):
+        return record
+    with open(path) as handle:
+        for line in handle:
+            if not line.startswith("SN\t"):
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 3:
+                continue
+            column = SAMTOOLS_SN_FIELDS.get(parts[1].rstrip(":"))
+            if column is None:
+                continue
+            kind = METRIC_COLUMNS[column]
+            try:
+                record[column] = int(parts[2]) if kind == "INTEGER" else float(parts[2])
+            except ValueError:
+                record[column] = None
+    return record
+
+
+def parse_mean_coverage(path):
+    """Mean depth from a mosdepth summary.
+
+    Uses the `total_region` row (panel territory, present when mosdepth ran
+    with --by), then `total`, then the first row for summaries without either.
+    """
+    if not _has_content(path):
+        return None
+    cov_df = pd.read_csv(path, sep="\t")
+    if cov_df.empty or "mean" not in cov_df.columns:
+        return None
+    chrom = cov_df.iloc[:, 0].astype(str)
+    for label in ("total_region", "total"):
+        match = cov_df.loc[chrom == label, "mean"]
+        if not match.empty:
+            return float(match.iloc[0])
+    return float(cov_df["mean"].iloc[0])
+
+
+def parse_contamination(path):
+    """Contamination estimate (second column, first row) of CalculateContamination output."""
+    if not _has_content(path):
+        return None
+    cont_df = pd.read_csv(path, sep="\t")
+    if cont_df.empty or cont_df.shape[1] < 2:
+        return None
+    try:
+        return float(cont_df.iloc[0, 1])
+    except ValueError:
+        return None
+
+
+def parse_early_qc(path):
+    """early_qc_pass (as 1/0) from an early_qc_gate.py JSON record."""
+    if not _has_content(path):
+        return None
+    with open(path) as handle:
+        return int(bool(json.load(handle)["early_qc_pass"]))
+
+
+def parse_fragments(path):
+    """Fragment count, median length and short-fragment ratio from a fragmentomics summary."""
+    record = {"fragment_count": None, "median_fragment_length": None, "short_fragment_ratio": None}
+    if not _has_content(path):
+        return record
+    with open(path) as handle:
+        summary = json.load(handle).get("all", {})
+    record["fragment_count"] = summary.get("fragments")
+    record["median_fragment_length"] = summary.get("median_length")
+    record["short_fragment_ratio"] = summary.get("short_fragment_ratio")
+    return record
+
+
+def sample_metrics(
+    sample,
+    flagstat="",
+    dup_metrics="",
+    samtools_stats="",
+    mosdepth="",
+    contamination="",
+    early_qc="",
+    fragments="",
+):
+    """One flat metrics record for a sample; absent inputs give None values."""
+    record = {"sample": sample}
+    record.update(parse_flagstat(flagstat))
+    record["dup_fraction"] = parse_dup_fraction(dup_metrics)
+    record.update(parse_samtools_stats(samtools_stats))
+    record["mean_coverage"] = parse_mean_coverage(mosdepth)
+    record["contamination"] = parse_contamination(contamination)
+    record["early_qc_pass"] = parse_early_qc(early_qc)
+    record.update(parse_fragments(fragments))
+    return {column: record.get(column) for column in ["sample"] + list(METRIC_COLUMNS)}
+
+
+def sample_metric_paths(results_dir, sample):
+    """Default per-sample QC file locations under a results directory."""
+    return {
+        "flagstat": os.path.join(results_dir, "qc", sample, f"{sample}.flagstat.txt"),
+        "dup_metrics": os.path.join(results_dir, "qc", sample, f"{sample}.dup_metrics.txt"),
+        "samtools_stats": os.path.join(results_dir, "qc", sample, f"{sample}.samtools.stats.txt"),
+        "mosdepth": os.path.join(results_dir, "coverage", sample, f"{sample}.mosdepth.summary.txt"),
+        "contamination": os.path.join(results_dir, "mutect2", f"{sample}.contamination.table"),
+        "early_qc": os.path.join(results_dir, "qc", sample, f"{sample}.early_qc.json"),
+        "fragments": os.path.join(results_dir, "fragmentomics", f"{sample}.fragments.json"),
+    }
+
+
+def write_catalog(path, records):
+    """Write records to a fresh SQLite catalog at path (replaced atomically)."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+    tmp_path = f"{path}.tmp"
+    if os.path.exists(tmp_path):
+        os.remove(tmp_path)
+    columns = ["sample"] + list(METRIC_COLUMNS)
+    schema = ", ".join(
+        ["sample TEXT PRIMARY KEY"] + [f"{name} {kind}" for name, kind in METRIC_COLUMNS.items()]
+    )
+    conn = sqlite3.connect(tmp_path)
+    try:
+        conn.execute(f"CREATE TABLE {CATALOG_TABLE} ({schema})")
+        conn.executemany(
+            f"INSERT INTO {CATALOG_TABLE} ({', '.join(columns)}) "
+            f"VALUES ({', '.join('?' for _ in columns)})",
+            [[record.get(column) for column in columns] for record in records],
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    os.replace(tmp_path, path)
+
+
+def read_catalog(path, samples=None, columns=None):
+    """{sample: record} from the catalog, optionally restricted to samples/columns.
+
+    Samples absent from the catalog map to all-None records.
+    """
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"Metrics catalog not found: {path}")
+    wanted = list(METRIC_COLUMNS) if columns is None else list(columns)
+    unknown = sorted(set(wanted) - set(METRIC_COLUMNS))
+    if unknown:
+        raise ValueError(f"Unknown catalog metric(s): {unknown}")
+    conn = sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    try:
+        rows = conn.execute(
+            f"SELECT sample, {', '.join(wanted)} FROM {CATALOG_TABLE} ORDER BY rowid"
+        ).fetchall()
+    finally:
+        conn.close()
+    catalog = {row[0]: dict(zip(wanted, row[1:])) for row in rows}
+    if samples is None:
+        return catalog
+    return {sample: catalog.get(sample, dict.fromkeys(wanted)) for sample in samples}
+
+
+def sample_records(samples, results_dir="", catalog=""):
+    """Metrics for samples, from the catalog when given, else parsed from results_dir."""
+    if catalog:
+        return read_catalog(catalog, samples)
+    if not results_dir:
+        raise ValueError("Either a metrics catalog or a results directory is required")
+    records = {}
+    for sample in samples:
+        record = sample_metrics(sample, **sample_metric_paths(results_dir, sample))
+        record.pop("sample")
+        records[sample] = record
+    return records
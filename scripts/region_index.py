@@ -0,0 +1,151 @@
+"""Interval index for gene/hotspot region annotation.
+
+Regions (BED, or TSV with CHROM/START/END/GENE) are flattened once per contig
+into sorted, disjoint segments, each labelled with the comma-joined names of
+every region covering it. Overlap queries are then two searchsorted calls per
+contig over all variants at once, independent of the number of regions.
+"""
+
+import gzip
+
+import numpy as np
+import pandas as pd
+
+REGION_COLUMNS = ["CHROM", "START", "END", "GENE"]
+
+
+def _is_bed(path):
+    return path.endswith(".bed") or path.endswith(".bed.gz")
+
+
+def _read_bed(path):
+    opener = gzip.open if path.endswith(".gz") else open
+    rows = []
+    with opener(path, "rt") as handle:
+        for line in handle:
+            if not line.strip() or line.startswith(("#", "track", "browser")):
+                continue
+            parts = line.rstrip("\n").split("\t")
+            if len(parts) < 4:
+                raise ValueError(f"Region BED needs chrom, start, end, name columns: {path}")
+            rows.append(parts[:4])
+    df = pd.DataFrame(rows, columns=REGION_COLUMNS)
+    df["START"] = pd.to_numeric(df["START"], errors="raise").astype(np.int64)
+    df["END"] = pd.to_numeric(df["END"], errors="raise").astype(np.int64)
+    return df
+
+
+def _read_tsv(path):
+    df = pd.read_csv(path, sep="\t", dtype={"CHROM": str, "GENE": str})
+    missing = set(REGION_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"Region TSV missing required columns {sorted(missing)}: {path}")
+    df = df[REGION_COLUMNS].copy()
+    # TSV regions are 1-based inclusive; store them half-open and 0-based like BED.
+    df["START"] = pd.to_numeric(df["START"], errors="raise").astype(np.int64) - 1
+    df["END"] = pd.to_numeric(df["END"], errors="raise").astype(np.int64)
+    return df
+
+
+def read_regions(path):
+    """Read regions as 0-based half-open CHROM/START/END/GENE rows."""
+    df = _read_bed(path) if _is_bed(path) else _read_tsv(path)
+    bad = (df["START"] < 0) | (df["END"] <= df["START"])
+    if bad.any():
+        first = df.loc[bad].iloc[0]
+        raise ValueError(
+            f"Invalid region {first['CHROM']}:{first['START']}-{first['END']} in {path}"
+        )
+    # Unnamed regions are labelled by their 1-based coordinates.
+    names = df["GENE"].fillna("").astype(str)
+    unnamed = names.str.strip() == ""
+    names[unnamed] = (
+        df.loc[unnamed, "CHROM"].astype(str)
+        + ":"
+        + (df.loc[unnamed, "START"] + 1).astype(str)
+        + "-"
+        + df.loc[unnamed, "END"].astype(str)
+    )
+    df["GENE"] = names
+    return df
+
+
+def _flatten_contig(starts, ends, names):
+    """Sweep one contig's regions into disjoint (start, end, label) segments."""
+    events = sorted(
+        [(int(pos), 1, name) for pos, name in zip(starts, names)]
+        + [(int(pos), -1, name) for pos, name in zip(ends, names)]
+    )
+    active = {}
+    segments = []
+    prev = None
+    for pos, delta, name in events:
+        if prev is not None and pos > prev and active:
+            label = ",".join(sorted(active))
+            if segments and segments[-1][1] == prev and segments[-1][2] == label:
+                segments[-1][1] = pos
+            else:
+                segments.append([prev, pos, label])
+        active[name] = active.get(name, 0) + delta
+        if active[name] == 0:
+            del active[name]
+        prev = pos
+    return segments
+
+
+def build_region_index(regions):
+    """Build {contig: (starts, ends, label_codes)} plus the label table."""
+    labels = []
+    label_codes = {}
+    contigs = {}
+    for chrom, group in regions.groupby("CHROM", sort=False):
+        segments = _flatten_contig(group["START"], group["END"], group["GENE"])
+        codes = []
+        for _start, _end, label in segments:
+            if label not in label_codes:
+                label_codes[label] = len(labels)
+                labels.append(label)
+            codes.append(label_codes[label])
+        contigs[str(chrom)] = (
+            np.array([seg[0] for seg in segments], dtype=np.int64),
+            np.array([seg[1] for seg in segments], dtype=np.int64),
+            np.array(codes, dtype=np.int32),
+        )
+    return {"contigs": contigs, "labels": np.array(labels, dtype=object)}
+
+
+def load_region_index(path):
+    return build_region_index(read_regions(path))
+
+
+def annotate_regions(index, chrom, pos, ref):
+    """Label each variant with the regions its REF span overlaps ("" if none).
+
+    The span is [POS-1, POS-1+len(REF)) in 0-based coordinates, so indels are
+    matched on every reference base they touch.
+    """
+    chrom = pd.Series(chrom, copy=False).astype(str).to_numpy()
+    start = pd.to_numeric(pd.Series(pos, copy=False), errors="coerce").fillna(0)
+    start = start.to_numpy(dtype=np.int64) - 1
+    ref_len = pd.Series(ref, copy=False).astype(str).str.len().clip(lower=1)
+    end = start + ref_len.to_numpy(dtype=np.int64)
+
+    out = np.full(len(chrom), "", dtype=object)
+    codes, uniques = pd.factorize(chrom)
+    for contig_code, contig in enumerate(uniques):
+        if contig not in index["contigs"]:
+            continue
+        seg_starts, seg_ends, seg_labels = index["contigs"][contig]
+        rows = np.flatnonzero(codes == contig_code)
+        lo = np.searchsorted(seg_ends, start[rows], side="right")
+        hi = np.searchsorted(seg_starts, end[rows], side="left")
+        hit = lo < hi
+        out[rows[hit]] = index["labels"][seg_labels[lo[hit]]]
+        # Spans crossing several segments (long indels) take the union of labels.
+        multi = hi - lo > 1
+        for row, first, last in zip(rows[multi], lo[multi], hi[multi]):
+            names = set()
+            for label in index["labels"][seg_labels[first:last]]:
+                names.update(label.split(","))
+            out[row] = ",".join(sorted(names))
+    return out
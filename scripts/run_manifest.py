@@ -1,5 +1,6 @@
 #!/usr/bin/env python3
 import argparse
+import csv
 import hashlib
 import json
 import subprocess
@@ -18,12 +19,26 @@ def git_sha():
         return "unknown"
 
 
+def benchmark_links(summary, regressions):
+    """Paths of the benchmark tables and the steps flagged as regressions."""
+    if not summary:
+        return None
+    flagged = []
+    if regressions:
+        with open(regressions, newline="") as handle:
+            rows = csv.DictReader(handle, delimiter="\t")
+            flagged = sorted({row["step"] for row in rows if row["status"] == "regression"})
+    return {"summary": summary, "regressions": regressions, "regressed_steps": flagged}
+
+
 def main():
     parser = argparse.ArgumentParser(description="Emit run manifest JSON.")
     parser.add_argument("--output", required=True)
     parser.add_argument("--called-samples", required=True)
     parser.add_argument("--all-samples", required=True)
     parser.add_argument("--config-json", required=True)
+    parser.add_argument("--benchmark-summary", default="")
+    parser.add_argument("--benchmark-regressions", default="")
     args = parser.parse_args()
 
     config_obj = json.loads(args.config_json)
@@ -36,6 +51,7 @@ def main():
         "called_samples": [s for s in args.called_samples.split(",") if s],
         "all_samples": [s for s in args.all_samples.split(",") if s],
         "config_sha256": config_sha256,
+        "benchmarks": benchmark_links(args.benchmark_summary, args.benchmark_regressions),
         "pipeline": {
             "name": "ctDNA_pipeline",
             "supports": {
@@ -46,6 +62,7 @@ def main():
                 "variant_support_gates": True,
                 "tumor_informed_filter": True,
                 "clinical_release_gate": True,
+                "benchmark_summary": True,
             },
         },
     }
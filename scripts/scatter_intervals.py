@@ -0,0 +1,137 @@
+#!/usr/bin/env python3
+"""Split the panel BED into contiguous Mutect2 (or BQSR) shards of balanced work.
+
+Targets are sorted by position within each contig (contigs in order of first
+appearance) and never split. Overlapping or abutting targets form one block,
+as GATK merges them from -L, and cuts fall only between blocks, so each shard
+is a run of whole blocks and every site is called in exactly one shard. A
+target's weight is its length (territory) or its length times the sample's
+mean depth from the mosdepth regions file (coverage, floored at 1x), which
+tracks the read count Mutect2 has to assemble. Cut points fall where the
+cumulative weight crosses k/N of the total, moved as needed so no shard is
+empty.
+
+With --whole-contigs (BQSR shards) cuts fall only between contigs, so a read
+overlaps the targets of one shard only and the shard BAMs can be merged
+without duplicates.
+"""
+
+import argparse
+import sys
+
+import numpy as np
+import pandas as pd
+
+from callable_territory import iter_coverage_chunks, read_targets
+
+BALANCE_MODES = ("territory", "coverage")
+
+
+def target_weights(targets, coverage_path="", chunk_rows=500000):
+    """Work estimate per target: length, or length x mean depth when coverage is given."""
+    lengths = (targets["END"] - targets["START"]).to_numpy(dtype=np.float64)
+    if not coverage_path:
+        return lengths
+    parts = []
+    for chunk in iter_coverage_chunks(coverage_path, chunk_rows):
+        parts.append(
+            pd.DataFrame(
+                {
+                    "CHROM": chunk[0].astype(str),
+                    "START": chunk[1].astype(np.int64),
+                    "END": chunk[2].astype(np.int64),
+                    "MEAN": pd.to_numeric(chunk.iloc[:, -1], errors="coerce"),
+                }
+            )
+        )
+    if not parts:
+        return lengths
+    means = pd.concat(parts, ignore_index=True).drop_duplicates(["CHROM", "START", "END"])
+    merged = targets[["CHROM", "START", "END"]].merge(means, on=["CHROM", "START", "END"], how="left")
+    depth = merged["MEAN"].fillna(1.0).clip(lower=1.0).to_numpy(dtype=np.float64)
+    return lengths * depth
+
+
+def balanced_cuts(weights, shards):
+    """Start index of each shard in a contiguous split of weights into balanced runs."""
+    n = len(weights)
+    if shards > n:
+        raise ValueError(f"Cannot split {n} target(s) into {shards} non-empty shards")
+    cumulative = np.cumsum(weights)
+    total = cumulative[-1]
+    quotas = total * np.arange(1, shards) / shards
+    # Shard k closes with the target whose cumulative weight reaches its quota.
+    ends = np.searchsorted(cumulative, quotas, side="left") + 1
+    cuts = [0]
+    for k, end in enumerate(ends, start=1):
+        # Leave at least one target for this shard and each one after it.
+        cuts.append(int(min(max(end, cuts[-1] + 1), n - (shards - k))))
+    return cuts
+
+
+def sort_targets(targets):
+    """Targets sorted by START within each contig, contigs in first-appearance order."""
+    rank = targets["CHROM"].map({chrom: idx for idx, chrom in enumerate(pd.unique(targets["CHROM"]))})
+    order = np.lexsort((targets["END"].to_numpy(), targets["START"].to_numpy(), rank.to_numpy()))
+    return targets.iloc[order].reset_index(drop=True)
+
+
+def block_starts(targets):
+    """Index of the first target of each block of overlapping or abutting targets (sorted input)."""
+    chroms = targets["CHROM"].to_numpy()
+    new_contig = np.r_[True, chroms[1:] != chroms[:-1]]
+    reach = targets.groupby(new_contig.cumsum())["END"].cummax().to_numpy()
+    gap = np.r_[True, targets["START"].to_numpy()[1:] > reach[:-1]]
+    return np.flatnonzero(new_contig | gap)
+
+
+def contig_starts(targets):
+    """Index of the first target of each contig (sorted input)."""
+    chroms = targets["CHROM"].to_numpy()
+    return np.flatnonzero(np.r_[True, chroms[1:] != chroms[:-1]])
+
+
+def grouped_cuts(weights, starts, shards, unit="block"):
+    """Balanced cuts (target indices) falling only at the given group starts."""
+    if shards > len(starts):
+        raise ValueError(f"Cannot split {len(starts)} {unit}(s) into {shards} non-empty shards")
+    group_weights = np.add.reduceat(weights, starts)
+    return [int(starts[cut]) for cut in balanced_cuts(group_weights, shards)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Split a panel BED into balanced Mutect2/BQSR shards.")
+    parser.add_argument("--bed", required=True, help="Panel BED")
+    parser.add_argument("--coverage", default="", help="mosdepth regions.bed.gz (coverage balance)")
+    parser.add_argument("--balance", choices=BALANCE_MODES, default="territory")
+    parser.add_argument(
+        "--whole-contigs", action="store_true", help="Cut only between contigs"
+    )
+    parser.add_argument("--out", nargs="+", required=True, help="One BED path per shard")
+    args = parser.parse_args()
+
+    if args.balance == "coverage" and not args.coverage:
+        raise ValueError("--balance coverage requires --coverage")
+    targets = read_targets(args.bed)
+    if targets.empty:
+        raise ValueError(f"No targets in panel BED: {args.bed}")
+    targets = sort_targets(targets)
+    weights = target_weights(targets, args.coverage if args.balance == "coverage" else "")
+    if args.whole_contigs:
+        cuts = grouped_cuts(weights, contig_starts(targets), len(args.out), "contig")
+    else:
+        cuts = grouped_cuts(weights, block_starts(targets), len(args.out))
+    cuts += [len(targets)]
+
+    for idx, path in enumerate(args.out):
+        shard = targets.iloc[cuts[idx]:cuts[idx + 1]]
+        columns = ["CHROM", "START", "END"] + (["GENE"] if (shard["GENE"] != "").any() else [])
+        shard[columns].to_csv(path, sep="\t", header=False, index=False)
+        print(
+            f"shard {idx}: {len(shard)} targets, weight {weights[cuts[idx]:cuts[idx + 1]].sum():.0f}",
+            file=sys.stderr,
+        )
+
+
+if __name__ == "__main__":
+    main()
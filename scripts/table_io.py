@@ -0,0 +1,81 @@
+"""Read and write per-sample variant tables as TSV or typed columnar files.
+
+The format follows the file extension: .parquet (Parquet) and .arrow (Arrow
+IPC/Feather v2) are columnar and need pyarrow; anything else is TSV.
+Columnar tables are written with CHROM/FILTER as categoricals and POS/DP/AF
+as numbers, so readers get typed columns back without re-inferring them.
+"""
+
+import os
+
+import numpy as np
+import pandas as pd
+from pandas.errors import EmptyDataError
+
+TABLE_FORMATS = {"tsv": ".tsv", "parquet": ".parquet", "arrow": ".arrow"}
+CATEGORICAL_COLUMNS = ["CHROM", "FILTER"]
+NUMERIC_COLUMNS = ["POS", "DP", "AF"]
+
+
+def table_extension(fmt):
+    if fmt not in TABLE_FORMATS:
+        raise ValueError(f"Unknown table format '{fmt}' (expected one of {sorted(TABLE_FORMATS)})")
+    return TABLE_FORMATS[fmt]
+
+
+def table_format(path):
+    ext = os.path.splitext(str(path))[1]
+    for fmt, fmt_ext in TABLE_FORMATS.items():
+        if ext == fmt_ext:
+            return fmt
+    return "tsv"
+
+
+def _numeric_or_text(values):
+    """Numeric column when every non-missing value parses ("." is missing)."""
+    try:
+        return pd.to_numeric(values.replace(".", np.nan))
+    except (ValueError, TypeError):
+        # e.g. comma-separated per-allele AF; keep it as text rather than drop it.
+        return values.where(values.isna(), values.astype(str))
+
+
+def typed_table(df):
+    """Copy of df with the typed columns used for columnar storage."""
+    df = df.copy()
+    for column in NUMERIC_COLUMNS:
+        if column in df.columns and not pd.api.types.is_numeric_dtype(df[column]):
+            df[column] = _numeric_or_text(df[column])
+    for column in CATEGORICAL_COLUMNS:
+        if column in df.columns:
+            df[column] = df[column].astype(str).astype("category")
+    return df
+
+
+def read_table(path):
+    """Read a variant table; an empty TSV gives an empty DataFrame."""
+    fmt = table_format(path)
+    if fmt == "parquet":
+        return pd.read_parquet(path)
+    if fmt == "arrow":
+        return pd.read_feather(path)
+    try:
+        return pd.read_csv(path, sep="\t")
+    except EmptyDataError:
+        return pd.DataFrame()
+
+
+def write_table(df, path):
+    """Write df in the format implied by path, without the index."""
+    out_dir = os.path.dirname(str(path))
+    if out_dir:
+        os.makedirs(out_dir, exist_ok=True)
+    fmt = table_format(path)
+    if fmt == "tsv":
+        df.to_csv(path, sep="\t", index=False)
+        return
+    df = typed_table(df).reset_index(drop=True)
+    if fmt == "parquet":
+        df.to_parquet(path, index=False)
+    else:
+        df.to_feather(path)
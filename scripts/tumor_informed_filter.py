@@ -2,35 +2,51 @@
 import argparse
 import os
 
-import pandas as pd
-from pandas.errors import EmptyDataError
+from table_io import read_table, write_table
+from variant_keys import empty_index, frame_index, frame_keys, frame_labels, isin, load_contig_table
 
 
 def as_bool(value):
     return str(value).strip().lower() in {"1", "true", "yes", "y"}
 
 
-def load_tsv(path):
-    try:
-        return pd.read_csv(path, sep="\t")
-    except EmptyDataError:
-        return pd.DataFrame()
-
-
-def variant_ids(df):
-    required = {"CHROM", "POS", "REF", "ALT"}
-    missing = required - set(df.columns)
-    if missing:
-        raise ValueError(f"Missing required columns {sorted(missing)}")
-    return set(
-        df["CHROM"].astype(str)
-        + ":"
-        + df["POS"].astype(str)
-        + ":"
-        + df["REF"].astype(str)
-        + ":"
-        + df["ALT"].astype(str)
-    )
+def load_known_index(known_dir, sample, fail_on_missing_known, contigs=None):
+    """(keys, labels) index of <known_dir>/<sample>.tsv, or None if it is missing."""
+    known_path = os.path.join(known_dir, f"{sample}.tsv")
+    if not os.path.exists(known_path):
+        if fail_on_missing_known:
+            raise FileNotFoundError(
+                f"Tumor-informed mode enabled but known-variant file missing: {known_path}"
+            )
+        return None
+
+    known_df = read_table(known_path)
+    if known_df.empty:
+        return empty_index()
+    return frame_index(known_df, "Known-variant table", contigs)[:2]
+
+
+def tumor_informed_filter(
+    df, sample, enabled, known_dir, require_known, fail_on_missing_known, contigs=None
+):
+    if df.empty:
+        return df
+
+    if not enabled:
+        df["tumor_informed_match"] = False
+        return df
+
+    known_index = load_known_index(known_dir, sample, fail_on_missing_known, contigs)
+    if known_index is None:
+        df["tumor_informed_match"] = False
+        return df
+
+    keys = frame_keys(df, contigs=contigs)
+    df["tumor_informed_match"] = isin(keys, *known_index, labels=frame_labels(df, keys))
+
+    if require_known:
+        df = df[df["tumor_informed_match"]].copy()
+    return df
 
 
 def main():
@@ -43,55 +59,20 @@ def main():
     parser.add_argument("--known-dir", default="")
     parser.add_argument("--require-known", required=True)
     parser.add_argument("--fail-on-missing-known", required=True)
+    parser.add_argument("--contigs", default="", help="Reference .fai or .dict (contig numbering)")
     parser.add_argument("--out", required=True)
     args = parser.parse_args()
 
-    enabled = as_bool(args.enabled)
-    require_known = as_bool(args.require_known)
-    fail_on_missing_known = as_bool(args.fail_on_missing_known)
-
-    df = load_tsv(args.input)
-    if df.empty:
-        df.to_csv(args.out, sep="\t", index=False)
-        return
-
-    if not enabled:
-        df["tumor_informed_match"] = False
-        df.to_csv(args.out, sep="\t", index=False)
-        return
-
-    known_path = os.path.join(args.known_dir, f"{args.sample}.tsv")
-    if not os.path.exists(known_path):
-        if fail_on_missing_known:
-            raise FileNotFoundError(
-                f"Tumor-informed mode enabled but known-variant file missing: {known_path}"
-            )
-        df["tumor_informed_match"] = False
-        df.to_csv(args.out, sep="\t", index=False)
-        return
-
-    known_df = load_tsv(known_path)
-    if known_df.empty:
-        known_set = set()
-    else:
-        known_set = variant_ids(known_df)
-
-    # Recompute row-wise IDs for filtering.
-    row_ids = (
-        df["CHROM"].astype(str)
-        + ":"
-        + df["POS"].astype(str)
-        + ":"
-        + df["REF"].astype(str)
-        + ":"
-        + df["ALT"].astype(str)
+    df = tumor_informed_filter(
+        read_table(args.input),
+        args.sample,
+        as_bool(args.enabled),
+        args.known_dir,
+        as_bool(args.require_known),
+        as_bool(args.fail_on_missing_known),
+        load_contig_table(args.contigs),
     )
-    df["tumor_informed_match"] = row_ids.isin(known_set)
-
-    if require_known:
-        df = df[df["tumor_informed_match"]].copy()
-
-    df.to_csv(args.out, sep="\t", index=False)
+    write_table(df, args.out)
 
 
 if __name__ == "__main__":
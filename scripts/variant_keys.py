@@ -0,0 +1,311 @@
+"""Packed integer variant keys shared by the variant post-processing scripts.
+
+Each (CHROM, POS, REF, ALT) is packed into a single uint64:
+
+    bits 63-52  contig code   (12 bits)
+    bits 51-23  position      (29 bits, POS < 536,870,912)
+    bits 22-0   allele code   (23 bits)
+
+Contig codes come from a contig table: the primary assembly names (with and
+without the "chr" prefix) have fixed codes and the other contigs of the
+reference sequence dictionary (.fai or .dict) are numbered in dictionary
+order. Keys are only comparable when built from the same dictionary, so
+persisted keys record its contig_digest. Contigs missing from the table, or
+beyond the 12-bit code space, share FOREIGN_CONTIG.
+
+SNV alleles are encoded exactly; any other REF/ALT pair is hashed. Keys with
+a hashed allele or the foreign contig code are not exact, so they carry a
+label (CHROM, REF and ALT joined by tabs): build_index keeps differently
+labelled variants that share a key apart, and lookup confirms every such hit
+against the query's label. Labels are only built for the rows that need
+them (is_inexact), so SNV joins stay free of per-row Python strings.
+
+Key sets are held as sorted uint64 arrays and queried with searchsorted.
+"""
+
+import hashlib
+
+import numpy as np
+import pandas as pd
+
+KEY_COLUMNS = ["CHROM", "POS", "REF", "ALT"]
+
+CONTIG_BITS = 12
+POS_BITS = 29
+ALLELE_BITS = 23
+MAX_POS = (1 << POS_BITS) - 1
+FOREIGN_CONTIG = (1 << CONTIG_BITS) - 1
+
+_PRIMARY_CONTIGS = [str(i) for i in range(1, 23)] + ["X", "Y", "M", "MT"]
+_FIXED_CONTIGS = {}
+for _idx, _name in enumerate(_PRIMARY_CONTIGS, start=1):
+    _FIXED_CONTIGS[_name] = _idx
+    _FIXED_CONTIGS[f"chr{_name}"] = 32 + _idx
+_FIRST_DICTIONARY_CONTIG = 64
+
+_BASES = {"A": 0, "C": 1, "G": 2, "T": 3, "N": 4}
+_N_SNV_CODES = len(_BASES) * len(_BASES)
+_HASH_MIX = np.uint64(0x9E3779B97F4A7C15)
+_CONTIG_SHIFT = np.uint64(POS_BITS + ALLELE_BITS)
+_ALLELE_MASK = np.uint64((1 << ALLELE_BITS) - 1)
+
+
+def read_contig_names(path):
+    """Contig names in order from a .fai, a sequence .dict or a one-per-line list."""
+    names = []
+    with open(path) as handle:
+        for line in handle:
+            if line.startswith("@"):
+                if line.startswith("@SQ"):
+                    names.extend(
+                        field[3:]
+                        for field in line.rstrip("\n").split("\t")[1:]
+                        if field.startswith("SN:")
+                    )
+            elif line.strip():
+                names.append(line.split("\t", 1)[0].strip())
+    return names
+
+
+def contig_table(names=()):
+    """{contig: code} with the fixed primary codes, then names in dictionary order."""
+    table = dict(_FIXED_CONTIGS)
+    code = _FIRST_DICTIONARY_CONTIG
+    for name in names:
+        name = str(name)
+        if name in table:
+            continue
+        if code >= FOREIGN_CONTIG:
+            # Past the code space: these contigs share FOREIGN_CONTIG.
+            break
+        table[name] = code
+        code += 1
+    return table
+
+
+def load_contig_table(path=""):
+    """Contig table of a reference dictionary; primary names only without one."""
+    return contig_table(read_contig_names(path) if path else ())
+
+
+def contig_digest(contigs=None):
+    """Fingerprint of a contig table, stored with persisted keys."""
+    table = contigs if contigs is not None else _FIXED_CONTIGS
+    digest = hashlib.blake2b(digest_size=8)
+    for name, code in sorted(table.items(), key=lambda item: (item[1], item[0])):
+        digest.update(f"{name}\t{code}\n".encode("utf-8"))
+    return digest.hexdigest()
+
+
+def contig_code(name, contigs=None):
+    table = contigs if contigs is not None else _FIXED_CONTIGS
+    return table.get(str(name), FOREIGN_CONTIG)
+
+
+def _factorized(values):
+    codes, uniques = pd.factorize(pd.Series(values, copy=False).astype(str))
+    return codes, np.asarray(uniques, dtype=object)
+
+
+def _contig_codes(chrom, contigs):
+    codes, uniques = _factorized(chrom)
+    lut = np.array([contig_code(name, contigs) for name in uniques], dtype=np.uint64)
+    return lut[codes] if len(lut) else np.zeros(len(codes), dtype=np.uint64)
+
+
+def _allele_parts(values):
+    codes, uniques = _factorized(values)
+    hashes = pd.util.hash_array(uniques) if len(uniques) else np.zeros(0, dtype=np.uint64)
+    bases = np.array([_BASES.get(allele, -1) for allele in uniques], dtype=np.int64)
+    return hashes[codes], bases[codes]
+
+
+def _allele_codes(ref, alt):
+    ref_hash, ref_base = _allele_parts(ref)
+    alt_hash, alt_base = _allele_parts(alt)
+    hashed = (ref_hash * _HASH_MIX) ^ alt_hash
+    span = np.uint64((1 << ALLELE_BITS) - _N_SNV_CODES)
+    hashed = np.uint64(_N_SNV_CODES) + hashed % span
+    snv = (ref_base >= 0) & (alt_base >= 0)
+    exact = (ref_base * len(_BASES) + alt_base).astype(np.uint64)
+    return np.where(snv, exact, hashed)
+
+
+def pack_keys(chrom, pos, ref, alt, contigs=None):
+    """Pack CHROM/POS/REF/ALT sequences into a uint64 key array."""
+    positions = np.asarray(pd.to_numeric(pd.Series(pos, copy=False)), dtype=np.int64)
+    if positions.size and (positions.min() < 0 or positions.max() > MAX_POS):
+        raise ValueError(f"POS outside packable range [0, {MAX_POS}]")
+    contig_codes = _contig_codes(chrom, contigs)
+    alleles = _allele_codes(ref, alt)
+    return (
+        (contig_codes << _CONTIG_SHIFT)
+        | (positions.astype(np.uint64) << np.uint64(ALLELE_BITS))
+        | alleles
+    )
+
+
+def is_inexact(keys):
+    """Keys with a hashed allele or the foreign contig code, which need a label."""
+    keys = np.asarray(keys, dtype=np.uint64)
+    return ((keys >> _CONTIG_SHIFT) == np.uint64(FOREIGN_CONTIG)) | (
+        (keys & _ALLELE_MASK) >= np.uint64(_N_SNV_CODES)
+    )
+
+
+def key_labels(keys, chrom, ref, alt):
+    """CHROM/REF/ALT label of each inexact key; "" for exact keys."""
+    labels = np.full(len(keys), "", dtype=object)
+    rows = np.flatnonzero(is_inexact(keys))
+    if rows.size:
+        chrom, ref, alt = (
+            pd.Series(values, copy=False).astype(str).to_numpy(dtype=object)[rows]
+            for values in (chrom, ref, alt)
+        )
+        labels[rows] = chrom + "\t" + ref + "\t" + alt
+    return labels
+
+
+def require_key_columns(df, what="Variant table"):
+    missing = set(KEY_COLUMNS) - set(df.columns)
+    if missing:
+        raise ValueError(f"{what} missing required columns {sorted(missing)}")
+
+
+def variant_keys(df, what="Variant table", contigs=None):
+    """Packed keys for the CHROM/POS/REF/ALT columns of a DataFrame."""
+    require_key_columns(df, what)
+    return pack_keys(df["CHROM"], df["POS"], df["REF"], df["ALT"], contigs)
+
+
+def frame_keys(df, what="Variant table", contigs=None):
+    """Packed keys of df, reusing a precomputed variant_key column if present."""
+    if "variant_key" in df.columns:
+        return df["variant_key"].to_numpy(dtype=np.uint64)
+    return variant_keys(df, what, contigs)
+
+
+def frame_labels(df, keys):
+    """key_labels for the CHROM/REF/ALT columns of a DataFrame."""
+    return key_labels(keys, df["CHROM"], df["REF"], df["ALT"])
+
+
+def frame_index(df, what="Variant table", contigs=None, keep="last"):
+    """(index_keys, index_labels, rows) of a variant table; see build_index."""
+    keys = variant_keys(df, what, contigs)
+    labels = frame_labels(df, keys)
+    index_keys, rows = build_index(keys, keep=keep, labels=labels)
+    return index_keys, labels[rows], rows
+
+
+def empty_index():
+    return np.zeros(0, dtype=np.uint64), np.zeros(0, dtype=object)
+
+
+def format_variant_ids(df):
+    """Human-readable CHROM:POS:REF:ALT identifiers for output tables."""
+    return (
+        df["CHROM"].astype(str)
+        + ":"
+        + df["POS"].astype(str)
+        + ":"
+        + df["REF"].astype(str)
+        + ":"
+        + df["ALT"].astype(str)
+    )
+
+
+def _ordered_codes(labels):
+    """Integer codes of labels that sort like the label strings."""
+    codes, uniques = pd.factorize(pd.Series(labels, copy=False, dtype=object))
+    rank = np.empty(len(uniques), dtype=np.int64)
+    rank[np.argsort(np.asarray(uniques, dtype=str), kind="stable")] = np.arange(len(uniques))
+    return rank[codes]
+
+
+def variant_groups(keys, labels=None):
+    """(group, first_rows): a group id per row, numbered in (key, label) order,
+    and the first row of each group.
+
+    Rows share a group when their keys match and, for inexact keys, their
+    labels match too.
+    """
+    keys = np.asarray(keys, dtype=np.uint64)
+    codes = np.zeros(len(keys), dtype=np.int64) if labels is None else _ordered_codes(labels)
+    order = np.lexsort((codes, keys))
+    ordered_keys = keys[order]
+    ordered_codes = codes[order]
+    starts = np.ones(len(order), dtype=bool)
+    starts[1:] = (ordered_keys[1:] != ordered_keys[:-1]) | (ordered_codes[1:] != ordered_codes[:-1])
+    group = np.empty(len(order), dtype=np.int64)
+    group[order] = np.cumsum(starts) - 1
+    return group, order[starts]
+
+
+def build_index(keys, keep="last", labels=None):
+    """Sort keys into an index of distinct variants.
+
+    Returns (index_keys, rows) where rows[i] is the source row kept for
+    index_keys[i]. keep="last" mirrors dict-building semantics where later
+    rows overwrite earlier ones. With labels, inexact keys that collide stay
+    separate entries (index_keys then repeats the key), ordered by label.
+    """
+    keys = np.asarray(keys, dtype=np.uint64)
+    codes = np.zeros(len(keys), dtype=np.int64) if labels is None else _ordered_codes(labels)
+    order = np.lexsort((codes, keys))
+    ordered = keys[order]
+    same = (ordered[1:] == ordered[:-1]) & (codes[order][1:] == codes[order][:-1])
+    boundary = np.ones(len(ordered), dtype=bool)
+    if keep == "last":
+        boundary[:-1] = ~same
+    elif keep == "first":
+        boundary[1:] = ~same
+    else:
+        raise ValueError(f"keep must be 'first' or 'last', got {keep!r}")
+    return ordered[boundary], order[boundary]
+
+
+def _labels_at(labels, positions):
+    if callable(labels):
+        return np.asarray(labels(positions), dtype=object)
+    return np.asarray(labels, dtype=object)[positions]
+
+
+def lookup(keys, index_keys, index_labels=None, labels=None):
+    """Row position of each key in a sorted index, or -1 if absent.
+
+    Hits on inexact keys are confirmed by comparing labels. labels (aligned
+    with keys) and index_labels (aligned with index_keys) are arrays or
+    callables returning the labels at given positions.
+    """
+    keys = np.asarray(keys, dtype=np.uint64)
+    index_keys = np.asarray(index_keys, dtype=np.uint64)
+    if index_keys.size == 0:
+        return np.full(len(keys), -1, dtype=np.int64)
+    pos = np.searchsorted(index_keys, keys)
+    pos = np.minimum(pos, index_keys.size - 1)
+    hit = index_keys[pos] == keys
+    found = np.where(hit, pos, -1).astype(np.int64)
+
+    check = np.flatnonzero(hit & is_inexact(keys))
+    if check.size == 0:
+        return found
+    if labels is None or index_labels is None:
+        raise ValueError("Inexact variant keys need labels on both sides of a lookup")
+    query = _labels_at(labels, check)
+    first = pos[check]
+    matched = _labels_at(index_labels, first) == query
+    found[check] = np.where(matched, first, -1)
+    # Distinct variants sharing a key sit side by side in the index.
+    last = np.searchsorted(index_keys, keys[check], side="right")
+    for idx in np.flatnonzero(~matched & (last - first > 1)):
+        run = np.arange(first[idx] + 1, last[idx])
+        same = np.flatnonzero(_labels_at(index_labels, run) == query[idx])
+        if same.size:
+            found[check[idx]] = run[same[0]]
+    return found
+
+
+def isin(keys, index_keys, index_labels=None, labels=None):
+    """Vectorized membership test against a sorted key index."""
+    return lookup(keys, index_keys, index_labels, labels) >= 0
@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""Per-sample variant table from a filtered Mutect2 VCF.
+
+CHROM/POS/REF/ALT/QUAL/FILTER plus the sample's FORMAT DP and AF, and
+ALT_COUNT taken from FORMAT/AD. AF and ALT_COUNT refer to the first ALT
+allele, matching the AD[0:1] used by hard_filter_mutect.
+"""
+
+import argparse
+
+import numpy as np
+import pandas as pd
+
+from table_io import write_table
+from vcf_reader import read_vcf_arrays
+
+
+def first_allele(values, column=0):
+    """Column of a per-allele (2-D) array, NaN where the record has none."""
+    if values.shape[1] > column:
+        return values[:, column]
+    return np.full(len(values), np.nan)
+
+
+def variant_frame(vcf_path, sample):
+    arrays = read_vcf_arrays(vcf_path, sample, format_fields=("DP", "AF", "AD"))
+    return pd.DataFrame(
+        {
+            "CHROM": arrays["CHROM"],
+            "POS": arrays["POS"],
+            "REF": arrays["REF"],
+            "ALT": arrays["ALT"],
+            "QUAL": arrays["QUAL"],
+            "FILTER": arrays["FILTER"],
+            "DP": pd.array(arrays["FORMAT/DP"], dtype="Int64"),
+            "AF": first_allele(arrays["FORMAT/AF"]),
+            "ALT_COUNT": pd.array(first_allele(arrays["FORMAT/AD"], 1), dtype="Int64"),
+        }
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Extract the per-sample variant table.")
+    parser.add_argument("--vcf", required=True, help="Filtered Mutect2 VCF (filtered.final.vcf.gz)")
+    parser.add_argument("--sample", required=True)
+    parser.add_argument("--out", required=True, help="Output table (.tsv, .parquet or .arrow)")
+    args = parser.parse_args()
+
+    write_table(variant_frame(args.vcf, args.sample), args.out)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+"""In-process readers for plain, gzipped and bgzipped (tabix-indexed) VCFs.
+
+BGZF files are decoded block by block with zlib, so a .tbi index can be used
+to start at a contig or to fetch just the records overlapping a region.
+read_vcf_arrays() returns one sample's records as columnar NumPy arrays
+(CHROM/POS/REF/ALT/QUAL/FILTER plus selected INFO and FORMAT fields, with
+per-allele fields such as AD kept as 2-D arrays), which lets the
+post-filter and table scripts work without bcftools.
+"""
+
+import gzip
+import os
+import re
+import struct
+import zlib
+
+import numpy as np
+import pandas as pd
+
+TABIX_MAGIC = b"TBI\x01"
+# samtools/htslib store index metadata in this pseudo-bin; it holds no records.
+TABIX_META_BIN = 37450
+TABIX_MIN_SHIFT = 14
+BGZF_MAGIC = b"\x1f\x8b\x08\x04"
+# Records at or beyond this position are not addressable by the tabix binning scheme.
+MAX_REGION_END = 1 << 29
+
+# Used when a VCF header does not declare a field (VCF 4.x reserved keys).
+RESERVED_FIELDS = {
+    "INFO": {
+        "AC": ("A", "Integer"),
+        "AF": ("A", "Float"),
+        "AN": ("1", "Integer"),
+        "DP": ("1", "Integer"),
+    },
+    "FORMAT": {
+        "AD": ("R", "Integer"),
+        "AF": ("A", "Float"),
+        "DP": ("1", "Integer"),
+        "GQ": ("1", "Integer"),
+        "GT": ("1", "String"),
+    },
+}
+_HEADER_FIELD = re.compile(r"^##(INFO|FORMAT)=<ID=([^,>]+),Number=([^,>]+),Type=([^,>]+)")
+
+
+def open_vcf(path):
+    if path.endswith(".gz"):
+        return gzip.open(path, "rt")
+    return open(path, "r")
+
+
+def tabix_index_path(vcf_path):
+    path = f"{vcf_path}.tbi"
+    return path if os.path.exists(path) else ""
+
+
+def is_bgzf(path):
+    with open(path, "rb") as handle:
+        header = handle.read(16)
+    return header[:4] == BGZF_MAGIC and header[12:14] == b"BC"
+
+
+def iter_bgzf_blocks(handle):
+    """Yield (block_offset, decompressed_bytes) for each BGZF block from handle's position."""
+    while True:
+        block_offset = handle.tell()
+        header = handle.read(12)
+        if not header:
+            return
+        if len(header) < 12 or header[:4] != BGZF_MAGIC:
+            raise ValueError(f"Not a BGZF block at offset {block_offset}")
+        xlen = struct.unpack_from("<H", header, 10)[0]
+        extra = handle.read(xlen)
+        bsize = None
+        pos = 0
+        while pos + 4 <= len(extra):
+            slen = struct.unpack_from("<H", extra, pos + 2)[0]
+            if extra[pos:pos + 2] == b"BC" and slen == 2:
+                bsize = struct.unpack_from("<H", extra, pos + 4)[0]
+            pos += 4 + slen
+        if bsize is None:
+            raise ValueError(f"BGZF block without BC subfield at offset {block_offset}")
+        compressed = handle.read(bsize - xlen - 19)
+        handle.read(8)  # CRC32 and ISIZE
+        yield block_offset, zlib.decompress(compressed, -15)
+
+
+def _split_lines(chunks):
+    """Text lines from an iterable of byte chunks that may split lines."""
+    pending = b""
+    for data in chunks:
+        pending += data
+        lines = pending.split(b"\n")
+        pending = lines.pop()
+        for line in lines:
+            yield line.decode("utf-8") + "\n"
+    if pending:
+        yield pending.decode("utf-8")
+
+
+def iter_vcf_lines(path):
+    """All lines of a VCF; BGZF input is decoded block-wise."""
+    if path.endswith(".gz") and is_bgzf(path):
+        with open(path, "rb") as raw:
+            yield from _split_lines(data for _offset, data in iter_bgzf_blocks(raw))
+        return
+    with open_vcf(path) as handle:
+        yield from handle
+
+
+def _iter_virtual_range(raw, begin, end=None):
+    """Decompressed bytes between two BGZF virtual offsets (end=None: to EOF)."""
+    raw.seek(begin >> 16)
+    skip = begin & 0xFFFF
+    for block_offset, data in iter_bgzf_blocks(raw):
+        if end is not None:
+            if block_offset > end >> 16:
+                return
+            if block_offset == end >> 16:
+                data = data[: end & 0xFFFF]
+        yield data[skip:]
+        skip = 0
+        if end is not None and block_offset == end >> 16:
+            return
+
+
+def read_tabix_index(tbi_path):
+    """Parse a .tbi into {"names": [...], "bins": [{bin: [(beg, end)]}], "linear": [[...]]}."""
+    with gzip.open(tbi_path, "rb") as handle:
+        data = handle.read()
+    if data[:4] != TABIX_MAGIC:
+        raise ValueError(f"Not a tabix index: {tbi_path}")
+
+    n_ref = struct.unpack_from("<i", data, 4)[0]
+    l_nm = struct.unpack_from("<i", data, 32)[0]
+    names = [name.decode("utf-8") for name in data[36:36 + l_nm].split(b"\x00") if name]
+    if len(names) != n_ref:
+        raise ValueError(f"Tabix index names do not match n_ref: {tbi_path}")
+
+    offset = 36 + l_nm
+    bins, linear = [], []
+    for _name in names:
+        n_bin = struct.unpack_from("<i", data, offset)[0]
+        offset += 4
+        contig_bins = {}
+        for _ in range(n_bin):
+            bin_id, n_chunk = struct.unpack_from("<Ii", data, offset)
+            offset += 8
+            chunks = struct.unpack_from(f"<{2 * n_chunk}Q", data, offset)
+            offset += 16 * n_chunk
+            if bin_id != TABIX_META_BIN:
+                contig_bins[bin_id] = list(zip(chunks[0::2], chunks[1::2]))
+        n_intv = struct.unpack_from("<i", data, offset)[0]
+        offset += 4
+        linear.append(list(struct.unpack_from(f"<{n_intv}Q", data, offset)))
+        offset += 8 * n_intv
+        bins.append(contig_bins)
+    return {"names": names, "bins": bins, "linear": linear}
+
+
+def read_tabix_offsets(tbi_path):
+    """Return [(contig, virtual_offset)] in index order.
+
+    The offset is the smallest chunk start across the contig's bins, i.e.
+    where its first record begins. Contigs without records are skipped.
+    """
+    index = read_tabix_index(tbi_path)
+    contigs = []
+    for name, contig_bins in zip(index["names"], index["bins"]):
+        starts = [beg for chunks in contig_bins.values() for beg, _end in chunks]
+        if starts:
+            contigs.append((name, min(starts)))
+    return contigs
+
+
+def iter_contig_lines(vcf_path, contig, virtual_offset):
+    """Yield the raw record lines of one contig, starting at its offset.
+
+    Records of a tabix-indexed VCF are grouped by contig, so reading stops at
+    the first line from a different contig.
+    """
+    prefix = f"{contig}\t"
+    with open(vcf_path, "rb") as raw:
+        for text in _split_lines(_iter_virtual_range(raw, virtual_offset)):
+            if text.startswith("#"):
+                continue
+            if not text.startswith(prefix):
+                break
+            yield text
+
+
+def _region_bins(beg, end):
+    """Tabix/UCSC bins that may hold records overlapping 0-based [beg, end)."""
+    end -= 1
+    bins = [0]
+    for shift, first in ((26, 1), (23, 9), (20, 73), (17, 585), (14, 4681)):
+        bins.extend(range(first + (beg >> shift), first + (end >> shift) + 1))
+    return bins
+
+
+def parse_region(region):
+    """'chr1', 'chr1:100' or 'chr1:100-200' (1-based, inclusive) -> (contig, beg0, end0)."""
+    contig, _, span = region.partition(":")
+    if not span:
+        return contig, 0, MAX_REGION_END
+    start, _, stop = span.replace(",", "").partition("-")
+    beg = int(start) - 1
+    end = int(stop) if stop else MAX_REGION_END
+    if beg < 0 or end <= beg:
+        raise ValueError(f"Invalid region: {region}")
+    return contig, beg, end
+
+
+def iter_region_lines(vcf_path, region, tbi_path=""):
+    """Record lines overlapping region, fetched through the tabix index."""
+    tbi_path = tbi_path or tabix_index_path(vcf_path)
+    if not tbi_path:
+        raise FileNotFoundError(f"Region query needs a tabix index: {vcf_path}.tbi")
+    contig, beg, end = parse_region(region)
+    index = read_tabix_index(tbi_path)
+    if contig not in index["names"]:
+        return
+    tid = index["names"].index(contig)
+    linear = index["linear"][tid]
+    min_offset = linear[min(beg >> TABIX_MIN_SHIFT, len(linear) - 1)] if linear else 0
+
+    chunks = sorted(
+        (chunk_beg, chunk_end)
+        for bin_id in _region_bins(beg, end)
+        for chunk_beg, chunk_end in index["bins"][tid].get(bin_id, [])
+        if chunk_end > min_offset
+    )
+    merged = []
+    for chunk_beg, chunk_end in chunks:
+        if merged and chunk_beg <= merged[-1][1]:
+            merged[-1][1] = max(merged[-1][1], chunk_end)
+        else:
+            merged.append([chunk_beg, chunk_end])
+
+    prefix = f"{contig}\t"
+    with open(vcf_path, "rb") as raw:
+        for chunk_beg, chunk_end in merged:
+            for text in _split_lines(_iter_virtual_range(raw, chunk_beg, chunk_end)):
+                if not text.startswith(prefix):
+                    continue
+                parts = text.split("\t", 5)
+                rec_beg = int(parts[1]) - 1
+                if rec_beg < end and rec_beg + max(len(parts[3]), 1) > beg:
+                    yield text
+
+
+def read_vcf_header(path):
+    """Header lines (## meta lines and the #CHROM line) of a VCF."""
+    header = []
+    for line in iter_vcf_lines(path):
+        if not line.startswith("#"):
+            break
+        header.append(line)
+        if line.startswith("#CHROM"):
+            break
+    return header
+
+
+def header_field_types(header):
+    """{("INFO"|"FORMAT", ID): (Number, Type)} declared in the header."""
+    types = {}
+    for line in header:
+        match = _HEADER_FIELD.match(line)
+        if match:
+            types[(match.group(1), match.group(2))] = (match.group(3), match.group(4))
+    return types
+
+
+def _field_type(types, section, name):
+    return types.get((section, name)) or RESERVED_FIELDS[section].get(name, ("1", "String"))
+
+
+def _field_array(values, number, kind):
+    """Convert raw per-record field text into a typed array.
+
+    Integer/Float fields become float64 with NaN for missing values; fields
+    with Number other than 1 (e.g. AD with Number=R) become 2-D arrays
+    padded with NaN. Flags become bool, anything else stays text.
+    """
+    if kind == "Flag":
+        return np.array([value is not None for value in values], dtype=bool)
+    if kind not in {"Integer", "Float"}:
+        return np.array(["." if value is None else value for value in values], dtype=object)
+    if number == "1":
+        numbers = pd.to_numeric(pd.Series(values, dtype=object), errors="coerce")
+        return numbers.to_numpy(dtype=np.float64)
+
+    split = [[] if value is None else value.split(",") for value in values]
+    width = int(number) if number.isdigit() else max((len(parts) for parts in split), default=0)
+    out = np.full((len(values), width), np.nan, dtype=np.float64)
+    lengths = np.array([min(len(parts), width) for parts in split], dtype=np.int64)
+    flat = [item for parts in split for item in parts[:width]]
+    if flat:
+        rows = np.repeat(np.arange(len(values)), lengths)
+        cols = np.concatenate([np.arange(n) for n in lengths if n])
+        out[rows, cols] = pd.to_numeric(pd.Series(flat, dtype=object), errors="coerce").to_numpy(
+            dtype=np.float64
+        )
+    return out
+
+
+def _info_value(info, name):
+    """Raw INFO value (None if absent; "" for a flag)."""
+    for item in info.split(";"):
+        key, sep, value = item.partition("=")
+        if key == name:
+            return value if sep else ""
+    return None
+
+
+def read_vcf_arrays(
+    vcf_path,
+    sample="",
+    info_fields=(),
+    format_fields=("DP", "AF", "AD"),
+    region="",
+    records=False,
+):
+    """One sample's records as columnar NumPy arrays.
+
+    Returns CHROM/REF/ALT/FILTER (object), POS (int64), QUAL (float64, NaN
+    when "."), plus "INFO/<ID>" and "FORMAT/<ID>" arrays for the requested
+    fields, typed from the header (see _field_array). AD is therefore a 2-D
+    array of ref and per-alt depths. The sample column is picked by name
+    when present, else the first one. region ("chr1:100-200") restricts the
+    read through the tabix index. With records=True the raw record lines
+    are included under "records".
+    """
+    header = read_vcf_header(vcf_path)
+    if not header or not header[-1].startswith("#CHROM"):
+        raise ValueError(f"VCF is missing its #CHROM header line: {vcf_path}")
+    columns = header[-1].rstrip("\n").split("\t")
+    sample_col = columns.index(sample) if sample and sample in columns[9:] else 9
+    types = header_field_types(header)
+
+    lines = iter_region_lines(vcf_path, region) if region else iter_vcf_lines(vcf_path)
+    fixed = {name: [] for name in ("CHROM", "POS", "REF", "ALT", "QUAL", "FILTER")}
+    info_raw = {name: [] for name in info_fields}
+    format_raw = {name: [] for name in format_fields}
+    kept = []
+    for line in lines:
+        if line.startswith("#"):
+            continue
+        parts = line.rstrip("\n").split("\t")
+        fixed["CHROM"].append(parts[0])
+        fixed["POS"].append(int(parts[1]))
+        fixed["REF"].append(parts[3])
+        fixed["ALT"].append(parts[4])
+        fixed["QUAL"].append(parts[5])
+        fixed["FILTER"].append(parts[6])
+        for name in info_fields:
+            info_raw[name].append(_info_value(parts[7], name))
+        if format_fields:
+            keys = parts[8].split(":") if len(parts) > 8 else []
+            values = parts[sample_col].split(":") if len(parts) > sample_col else []
+            by_key = dict(zip(keys, values))
+            for name in format_fields:
+                value = by_key.get(name)
+                format_raw[name].append(None if value in (None, ".") else value)
+        if records:
+            kept.append(line)
+
+    arrays = {
+        "CHROM": np.array(fixed["CHROM"], dtype=object),
+        "POS": np.array(fixed["POS"], dtype=np.int64),
+        "REF": np.array(fixed["REF"], dtype=object),
+        "ALT": np.array(fixed["ALT"], dtype=object),
+        "QUAL": _field_array([None if q == "." else q for q in fixed["QUAL"]], "1", "Float"),
+        "FILTER": np.array(fixed["FILTER"], dtype=object),
+    }
+    for name, values in info_raw.items():
+        number, kind = _field_type(types, "INFO", name)
+        arrays[f"INFO/{name}"] = _field_array(values, number, kind)
+    for name, values in format_raw.items():
+        number, kind = _field_type(types, "FORMAT", name)
+        arrays[f"FORMAT/{name}"] = _field_array(values, number, kind)
+    if records:
+        arrays["records"] = np.array(kept, dtype=object)
+    return arrays
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""One-pass integrity check of repaired paired FASTQs.
+
+R1 and R2 are decompressed concurrently (pigz, else gzip, subprocesses)
+and read in lockstep: read names must match record by record once the
+comment and any /1, /2 suffix are removed, and both files must hold the
+same number of complete records. The singleton file is counted in a
+parallel thread. The result is written as JSON; the exit status is 1 when
+any check fails.
+
+In streaming mode (--interleaved -) the same name and count checks run on
+an interleaved stream that is copied to stdout batch by batch, so the check
+can sit between repair.sh and `bwa mem -p`. A batch is only passed on once
+its names match; the first mismatch stops the stream. Singletons, written by
+repair.sh alongside the stream, are checked afterwards with --pairs-from.
+"""
+
+import argparse
+import gzip
+import json
+import os
+import shutil
+import subprocess
+import sys
+from concurrent.futures import ThreadPoolExecutor
+from itertools import islice
+
+BATCH_RECORDS = 100000
+READ_BUFFER = 1 << 20
+
+
+def decompress_command(path, threads):
+    """pigz (or gzip) command streaming path to stdout; None without either."""
+    if shutil.which("pigz"):
+        return ["pigz", "-dc", "-p", str(max(1, threads)), path]
+    if shutil.which("gzip"):
+        return ["gzip", "-dc", path]
+    return None
+
+
+class FastqStream:
+    """Binary line stream of a (gzipped) FASTQ.
+
+    Gzipped input is decompressed by a pigz/gzip subprocess, so each open
+    stream inflates in its own process alongside the others.
+    """
+
+    def __init__(self, path, threads=1):
+        self.proc = None
+        command = decompress_command(path, threads) if path.endswith(".gz") else None
+        if command:
+            self.proc = subprocess.Popen(command, stdout=subprocess.PIPE, bufsize=READ_BUFFER)
+            self.handle = self.proc.stdout
+        elif path.endswith(".gz"):
+            self.handle = gzip.open(path, "rb")
+        else:
+            self.handle = open(path, "rb", buffering=READ_BUFFER)
+
+    def close(self):
+        self.handle.close()
+        if self.proc is not None:
+            self.proc.wait()
+            if self.proc.returncode not in (0, -13):
+                raise RuntimeError(f"{self.proc.args[0]} exited with status {self.proc.returncode}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def read_name(header, mate):
+    """Header line -> read name without '@', comment or /mate suffix."""
+    name = header[1:].split(None, 1)[0] if header[:1] == b"@" else header.split(None, 1)[0]
+    suffix = b"/" + mate
+    return name[:-2] if name.endswith(suffix) else name
+
+
+def count_records(path, threads=1):
+    """(records, complete) for a FASTQ; complete is False for a truncated file."""
+    lines = 0
+    last = b"\n"
+    with FastqStream(path, threads) as stream:
+        for block in iter(lambda: stream.handle.read(READ_BUFFER), b""):
+            lines += block.count(b"\n")
+            last = block[-1:]
+    if last != b"\n":
+        lines += 1
+    return lines // 4, lines % 4 == 0
+
+
+def header_batches(handle):
+    """Header lines of the next BATCH_RECORDS records, plus the raw line count."""
+    while True:
+        lines = list(islice(handle, BATCH_RECORDS * 4))
+        if not lines:
+            return
+        yield lines[0::4], len(lines)
+
+
+def first_mismatch(heads1, heads2):
+    """(index, r1 name, r2 name) of the first differing mate pair, or None."""
+    # Fast path: identical first tokens (Illumina names with mate comments).
+    names1 = [h.split(None, 1)[0] for h in heads1]
+    names2 = [h.split(None, 1)[0] for h in heads2]
+    if names1 == names2:
+        return None
+    names1 = [read_name(h, b"1") for h in heads1]
+    names2 = [read_name(h, b"2") for h in heads2]
+    if names1 == names2:
+        return None
+    for idx in range(max(len(names1), len(names2))):
+        n1 = names1[idx] if idx < len(names1) else b""
+        n2 = names2[idx] if idx < len(names2) else b""
+        if n1 != n2:
+            return idx, n1, n2
+    return None
+
+
+def _pair_result():
+    return {
+        "r1_records": 0,
+        "r2_records": 0,
+        "r1_complete": True,
+        "r2_complete": True,
+        "name_check": "PASS",
+        "first_mismatch": None,
+    }
+
+
+def _record_mismatch(result, offset, mismatch):
+    idx, n1, n2 = mismatch
+    result["name_check"] = "FAIL"
+    result["first_mismatch"] = {
+        "record": offset + idx + 1,
+        "r1": n1.decode(errors="replace"),
+        "r2": n2.decode(errors="replace"),
+    }
+
+
+def check_pairs(r1_path, r2_path, threads=1):
+    """Lockstep name check and record counts of R1/R2."""
+    result = _pair_result()
+    with FastqStream(r1_path, threads) as r1, FastqStream(r2_path, threads) as r2:
+        batches1 = header_batches(r1.handle)
+        batches2 = header_batches(r2.handle)
+        while True:
+            b1 = next(batches1, None)
+            b2 = next(batches2, None)
+            if b1 is None and b2 is None:
+                break
+            heads1, lines1 = b1 if b1 else ([], 0)
+            heads2, lines2 = b2 if b2 else ([], 0)
+            offset = result["r1_records"]
+            result["r1_records"] += (lines1 + 3) // 4
+            result["r2_records"] += (lines2 + 3) // 4
+            result["r1_complete"] &= lines1 % 4 == 0
+            result["r2_complete"] &= lines2 % 4 == 0
+            if result["first_mismatch"] is not None:
+                continue
+            mismatch = first_mismatch(heads1, heads2)
+            if mismatch is not None:
+                _record_mismatch(result, offset, mismatch)
+    return result
+
+
+def check_interleaved(handle, passthrough=None):
+    """Name check and record counts of an interleaved stream, optionally copied on.
+
+    With passthrough, each batch is written only after its names match and the
+    stream stops at the first mismatch.
+    """
+    result = _pair_result()
+    while True:
+        lines = list(islice(handle, BATCH_RECORDS * 8))
+        if not lines:
+            break
+        heads1 = lines[0::8]
+        heads2 = lines[4::8]
+        offset = result["r1_records"]
+        result["r1_records"] += len(heads1)
+        result["r2_records"] += len(heads2)
+        complete = len(lines) % 4 == 0
+        result["r1_complete"] &= complete
+        result["r2_complete"] &= complete
+        if result["first_mismatch"] is None:
+            mismatch = first_mismatch(heads1, heads2)
+            if mismatch is not None:
+                _record_mismatch(result, offset, mismatch)
+                if passthrough is not None:
+                    break
+        if passthrough is not None:
+            passthrough.write(b"".join(lines))
+    if passthrough is not None:
+        passthrough.flush()
+    return result
+
+
+def load_pair_result(path):
+    """Inputs, pair counts and name check from an earlier summary JSON."""
+    with open(path) as handle:
+        summary = json.load(handle)
+    return {key: summary[key] for key in ["r1", "r2", *_pair_result()]}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Verify repaired paired FASTQs in one pass.")
+    parser.add_argument("--r1", default="")
+    parser.add_argument("--r2", default="")
+    parser.add_argument(
+        "--interleaved", default="", help="Interleaved FASTQ instead of --r1/--r2 ('-' for stdin)"
+    )
+    parser.add_argument(
+        "--passthrough", action="store_true", help="Copy the interleaved stream to stdout"
+    )
+    parser.add_argument(
+        "--pairs-from", default="", help="Reuse the pair checks of an earlier summary JSON"
+    )
+    parser.add_argument("--singletons", default="")
+    parser.add_argument("--max-singleton-fraction", type=float, default=None)
+    parser.add_argument("--threads", type=int, default=1, help="Threads across the decompressors")
+    parser.add_argument("--out", required=True, help="JSON summary")
+    args = parser.parse_args()
+    if bool(args.r1) != bool(args.r2):
+        parser.error("--r1 and --r2 must be given together")
+    if sum(map(bool, [args.r1, args.interleaved, args.pairs_from])) != 1:
+        parser.error("give exactly one of --r1/--r2, --interleaved or --pairs-from")
+    if args.passthrough and not args.interleaved:
+        parser.error("--passthrough requires --interleaved")
+
+    per_stream = max(1, args.threads // 3)
+    with ThreadPoolExecutor(max_workers=1) as pool:
+        singleton_job = (
+            pool.submit(count_records, args.singletons, per_stream) if args.singletons else None
+        )
+        if args.pairs_from:
+            pairs = load_pair_result(args.pairs_from)
+        elif args.interleaved == "-":
+            pairs = check_interleaved(
+                sys.stdin.buffer, sys.stdout.buffer if args.passthrough else None
+            )
+        elif args.interleaved:
+            with FastqStream(args.interleaved, per_stream) as stream:
+                pairs = check_interleaved(
+                    stream.handle, sys.stdout.buffer if args.passthrough else None
+                )
+        else:
+            pairs = check_pairs(args.r1, args.r2, per_stream)
+        singletons, singletons_complete = singleton_job.result() if singleton_job else (0, True)
+
+    n_pairs = pairs["r1_records"]
+    fraction = singletons / n_pairs if n_pairs else None
+    failures = []
+    if pairs["name_check"] != "PASS":
+        failures.append("name_mismatch")
+    if pairs["r1_records"] != pairs["r2_records"]:
+        failures.append("record_count_mismatch")
+    if not (pairs["r1_complete"] and pairs["r2_complete"] and singletons_complete):
+        failures.append("truncated_fastq")
+    if n_pairs == 0:
+        failures.append("no_pairs")
+    if (
+        args.max_singleton_fraction is not None
+        and fraction is not None
+        and fraction > args.max_singleton_fraction
+    ):
+        failures.append("singleton_fraction")
+
+    summary = {
+        "r1": args.r1 or args.interleaved,
+        "r2": args.r2 or args.interleaved,
+        "singletons_path": args.singletons,
+        "pairs": n_pairs,
+        **pairs,
+        "singletons": singletons,
+        "singleton_fraction": fraction,
+        "max_singleton_fraction": args.max_singleton_fraction,
+        "status": "FAIL" if failures else "PASS",
+        "failures": failures,
+    }
+    os.makedirs(os.path.dirname(os.path.abspath(args.out)), exist_ok=True)
+    with open(args.out, "w") as handle:
+        json.dump(summary, handle, indent=2)
+        handle.write("\n")
+    print(json.dumps(summary), file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,4 +1,5 @@
 #!/usr/bin/env python3
+import re
 import sys
 from pathlib import Path
 
@@ -58,6 +59,15 @@ def validate_variant_calling(cfg):
     require_positive_number(maf, "variant_calling.mutect2.min_allele_fraction")
     if maf >= 1:
         fail("variant_calling.mutect2.min_allele_fraction must be < 1")
+    scatter = mutect2.get("scatter", {})
+    shards = scatter.get("shards", 1)
+    if shards != "auto" and (isinstance(shards, bool) or not isinstance(shards, int) or shards < 1):
+        fail('variant_calling.mutect2.scatter.shards must be a positive integer or "auto"')
+    max_shards = scatter.get("max_shards", 16)
+    if isinstance(max_shards, bool) or not isinstance(max_shards, int) or max_shards < 1:
+        fail("variant_calling.mutect2.scatter.max_shards must be a positive integer")
+    if scatter.get("balance", "territory") not in {"territory", "coverage"}:
+        fail("variant_calling.mutect2.scatter.balance must be one of: territory, coverage")
 
     post = vc.get("postfilter", {})
     pass_only = post.get("pass_only", True)
@@ -83,6 +93,10 @@ def validate_qc_gates(cfg):
         fail("qc_gates.max_dup_fraction must be <= 1")
     if gates.get("max_contamination", 1) > 1:
         fail("qc_gates.max_contamination must be <= 1")
+    if not isinstance(gates.get("early_abort", False), bool):
+        fail("qc_gates.early_abort must be boolean")
+    if gates.get("early_abort", False) and cfg.get("variant_flags", {}).get("cohort_batch", False):
+        fail("qc_gates.early_abort and variant_flags.cohort_batch cannot both be enabled")
 
 
 def validate_assay(cfg):
@@ -134,6 +148,8 @@ def validate_assay(cfg):
             fail("assay.chip.enabled must be boolean")
         if "panel_tsv" in chip and not isinstance(chip["panel_tsv"], str):
             fail("assay.chip.panel_tsv must be a string path")
+        if "regions" in chip and not isinstance(chip["regions"], str):
+            fail("assay.chip.regions must be a string path")
 
     wbc = assay.get("wbc_filter", {})
     if wbc:
@@ -156,6 +172,8 @@ def validate_clinical_annotations(cfg):
         fail("clinical_annotations.panel_tsv must be a string path")
     if "clinvar_cosmic_tsv" in ann and not isinstance(ann["clinvar_cosmic_tsv"], str):
         fail("clinical_annotations.clinvar_cosmic_tsv must be a string path")
+    if "regions" in ann and not isinstance(ann["regions"], str):
+        fail("clinical_annotations.regions must be a string path")
 
 
 def validate_annotation(cfg):
@@ -178,6 +196,8 @@ def validate_pbmc_blacklist(cfg):
         fail("pbmc_blacklist.enabled must be boolean")
     if "calls_dir" in pbmc and not isinstance(pbmc["calls_dir"], str):
         fail("pbmc_blacklist.calls_dir must be a string path")
+    if "store_dir" in pbmc and not isinstance(pbmc["store_dir"], str):
+        fail("pbmc_blacklist.store_dir must be a string path")
     if "max_vaf" in pbmc:
         max_vaf = pbmc["max_vaf"]
         require_positive_number(pbmc["max_vaf"], "pbmc_blacklist.max_vaf", allow_zero=True)
@@ -247,6 +267,99 @@ def validate_pair_repair(cfg):
             fail("pair_repair.max_singleton_fraction must be <= 1")
 
 
+def validate_alignment(cfg):
+    align = cfg.get("alignment", {})
+    if not align:
+        return
+    if "streaming" in align and not isinstance(align["streaming"], bool):
+        fail("alignment.streaming must be boolean")
+    if "fused_sort" in align and not isinstance(align["fused_sort"], bool):
+        fail("alignment.fused_sort must be boolean")
+    if "sort_mem_per_thread_mb" in align:
+        mem = align["sort_mem_per_thread_mb"]
+        if isinstance(mem, bool) or not isinstance(mem, int) or mem <= 0:
+            fail("alignment.sort_mem_per_thread_mb must be a positive integer")
+
+
+def validate_dedup(cfg):
+    dedup = cfg.get("dedup", {})
+    if not dedup:
+        return
+    if dedup.get("engine", "gatk") not in {"gatk", "samtools"}:
+        fail("dedup.engine must be one of: gatk, samtools")
+    distance = dedup.get("optical_distance", 100)
+    if isinstance(distance, bool) or not isinstance(distance, int) or distance < 0:
+        fail("dedup.optical_distance must be a non-negative integer")
+    regex = dedup.get("umi_barcode_regex", "_([ACGTN]+)$")
+    if not isinstance(regex, str) or "(" not in regex:
+        fail("dedup.umi_barcode_regex must be a string with a capture group")
+    try:
+        re.compile(regex)
+    except re.error as exc:
+        fail(f"dedup.umi_barcode_regex is not a valid regex: {exc}")
+
+
+def validate_bqsr(cfg):
+    bqsr = cfg.get("bqsr", {})
+    if not bqsr:
+        return
+    for key in ("restrict_to_panel", "keep_bam"):
+        if not isinstance(bqsr.get(key, True), bool):
+            fail(f"bqsr.{key} must be boolean")
+    padding = bqsr.get("interval_padding", 100)
+    if isinstance(padding, bool) or not isinstance(padding, int) or padding < 0:
+        fail("bqsr.interval_padding must be a non-negative integer")
+    shards = bqsr.get("shards", 1)
+    if shards != "auto" and (isinstance(shards, bool) or not isinstance(shards, int) or shards < 1):
+        fail('bqsr.shards must be a positive integer or "auto"')
+    max_shards = bqsr.get("max_shards", 16)
+    if isinstance(max_shards, bool) or not isinstance(max_shards, int) or max_shards < 1:
+        fail("bqsr.max_shards must be a positive integer")
+    if shards != 1 and not bqsr.get("restrict_to_panel", False):
+        fail("bqsr.shards other than 1 requires bqsr.restrict_to_panel")
+
+
+def validate_benchmarks(cfg):
+    bench = cfg.get("benchmarks", {})
+    if not bench:
+        return
+    baseline = bench.get("baseline", "")
+    if baseline is not None and not isinstance(baseline, str):
+        fail("benchmarks.baseline must be a path string")
+    require_positive_number(
+        bench.get("regression_threshold", 0.25), "benchmarks.regression_threshold", allow_zero=True
+    )
+
+
+def validate_resource_model(cfg):
+    model = cfg.get("resource_model", {})
+    if not model:
+        return
+    path = model.get("model", "")
+    if path is not None and not isinstance(path, str):
+        fail("resource_model.model must be a path string")
+    for key in ("tune_threads", "refit"):
+        if not isinstance(model.get(key, False), bool):
+            fail(f"resource_model.{key} must be boolean")
+    history = model.get("history", [])
+    if history is not None and (
+        not isinstance(history, list) or not all(isinstance(item, str) for item in history)
+    ):
+        fail("resource_model.history must be a list of paths/globs")
+    require_positive_number(model.get("safety_margin", 0.2), "resource_model.safety_margin", allow_zero=True)
+    escalation = model.get("retry_escalation", 1.5)
+    require_positive_number(escalation, "resource_model.retry_escalation")
+    if escalation < 1:
+        fail("resource_model.retry_escalation must be >= 1")
+    heap = model.get("java_heap_fraction", 0.8)
+    require_positive_number(heap, "resource_model.java_heap_fraction")
+    if heap > 1:
+        fail("resource_model.java_heap_fraction must be <= 1")
+    min_jobs = model.get("min_jobs", 3)
+    if isinstance(min_jobs, bool) or not isinstance(min_jobs, int) or min_jobs < 1:
+        fail("resource_model.min_jobs must be a positive integer")
+
+
 def validate_clinical_gates(cfg):
     gates = cfg.get("clinical_support_gates", {})
     if not gates:
@@ -267,6 +380,69 @@ def validate_clinical_gates(cfg):
         fail("clinical_support_gates.require_orthogonal_low_vaf must be boolean")
     if gates.get("chip_flag_action", "review") not in {"review", "fail", "ignore"}:
         fail("clinical_support_gates.chip_flag_action must be review/fail/ignore")
+    validate_custom_gate_rules(gates.get("custom_rules", []))
+
+
+def validate_custom_gate_rules(rules):
+    where = "clinical_support_gates.custom_rules"
+    if not isinstance(rules, list):
+        fail(f"{where} must be a list")
+    builtin = {
+        "low_dp",
+        "low_af",
+        "low_alt_reads",
+        "needs_orthogonal_support",
+        "matched_wbc",
+        "chip_review",
+        "chip_fail",
+    }
+    seen = set()
+    for idx, rule in enumerate(rules):
+        if not isinstance(rule, dict):
+            fail(f"{where}[{idx}] must be a mapping")
+        for key in ["name", "column", "op", "value"]:
+            require_key(rule, key, f"{where}[{idx}]")
+        name = rule["name"]
+        if not isinstance(name, str) or not name:
+            fail(f"{where}[{idx}].name must be a non-empty string")
+        if name in builtin or name in seen:
+            fail(f"{where}[{idx}].name duplicates an existing gate: {name}")
+        seen.add(name)
+        op = rule["op"]
+        if op not in {"lt", "le", "gt", "ge", "eq", "ne", "in", "not_in"}:
+            fail(f"{where}[{idx}].op must be one of lt/le/gt/ge/eq/ne/in/not_in")
+        if op in {"lt", "le", "gt", "ge"} and not isinstance(rule["value"], (int, float)):
+            fail(f"{where}[{idx}].value must be numeric for op {op}")
+        if op in {"in", "not_in"} and not isinstance(rule["value"], list):
+            fail(f"{where}[{idx}].value must be a list for op {op}")
+        if rule.get("action", "fail") not in {"review", "fail"}:
+            fail(f"{where}[{idx}].action must be review/fail")
+    if len(rules) + len(builtin) > 64:
+        fail(f"{where} supports at most {64 - len(builtin)} rules")
+
+
+def validate_variant_flags(cfg):
+    flags = cfg.get("variant_flags", {})
+    if not flags:
+        return
+    if "cohort_batch" in flags and not isinstance(flags["cohort_batch"], bool):
+        fail("variant_flags.cohort_batch must be boolean")
+    if "workers" in flags:
+        workers = flags["workers"]
+        if not isinstance(workers, int) or isinstance(workers, bool) or workers < 1:
+            fail("variant_flags.workers must be a positive integer")
+
+
+def validate_variant_postprocess(cfg):
+    post = cfg.get("variant_postprocess", {})
+    if not post:
+        return
+    if "fused" in post and not isinstance(post["fused"], bool):
+        fail("variant_postprocess.fused must be boolean")
+    if post.get("fused", False) and cfg.get("variant_flags", {}).get("cohort_batch", False):
+        fail("variant_postprocess.fused and variant_flags.cohort_batch cannot both be enabled")
+    if post.get("intermediate_format", "tsv") not in {"tsv", "parquet", "arrow"}:
+        fail("variant_postprocess.intermediate_format must be one of: tsv, parquet, arrow")
 
 
 def validate_lod(cfg):
@@ -285,6 +461,35 @@ def validate_lod(cfg):
         require_positive_number(item["max_af"], f"lod.bins[{idx}].max_af")
         if item["min_af"] >= item["max_af"]:
             fail(f"lod.bins[{idx}] min_af must be < max_af")
+    if lod.get("coverage_source", "regions") not in {"regions", "per_base", "quantized"}:
+        fail("lod.coverage_source must be one of: regions, per_base, quantized")
+
+
+def validate_fragmentomics(cfg):
+    frag = cfg.get("fragmentomics", {})
+    if not frag:
+        return
+    if "enabled" in frag and not isinstance(frag["enabled"], bool):
+        fail("fragmentomics.enabled must be boolean")
+    for key in ["threads", "max_length", "window_size"]:
+        if key in frag:
+            value = frag[key]
+            if not isinstance(value, int) or isinstance(value, bool) or value < 1:
+                fail(f"fragmentomics.{key} must be a positive integer")
+    require_positive_number(frag.get("min_mapq", 0), "fragmentomics.min_mapq", allow_zero=True)
+    for key in ["short_range", "long_range"]:
+        if key not in frag:
+            continue
+        bounds = frag[key]
+        if (
+            not isinstance(bounds, list)
+            or len(bounds) != 2
+            or not all(isinstance(x, int) and not isinstance(x, bool) for x in bounds)
+            or not 0 <= bounds[0] <= bounds[1]
+        ):
+            fail(f"fragmentomics.{key} must be [min, max] integers with min <= max")
+        if bounds[1] > frag.get("max_length", 1000):
+            fail(f"fragmentomics.{key} must not exceed fragmentomics.max_length")
 
 
 def validate_config(path):
@@ -304,7 +509,10 @@ def validate_config(path):
     validate_qc_gates(cfg)
     validate_assay(cfg)
     validate_clinical_gates(cfg)
+    validate_variant_flags(cfg)
+    validate_variant_postprocess(cfg)
     validate_lod(cfg)
+    validate_fragmentomics(cfg)
     validate_clinical_annotations(cfg)
     validate_annotation(cfg)
     validate_pbmc_blacklist(cfg)
@@ -312,6 +520,11 @@ def validate_config(path):
     validate_clinical_release(cfg)
     validate_clinical_output(cfg)
     validate_pair_repair(cfg)
+    validate_alignment(cfg)
+    validate_dedup(cfg)
+    validate_bqsr(cfg)
+    validate_benchmarks(cfg)
+    validate_resource_model(cfg)
     print(f"OK: {path}")
 
 